@@ -0,0 +1,36 @@
+import unittest
+import bank_binary
+from bank_binary import decode, encode, frame
+
+class TestBinaryCodec(unittest.TestCase):
+    def test_round_trip(self):
+        value = [None, True, False, 0, -5, 2 ** 40, 1.5, "cuenta_ñ", b"\x00\x01",
+                 [1, [2, "tres"]], {"seq": 3, "type": "deposit", "amount": 25.5}]
+        self.assertEqual(decode(encode(value)), value)
+
+    def test_tuple_encoded_as_list(self):
+        self.assertEqual(decode(encode(("deposit", ("cuenta", 100)))), ["deposit", ["cuenta", 100]])
+
+    def test_unsupported_values(self):
+        with self.assertRaises(TypeError):
+            encode(object())
+        with self.assertRaises(OverflowError):
+            encode(2 ** 64)
+
+    def test_malformed_data(self):
+        data = encode(["deposit", ["cuenta", 100]])
+        for broken in (data[:-3], data + b"N", b"z", b"s\x00\x00\x00\x09abc", b""):
+            with self.assertRaises(ValueError):
+                decode(broken)
+
+    def test_frame_has_length_prefix(self):
+        data = frame("hola")
+        self.assertEqual(bank_binary.FRAME_HEADER.unpack(data[:4])[0], len(data) - 4)
+        self.assertEqual(decode(data[4:]), "hola")
+
+    def test_binary_proxy_rejects_other_schemes(self):
+        with self.assertRaises(ValueError):
+            bank_binary.BinaryProxy("http://localhost:8000")
+
+if __name__ == '__main__':
+    unittest.main()
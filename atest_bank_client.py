@@ -1,27 +1,84 @@
 import unittest
 from unittest.mock import patch     #Herramientas para crear objetos simulados (mocks).
-from bank_client import BankClient, main_menu, user_menu
+import threading
+from bank_client import BankClient, ConnectionPool, main_menu, user_menu
 
 class TestBankClient(unittest.TestCase):
 
     @patch('xmlrpc.client.ServerProxy') #Verifica que login devuelve True.
     def test_login_success(self, mock_server_proxy):
         client = BankClient('http://localhost:8000')
-        mock_server_proxy().authenticate.return_value = True
+        mock_server_proxy().login.return_value = 'token'
         self.assertTrue(client.login('test_account', 'test_password', notifications_enabled=False))
         
     @patch('xmlrpc.client.ServerProxy') #Verifica que login devuelve False.
     def test_login_failure(self, mock_server_proxy):
         client = BankClient('http://localhost:8000')
-        mock_server_proxy().authenticate.return_value = False
+        mock_server_proxy().login.return_value = False
         self.assertFalse(client.login('test_account', 'wrong_password'))
 
+    @patch('xmlrpc.client.ServerProxy') #Verifica que tras login las operaciones envían el token de sesión.
+    def test_session_token(self, mock_server_proxy):
+        client = BankClient('http://localhost:8000')
+        mock_server_proxy().login.return_value = 'token'
+        client.login('test_account', 'test_password', notifications_enabled=False)
+        client.deposit(100)
+        mock_server_proxy().deposit.assert_called_with('token', 100)
+        client.delete_account('test_account')
+        mock_server_proxy().delete_account.assert_called_with('token')
+        with patch('builtins.print'):
+            client.logout()
+        mock_server_proxy().logout.assert_called_with('token')
+        self.assertIsNone(client.session)
+
+    @patch('xmlrpc.client.ServerProxy') #Verifica que el pool reutiliza las conexiones y no supera su tamaño.
+    def test_connection_pool(self, mock_server_proxy):
+        mock_server_proxy.side_effect = lambda url: object()
+        pool = ConnectionPool('http://localhost:8000', size=2)
+        with pool.connection() as first:
+            with pool.connection() as second:
+                self.assertIsNot(first, second)
+                waiter = threading.Thread(target=lambda: pool.connection().__enter__())
+                waiter.start()
+                waiter.join(0.1)
+                self.assertTrue(waiter.is_alive())  # Sin conexiones libres hay que esperar
+        waiter.join()
+        with pool.connection() as reused:
+            self.assertIn(reused, (first, second))
+        self.assertEqual(mock_server_proxy.call_count, 2)
+
     @patch('xmlrpc.client.ServerProxy') #Verifica que el mensaje devuelto por create_account es el esperado.
     def test_create_account(self, mock_server_proxy):
         client = BankClient('http://localhost:8000')
         mock_server_proxy().create_account.return_value = "Cuenta creada exitosamente."
         self.assertEqual(client.create_account('test_account', 'test_password'), "Cuenta creada exitosamente.")
 
+    @patch('bank_client.time.sleep')
+    @patch('xmlrpc.client.ServerProxy') #Verifica que el hilo de notificaciones ignora un error y espera antes de reintentar.
+    def test_listen_ignores_errors(self, mock_server_proxy, mock_sleep):
+        client = BankClient('http://localhost:8000')
+        client.session = 'token'
+        mock_server_proxy().wait_notifications.return_value = "Demasiadas solicitudes: reintente más tarde."
+        mock_sleep.side_effect = lambda seconds: setattr(client, 'stop_notification_thread', True)
+        with patch('builtins.print') as mock_print:
+            client.listen_for_notifications()
+        mock_print.assert_not_called()
+        mock_sleep.assert_called_once()
+
+    @patch('xmlrpc.client.ServerProxy') #Verifica que las páginas del historial no envían None, que ServerProxy no admite.
+    def test_transaction_history_pages(self, mock_server_proxy):
+        client = BankClient('http://localhost:8000')
+        client.current_account = 'test_account'
+        history = mock_server_proxy().get_transaction_history
+        client.get_transaction_history(limit=1)
+        history.assert_called_with('test_account', 0, 1, {})
+        client.get_transaction_history(cursor=1)
+        history.assert_called_with('test_account', 1, 0, {})
+        client.get_transaction_history(filters={'types': ['deposit']})
+        history.assert_called_with('test_account', 0, 0, {'types': ['deposit']})
+        client.get_transaction_history()
+        history.assert_called_with('test_account')
+
     def mock_input(self, inputs):   #simular la entrada del usuario en pruebas de menús
         # Crea una función de entrada que devuelve valores del iterador
         it = iter(inputs)
@@ -39,7 +96,7 @@ class TestBankClient(unittest.TestCase):
     @patch('xmlrpc.client.ServerProxy')
     def test_main_menu_login_and_logout(self, mock_server_proxy):
         client = BankClient('http://localhost:8000')
-        mock_server_proxy().authenticate.return_value = True
+        mock_server_proxy().login.return_value = 'token'
         with patch('builtins.print') as mock_print:
             main_menu(client, self.mock_input(['1', 'test_account', 'test_password', '6', '3']))
             mock_print.assert_any_call("Ingreso exitoso.")
@@ -83,5 +140,45 @@ class TestBankClient(unittest.TestCase):
             mock_print.assert_any_call("Transacción 1")
             mock_print.assert_any_call("Transacción 2")
 
+    @patch('xmlrpc.client.ServerProxy') #Verifica que las transacciones estructuradas se muestran como texto.
+    def test_user_menu_structured_history(self, mock_server_proxy):
+        client = BankClient('http://localhost:8000')
+        client.current_account = 'test_account'
+        mock_server_proxy().get_transaction_history.return_value = {
+            "transactions": [
+                {"seq": 0, "type": "deposit", "amount": 100, "timestamp": 0.0},
+                {"seq": 1, "type": "transfer_out", "amount": 25.5, "counterparty": "another_account", "timestamp": 0.0},
+            ],
+            "next_cursor": None,
+        }
+        with patch('builtins.print') as mock_print:
+            user_menu(client, self.mock_input(['5', '6']))
+            mock_print.assert_any_call("Depósito: 100")
+            mock_print.assert_any_call("Transferencia a another_account: 25.5")
+
+    @patch('xmlrpc.client.ServerProxy') #Verifica que el lote se envía en trozos al salir del bloque.
+    def test_batch(self, mock_server_proxy):
+        client = BankClient('http://localhost:8000')
+        client.current_account = 'test_account'
+        mock_server_proxy().execute_batch.side_effect = lambda operations: ["ok"] * len(operations)
+        with client.batch(max_batch_size=2) as batch:
+            batch.deposit(100)
+            batch.deposit(50, 'another_account')
+            batch.transfer('another_account', 25)
+        self.assertEqual(batch.results, ["ok", "ok", "ok"])
+        mock_server_proxy().execute_batch.assert_any_call(
+            [['deposit', 'test_account', 100], ['deposit', 'another_account', 50]])
+        mock_server_proxy().execute_batch.assert_any_call(
+            [['transfer', 'test_account', 'another_account', 25]])
+
+    @patch('xmlrpc.client.ServerProxy') #Verifica que la clave de idempotencia solo se envía si se indica.
+    def test_idempotency_key(self, mock_server_proxy):
+        client = BankClient('http://localhost:8000')
+        client.current_account = 'test_account'
+        client.transfer('another_account', 25, 'clave-1')
+        mock_server_proxy().transfer.assert_called_with('test_account', 'another_account', 25, 'clave-1')
+        client.deposit(10)
+        mock_server_proxy().deposit.assert_called_with('test_account', 10)
+
 if __name__ == '__main__':
     unittest.main()
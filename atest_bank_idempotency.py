@@ -0,0 +1,67 @@
+import threading
+import time
+import unittest
+from bank_idempotency import IDEMPOTENCY_CONFLICT, IdempotencyCache
+from atest_support import FakeClock
+
+class TestIdempotencyCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = IdempotencyCache(max_keys=2, ttl=10, clock=self.clock)
+        self.calls = []
+
+    def operation(self, value):
+        self.calls.append(value)
+        return f"resultado {len(self.calls)}"
+
+    def test_repeated_key_returns_first_result(self):
+        self.assertEqual(self.cache.run("a", "k1", self.operation, 1), "resultado 1")
+        self.assertEqual(self.cache.run("a", "k1", self.operation, 1), "resultado 1")
+        self.assertEqual(self.cache.run("b", "k1", self.operation, 1), "resultado 2")
+        self.assertEqual(self.cache.run("a", None, self.operation, 1), "resultado 3")
+        self.assertEqual(self.cache.run("a", None, self.operation, 1), "resultado 4")
+
+    def test_key_reused_with_other_parameters(self):
+        self.assertEqual(self.cache.run("a", "k1", self.operation, 1), "resultado 1")
+        self.assertEqual(self.cache.run("a", "k1", self.operation, 2), IDEMPOTENCY_CONFLICT)
+        self.assertEqual(self.cache.run("a", "k2", self.operation, 2, request=("op", 1)), "resultado 2")
+        self.assertEqual(self.cache.run("a", "k2", self.operation, 3, request=("op", 1)), "resultado 2")
+        self.assertEqual(self.cache.run("a", "k2", self.operation, 2, request=("op", 2)), IDEMPOTENCY_CONFLICT)
+        self.assertEqual(self.calls, [1, 2])
+
+    def test_results_expire_and_are_bounded(self):
+        self.cache.run("a", "k1", self.operation, 1)
+        self.clock.now = 5
+        self.cache.run("a", "k2", self.operation, 2)
+        self.clock.now = 10
+        self.assertEqual(self.cache.run("a", "k1", self.operation, 1), "resultado 3")
+        self.assertEqual(self.cache.run("a", "k3", self.operation, 3), "resultado 4")
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.run("a", "k2", self.operation, 2), "resultado 5")
+
+    def test_failures_are_not_cached(self):
+        def failing():
+            raise RuntimeError("caída")
+        with self.assertRaises(RuntimeError):
+            self.cache.run("a", "k1", failing)
+        self.assertEqual(self.cache.run("a", "k1", self.operation, 1), "resultado 1")
+
+    def test_concurrent_retries_run_once(self):
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            time.sleep(0.1)
+            return self.operation(1)
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(self.cache.run("a", "k1", slow)))
+        first.start()
+        started.wait()
+        results.append(self.cache.run("a", "k1", slow))
+        first.join()
+        self.assertEqual(results, ["resultado 1", "resultado 1"])
+        self.assertEqual(self.calls, [1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+from bank_import import import_file, read_accounts
+from bank_server import BankServer
+
+class TestBankImport(unittest.TestCase):
+    def setUp(self):
+        self.server = BankServer(kdf_iterations=1000)
+
+    def test_read_csv(self):
+        lines = ["account_id,password,balance\n", "a,clave,10\n", "b,clave,\n", "c,clave,diez\n"]
+        self.assertEqual(list(read_accounts(lines, 'csv')), [
+            (2, {"account_id": "a", "password": "clave", "balance": "10"}),
+            (3, {"account_id": "b", "password": "clave"}),
+            (4, "Saldo inicial inválido.")])
+
+    def test_import_jsonl_in_chunks(self):
+        lines = [f'{{"account_id": "cuenta_{i}", "password": "clave", "balance": 1.5}}\n' for i in range(7)]
+        lines[3] = "{roto\n"
+        lines.append('{"account_id": "cuenta_0", "password": "clave"}\n')
+        result = import_file(self.server, lines, 'jsonl', chunk_size=2, connections=2)
+        self.assertEqual(result, {"created": 6, "errors": [[4, "JSON inválido."], [8, "La cuenta ya existe."]]})
+        self.assertEqual(self.server.get_balance("cuenta_6"), 1.5)
+        self.assertTrue(self.server.authenticate("cuenta_2", "clave"))
+
+if __name__ == '__main__':
+    unittest.main()
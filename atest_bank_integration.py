@@ -1,8 +1,18 @@
 import unittest
-from bank_client import BankClient
-from bank_server import BankServer
+from bank_client import BankClient, format_transaction
+from bank_server import BankServer, create_server
+from bank_async_server import AsyncBankServer, BinaryBankServer
+from bank_async_client import AsyncBankClient, AsyncConnectionPool
+from bank_export import export_to_file
+import asyncio
+import http.client
+import io
+import json
+import socket
 import threading
 import time
+import urllib.request
+from xmlrpc.client import Fault, ProtocolError, ServerProxy
 from xmlrpc.server import SimpleXMLRPCServer
 
 class TestBankIntegration(unittest.TestCase):
@@ -21,6 +31,7 @@ class TestBankIntegration(unittest.TestCase):
 
     @classmethod
     def run_server(cls):
+        cls.server.notification_wait_limit = 0  # Servidor de un hilo: sin esperas largas
         cls.rpc_server = SimpleXMLRPCServer(('localhost', 8000), allow_none=True)
         cls.rpc_server.register_instance(cls.server)
         cls.rpc_server.serve_forever()
@@ -102,6 +113,311 @@ class TestBankIntegration(unittest.TestCase):
         self.client.logout()
 
 
+class TestThreadPoolServer(unittest.TestCase):
+
+    def setUp(self):
+        self.rpc_server = create_server(BankServer(), port=0, max_workers=4, log_requests=False)
+        self.server_thread = threading.Thread(target=self.rpc_server.serve_forever)
+        self.server_thread.start()
+        host, port = self.rpc_server.server_address[:2]
+        self.url = f"http://{host}:{port}"
+
+    def tearDown(self):
+        self.rpc_server.shutdown()
+        self.rpc_server.server_close()
+        self.server_thread.join()
+
+    def test_slow_client_does_not_block_others(self):
+        # Una conexión con la solicitud a medias ocupa un hilo, pero no el servidor entero.
+        with socket.create_connection(self.rpc_server.server_address[:2]) as slow:
+            slow.sendall(b"POST /RPC2 HTTP/1.0\r\n")
+            client = BankClient(self.url)
+            self.assertEqual(client.create_account("pool_account", "password"), "Cuenta creada exitosamente.")
+            slow.sendall(b"Content-Length: 0\r\n\r\n")
+
+    def test_logout_wakes_notification_listener(self):
+        client = BankClient(self.url)
+        client.create_account("pool_account", "password")
+        client.login("pool_account", "password", notifications_enabled=True)
+        time.sleep(0.2)
+        started = time.monotonic()
+        client.logout()
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertFalse(client.notification_thread.is_alive())
+
+    def test_connection_closed_after_each_response(self):   #HTTP/1.0: una conexión no retiene un hilo del pool
+        connection = http.client.HTTPConnection(*self.rpc_server.server_address[:2])
+        connection.request("GET", "/metrics")
+        response = connection.getresponse()
+        response.read()
+        self.assertEqual(response.version, 10)
+        self.assertTrue(response.will_close)
+        connection.close()
+
+    def test_async_client(self):   #el servidor de hilos cierra la conexión tras cada respuesta
+        async def scenario():
+            client = AsyncBankClient(self.url + "/RPC2", pool_size=2)
+            await client.create_account("pool_account", "password")
+            await client.login("pool_account", "password", notifications_enabled=False)
+            await asyncio.gather(*(client.deposit(5) for _ in range(10)))
+            balance = await client.get_balance()
+            await client.logout()
+            await client.close()
+            return balance
+
+        self.assertEqual(asyncio.run(scenario()), 50)
+
+    def test_metrics_endpoint(self):
+        client = BankClient(self.url)
+        client.create_account("pool_account", "password")
+        with urllib.request.urlopen(self.url + "/metrics") as response:
+            self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+            text = response.read().decode()
+        self.assertIn('bank_rpc_calls_total{method="create_account",status="ok"} 1', text)
+        self.assertIn('bank_lock_hold_seconds_count{lock="global"} 1', text)
+
+    def test_export_over_rpc(self):
+        client = BankClient(self.url)
+        for account_id in ("export_a", "export_b"):
+            client.create_account(account_id, "password")
+        client.login("export_a", "password", notifications_enabled=False)
+        client.deposit(10)
+        client.transfer("export_b", 4)
+        output = io.StringIO()
+        export = export_to_file(client, output, chunk_size=2)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(export["transactions"], 3)
+        self.assertEqual([(line["record"], line.get("balance", line.get("amount"))) for line in lines[1:]],
+                         [("account", 6), ("transaction", 10), ("transaction", 4),
+                          ("account", 4), ("transaction", 4)])
+        self.assertEqual(client.export_chunk(export["export_id"]), "Exportación inexistente o cerrada.")
+        client.logout()
+
+    def test_concurrent_deposits(self):
+        client = BankClient(self.url)
+        client.create_account("pool_account", "password")
+
+        def deposit():
+            worker = BankClient(self.url)
+            worker.current_account = "pool_account"
+            for _ in range(10):
+                worker.deposit(1)
+
+        threads = [threading.Thread(target=deposit) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        client.current_account = "pool_account"
+        self.assertEqual(client.get_balance(), 80)
+
+
+class TestAdmissionControl(unittest.TestCase):
+
+    def start(self, **kwargs):
+        self.rpc_server = create_server(BankServer(kdf_iterations=1000), port=0, log_requests=False, **kwargs)
+        self.server_thread = threading.Thread(target=self.rpc_server.serve_forever)
+        self.server_thread.start()
+        host, port = self.rpc_server.server_address[:2]
+        return ServerProxy(f"http://{host}:{port}/RPC2")
+
+    def tearDown(self):
+        self.rpc_server.shutdown()
+        self.rpc_server.server_close()
+        self.server_thread.join()
+
+    def test_busy_server_rejects_immediately(self):
+        proxy = self.start(max_workers=1, max_in_flight=1)
+        with socket.create_connection(self.rpc_server.server_address[:2]) as slow:
+            slow.sendall(b"POST /RPC2 HTTP/1.0\r\n")  # Ocupa el único hilo
+            started = time.monotonic()
+            with self.assertRaises(ProtocolError) as rejected:
+                proxy.create_account("busy_account", "password")
+            self.assertEqual(rejected.exception.errcode, 503)
+            self.assertEqual(rejected.exception.headers["Retry-After"], "1")
+            self.assertLess(time.monotonic() - started, 1)
+            slow.sendall(b"Content-Length: 0\r\n\r\n")
+            slow.recv(1024)
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                self.assertEqual(proxy.create_account("busy_account", "password"), "Cuenta creada exitosamente.")
+                break
+            except ProtocolError:
+                self.assertLess(time.monotonic(), deadline)  # El hilo aún no ha liberado su plaza
+                time.sleep(0.01)
+        self.assertGreaterEqual(self.rpc_server.instance.metrics.rejected.value(('busy',)), 1)
+
+    def test_client_rate_limit(self):
+        proxy = self.start(max_workers=2, client_rate_limit=2)
+        proxy.create_account("limited_account", "password")
+        proxy.get_balance("limited_account")
+        with self.assertRaises(ProtocolError) as rejected:
+            proxy.get_balance("limited_account")
+        self.assertEqual(rejected.exception.errcode, 429)
+
+
+class TestAsyncBankServer(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.async_server = AsyncBankServer(BankServer())
+        self.loop_thread = threading.Thread(target=self.loop.run_forever)
+        self.loop_thread.start()
+        server = asyncio.run_coroutine_threadsafe(self.async_server.start(port=0), self.loop).result()
+        host, port = server.sockets[0].getsockname()[:2]
+        self.address = (host, port)
+        self.url = f"http://{host}:{port}"
+
+    def tearDown(self):
+        asyncio.run_coroutine_threadsafe(self.async_server.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join()
+        self.loop.close()
+
+    def test_operations_over_keep_alive(self):
+        client = BankClient(self.url)
+        self.assertEqual(client.create_account("async_account", "password"), "Cuenta creada exitosamente.")
+        self.assertTrue(client.login("async_account", "password", notifications_enabled=False))
+        client.deposit(100)
+        client.withdraw(40)
+        self.assertEqual(client.get_balance(), 60)
+        self.assertEqual([format_transaction(t) for t in client.get_transaction_history()],
+                         ["Depósito: 100", "Retiro: 40"])
+        page = client.get_transaction_history(limit=1)
+        self.assertEqual([t["amount"] for t in page["transactions"]], [100])
+        self.assertEqual([t["amount"] for t in client.get_transaction_history(cursor=page["next_cursor"])["transactions"]],
+                         [40])
+        self.assertEqual(len(client.get_transaction_history(filters={"types": ["withdraw"]})["transactions"]), 1)
+        self.assertEqual(self.async_server.open_connections, 1)
+        client.logout()
+
+    def test_pooled_client_from_many_threads(self):
+        client = BankClient(self.url, pool_size=4)
+        client.create_account("pooled_account", "password")
+        client.login("pooled_account", "password", notifications_enabled=False)
+        threads = [threading.Thread(target=lambda: [client.deposit(1) for _ in range(25)]) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(client.get_balance(), 200)
+        self.assertLessEqual(self.async_server.open_connections, 4)
+        client.logout()
+        client.close()
+
+    def test_async_client_many_customers(self):
+        self.async_server.bank_server.kdf_iterations = 1000  # Solo se mide la concurrencia, no el KDF
+        async def scenario():
+            pool = AsyncConnectionPool(self.url, size=8)
+            customers = [AsyncBankClient(pool=pool) for _ in range(300)]
+            await asyncio.gather(*(customer.create_account(f"customer_{i}", "password")
+                                   for i, customer in enumerate(customers)))
+            await asyncio.gather(*(customer.login(f"customer_{i}", "password", notifications_enabled=False)
+                                   for i, customer in enumerate(customers)))
+            await asyncio.gather(*(customer.deposit(100) for customer in customers))
+            await asyncio.gather(*(customer.transfer("customer_0", 10) for customer in customers[1:]))
+            balances = await asyncio.gather(*(customer.get_balance() for customer in customers))
+            history = [t async for t in customers[1].iter_transaction_history(page_size=1)]
+            await pool.close()
+            return balances, history
+
+        balances, history = asyncio.run(scenario())
+        self.assertEqual(balances[0], 100 + 299 * 10)
+        self.assertEqual(balances[1:], [90] * 299)
+        self.assertEqual([t["type"] for t in history], ["deposit", "transfer_out"])
+        self.assertLessEqual(self.async_server.open_connections, 8)
+
+    def test_async_client_batch(self):
+        async def scenario():
+            client = AsyncBankClient(self.url)
+            await client.create_account("batch_a", "password")
+            await client.create_account("batch_b", "password")
+            await client.login("batch_a", "password", notifications_enabled=False)
+            async with await client.batch(max_batch_size=2) as batch:
+                batch.deposit(100)
+                batch.transfer("batch_b", 30)
+                batch.get_balance("batch_b")
+            balance = await client.get_balance()
+            await client.logout()
+            await client.close()
+            return batch, balance
+
+        batch, balance = asyncio.run(scenario())
+        self.assertEqual(len(batch.results), 3)
+        self.assertEqual(batch.results[2], 30)
+        self.assertEqual(batch.operations, [])
+        self.assertEqual(balance, 70)
+
+    def test_binary_protocol_shares_state(self):
+        binary_server = BinaryBankServer(self.async_server.bank_server, executor=self.async_server.executor)
+        server = asyncio.run_coroutine_threadsafe(binary_server.start(port=0), self.loop).result()
+        host, port = server.sockets[0].getsockname()[:2]
+        try:
+            binary_client = BankClient(f"bank://{host}:{port}")
+            self.assertEqual(binary_client.create_account("binary_account", "password"), "Cuenta creada exitosamente.")
+            self.assertTrue(binary_client.login("binary_account", "password", notifications_enabled=False))
+            binary_client.deposit(100)
+            self.assertEqual(binary_client.get_transaction_history()[0]["type"], "deposit")
+            self.assertEqual(binary_client.execute_batch([["withdraw", binary_client.caller, 30]])[0],
+                             "Retiro de 30 de la cuenta binary_account. Nuevo saldo es 70.")
+            xml_client = BankClient(self.url)
+            xml_client.login("binary_account", "password", notifications_enabled=False)
+            self.assertEqual(xml_client.get_balance(), 70)
+            xml_client.logout()
+            with self.assertRaises(Fault):
+                binary_client.execute_batch(None)
+            binary_client.logout()
+            binary_client.close()
+        finally:
+            asyncio.run_coroutine_threadsafe(binary_server.close(), self.loop).result()
+
+    def test_metrics_over_keep_alive(self):
+        BankClient(self.url).create_account("async_account", "password")
+        connection = http.client.HTTPConnection(*self.address)
+        for _ in range(2):
+            connection.request("GET", "/metrics")
+            response = connection.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertIn(b'bank_rpc_calls_total{method="create_account",status="ok"} 1', response.read())
+        connection.close()
+
+    def test_long_polls_do_not_use_threads(self):   #las esperas no consumen el cupo de long_polls ni hilos del pool
+        self.async_server.bank_server.long_polls.limit = 1
+        proxy = ServerProxy(self.url)
+        proxy.create_account("payer", "password")
+        proxy.deposit("payer", 100)
+        receivers = [f"receiver_{index}" for index in range(6)]
+        results = {}
+        for receiver in receivers:
+            proxy.create_account(receiver, "password")
+        waiters = [threading.Thread(target=lambda receiver=receiver: results.__setitem__(
+            receiver, ServerProxy(self.url).wait_notifications(receiver, 10))) for receiver in receivers]
+        for waiter in waiters:
+            waiter.start()
+        time.sleep(0.3)
+        self.assertEqual(results, {})
+        self.assertEqual(self.async_server.bank_server.long_polls.active, 0)
+        for receiver in receivers:
+            proxy.transfer("payer", receiver, 1)
+        for waiter in waiters:
+            waiter.join(timeout=5)
+            self.assertFalse(waiter.is_alive())
+        self.assertTrue(all(len(results[receiver]) == 1 for receiver in receivers))
+        self.assertEqual(proxy.wait_notifications("payer", "x"), "Tiempo de espera inválido.")
+
+    def test_idle_connections_do_not_use_threads(self):
+        threads_before = threading.active_count()
+        idle = [socket.create_connection(self.address) for _ in range(200)]
+        try:
+            client = BankClient(self.url)
+            self.assertEqual(client.create_account("async_account", "password"), "Cuenta creada exitosamente.")
+            self.assertLessEqual(threading.active_count() - threads_before, 2)
+        finally:
+            for sock in idle:
+                sock.close()
+
+
 if __name__ == '__main__':
     unittest.main()
 
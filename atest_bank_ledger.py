@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import patch
+import bank_ledger
+from bank_server import BankServer
+
+DAY = 86400
+
+class TestLedger(unittest.TestCase):
+    def setUp(self):
+        self.server = BankServer()
+        self.server.create_account("account_a", "password")
+        self.server.create_account("account_b", "password")
+        self.server.create_account("account_c", "password")
+        self.server._deposit("account_a", 100000, DAY * 10 + 5)
+        self.server._deposit("account_b", 30000, DAY * 10 + 50)
+        self.server._transfer("account_a", "account_b", 40000, DAY * 11 + 5)
+        self.server._withdraw("account_b", 10000, DAY * 11 + 50)
+        self.server._deposit("account_c", 5000, DAY * 12)
+
+    def check_queries(self):
+        self.assertEqual(self.server.total_inflow(), {"account_a": 1000, "account_b": 700, "account_c": 50})
+        self.assertEqual(self.server.top_accounts(2), [["account_a", 600], ["account_b", 600]])
+        self.assertEqual(self.server.ledger.balances(), self.server.accounts)
+        self.assertEqual(self.server.daily_volume(),
+                         {"1970-01-11": 1300, "1970-01-12": 500, "1970-01-13": 50})
+        self.assertEqual(self.server.daily_volume(DAY * 11, DAY * 11 + 10), {"1970-01-12": 400})
+
+    def test_queries(self):
+        self.check_queries()
+
+    def test_queries_without_numpy(self):
+        with patch.object(bank_ledger, 'np', None):
+            self.check_queries()
+
+    def test_deleted_account_is_excluded(self):
+        self.server.withdraw("account_c", 50)
+        self.server.delete_account("account_c")
+        self.server.create_account("account_c", "password")
+        self.assertEqual(self.server.total_inflow()["account_c"], 0)
+        self.assertEqual([account_id for account_id, _ in self.server.top_accounts(10)],
+                         ["account_a", "account_b", "account_c"])
+
+if __name__ == '__main__':
+    unittest.main()
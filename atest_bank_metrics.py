@@ -0,0 +1,91 @@
+import unittest
+import threading
+import time
+from bank_metrics import BankMetrics, Counter, Gauge, Histogram, MetricsRegistry
+from bank_ratelimit import RATE_LIMITED, RateLimiter
+from bank_server import BankServer
+
+class TestMetrics(unittest.TestCase):
+    def test_render_counter_and_gauge(self):
+        registry = MetricsRegistry()
+        calls = registry.register(Counter('calls_total', "Llamadas.", ('method',)))
+        registry.register(Gauge('depth', "Profundidad.", function=lambda: 7))
+        calls.inc(('deposit',))
+        calls.inc(('deposit',), 2)
+        calls.inc(('say "hi"',))
+        text = registry.render()
+        self.assertIn("# TYPE calls_total counter", text)
+        self.assertIn('calls_total{method="deposit"} 3', text)
+        self.assertIn('calls_total{method="say \\"hi\\""} 1', text)
+        self.assertIn("depth 7", text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.register(Histogram('latency_seconds', "Latencia.", buckets=(0.1, 1.0)))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        text = registry.render()
+        self.assertIn('latency_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_sum 3.65', text)
+        self.assertIn('latency_seconds_count 4', text)
+
+    def test_timed_lock_records_wait_and_hold(self):
+        metrics = BankMetrics()
+        lock = metrics.timed_lock('global')
+        with lock:
+            waiter = threading.Thread(target=lambda: lock.acquire() and lock.release())
+            waiter.start()
+            time.sleep(0.05)
+        waiter.join()
+        self.assertEqual(metrics.lock_wait.count(('global',)), 2)
+        self.assertEqual(metrics.lock_hold.count(('global',)), 2)
+        self.assertIn('bank_lock_wait_seconds_bucket{lock="global",le="0.025"} 1', metrics.render())
+
+class TestBankServerMetrics(unittest.TestCase):
+    def setUp(self):
+        self.server = BankServer(kdf_iterations=1000)
+
+    def test_dispatch_records_calls(self):
+        self.server._dispatch('create_account', ("test_account", "password"))
+        self.server._dispatch('deposit', ("test_account", 100))
+        with self.assertRaises(TypeError):
+            self.server._dispatch('deposit', ("test_account",))
+        with self.assertRaises(Exception):
+            self.server._dispatch('_deposit', ("test_account", 100))
+        metrics = self.server.metrics
+        self.assertEqual(metrics.calls.value(('deposit', 'ok')), 1)
+        self.assertEqual(metrics.calls.value(('deposit', 'error')), 1)
+        self.assertEqual(metrics.calls.value(('unknown', 'error')), 1)
+        self.assertEqual(metrics.latency.count(('deposit',)), 2)
+        self.assertEqual(metrics.in_flight.value(), 0)
+        self.assertEqual(metrics.lock_hold.count(('global',)), 1)  # create_account toma el lock global
+
+    def test_account_rate_limit(self):
+        self.server.account_limiter = RateLimiter(1, clock=lambda: 0.0)
+        self.server.create_account("account_a", "password")
+        token = self.server.login("account_a", "password")
+        self.assertEqual(self.server._dispatch('deposit', (token, 10)),
+                         "Depósito de 10 en la cuenta account_a. Nuevo saldo es 10.")
+        self.assertEqual(self.server._dispatch('get_balance', ("account_a",)), RATE_LIMITED)
+        self.assertEqual(self.server._dispatch('create_account', ("account_b", "password")),
+                         "Cuenta creada exitosamente.")
+        self.assertEqual(self.server._dispatch('top_accounts', (1,)), [["account_a", 10]])
+        self.assertEqual(self.server._dispatch('wait_notifications', ("account_a", 0)), [])
+        metrics = self.server.metrics
+        self.assertEqual(metrics.calls.value(('get_balance', 'rejected')), 1)
+        self.assertEqual(metrics.rejected.value(('account_rate',)), 1)
+
+    def test_notification_queue_depth(self):
+        self.server.create_account("account_a", "password")
+        self.server.create_account("account_b", "password")
+        self.server.deposit("account_a", 100)
+        self.server.transfer("account_a", "account_b", 10)
+        self.server.transfer("account_a", "account_b", 10)
+        text = self.server.metrics.render()
+        self.assertIn("bank_notifications_pending 2", text)
+        self.assertIn("bank_notification_queue_max_depth 2", text)
+
+if __name__ == '__main__':
+    unittest.main()
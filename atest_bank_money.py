@@ -0,0 +1,32 @@
+from decimal import Decimal
+import unittest
+from bank_money import MAX_CENTS, format_amount, from_cents, to_cents
+
+class TestBankMoney(unittest.TestCase):
+    def test_to_cents(self):
+        self.assertEqual(to_cents(25), 2500)
+        self.assertEqual(to_cents(0.1), 10)
+        self.assertEqual(to_cents(19.99), 1999)
+        self.assertEqual(to_cents("10.50"), 1050)
+        self.assertEqual(to_cents(Decimal("-2.5")), -250)
+        for invalid in (0.005, "1.001", "diez", float("nan"), float("inf"), True, None, [1]):
+            self.assertIsNone(to_cents(invalid), invalid)
+        self.assertEqual(to_cents(1.005, exact=False), 100)
+
+    def test_to_cents_bounds(self):
+        self.assertEqual(to_cents(MAX_CENTS // 100), MAX_CENTS // 100 * 100)
+        self.assertEqual(to_cents(str(-MAX_CENTS / 100)), -MAX_CENTS)
+        for invalid in (1e17, -1e17, 2 ** 60, str(MAX_CENTS), Decimal("1e30")):
+            self.assertIsNone(to_cents(invalid), invalid)
+
+    def test_from_cents(self):
+        self.assertEqual(from_cents(2500), 25)
+        self.assertIsInstance(from_cents(2500), int)
+        self.assertEqual(from_cents(1999), 19.99)
+        self.assertEqual(from_cents(-150), -1.5)
+        self.assertEqual(format_amount(30), "0.3")
+        for cents in range(-1000, 1000):
+            self.assertEqual(to_cents(from_cents(cents)), cents)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import threading
+import time
+import unittest
+from bank_notifications import COALESCE, DROP_OLDEST, NotificationQueue
+
+class TestNotificationQueue(unittest.TestCase):
+    def test_drop_oldest(self):
+        notification_queue = NotificationQueue(limit=2, overflow=DROP_OLDEST)
+        for index in range(5):
+            notification_queue.put(f"n{index}", 10)
+        self.assertEqual(len(notification_queue), 2)
+        self.assertEqual(notification_queue.overflowed, 3)
+        self.assertEqual(notification_queue.drain(), ["n3", "n4"])
+        self.assertEqual(notification_queue.drain(), [])
+
+    def test_coalesce(self):
+        notification_queue = NotificationQueue(limit=2, overflow=COALESCE)
+        for index in range(5):
+            notification_queue.put(f"n{index}", (index + 1) * 100)
+        self.assertEqual(len(notification_queue), 3)
+        self.assertEqual(notification_queue.drain(),
+                         ["3 transferencias recibidas por un total de 6", "n3", "n4"])
+
+    def test_state_round_trip_and_discard(self):
+        notification_queue = NotificationQueue(limit=2)
+        for index in range(3):
+            notification_queue.put(f"n{index}", 5)
+        restored = NotificationQueue(limit=2)
+        restored.load_state(notification_queue.to_state())
+        restored.discard(2)
+        self.assertEqual(restored.drain(), ["n2"])
+        legacy = NotificationQueue(limit=2)
+        legacy.load_state(["a", "b", "c"])
+        self.assertEqual(legacy.drain(), ["1 transferencia recibida por un total de 0", "b", "c"])
+
+    def test_wait_returns_on_put_or_wake(self):
+        notification_queue = NotificationQueue()
+        threading.Timer(0.05, notification_queue.wake).start()
+        started = time.monotonic()
+        notification_queue.wait(5)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(notification_queue.drain(), [])
+        threading.Timer(0.05, notification_queue.put, args=("hola",)).start()
+        notification_queue.wait(5)
+        self.assertEqual(notification_queue.drain(), ["hola"])
+
+    def test_listener_called_once(self):
+        notification_queue = NotificationQueue()
+        calls = []
+        self.assertTrue(notification_queue.add_listener(lambda: calls.append(1)))
+        notification_queue.put("hola")
+        notification_queue.wake()
+        self.assertEqual(calls, [1])
+        self.assertFalse(notification_queue.add_listener(lambda: calls.append(2)))   #ya hay algo que entregar
+        notification_queue.drain()
+        listener = lambda: calls.append(3)
+        self.assertTrue(notification_queue.add_listener(listener))
+        notification_queue.remove_listener(listener)
+        notification_queue.put("adiós")
+        self.assertEqual(calls, [1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from bank_persistence import BankPersistence
+from bank_server import BankServer
+
+class TestBankPersistence(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.persistence.close()
+        shutil.rmtree(self.directory)
+
+    def open_server(self, **kwargs):
+        server = BankServer(persistence=BankPersistence(self.directory, **kwargs))
+        self.servers.append(server)
+        return server
+
+    def restart(self, server, **kwargs):
+        server.persistence.close()
+        self.servers.remove(server)
+        return self.open_server(**kwargs)
+
+    def populate(self, server):
+        server.create_account("from_account", "password")
+        server.create_account("to_account", "password")
+        server.create_account("old_account", "password")
+        server.deposit("from_account", 500)
+        server.withdraw("from_account", 100)
+        server.transfer("from_account", "to_account", 150)
+        server.delete_account("old_account")
+
+    def assert_populated(self, server):
+        self.assertEqual(server.accounts, {"from_account": 25000, "to_account": 15000})
+        self.assertTrue(server.authenticate("to_account", "password"))
+        history = server.get_transaction_history("from_account")
+        self.assertEqual([(t["type"], t["amount"]) for t in history],
+                         [("deposit", 500), ("withdraw", 100), ("transfer_out", 150)])
+        self.assertEqual(history[2]["counterparty"], "to_account")
+        self.assertEqual(server.get_notifications("to_account"), ["Transferencia recibida de from_account: 150"])
+
+    def test_recover_from_log(self):
+        server = self.open_server()
+        self.populate(server)
+        self.assert_populated(self.restart(server))
+
+    def test_recover_from_snapshot_and_log(self):
+        server = self.open_server(snapshot_interval=0)
+        self.populate(server)
+        server.persistence.snapshot(server)
+        server.deposit("to_account", 50)
+        server = self.restart(server)
+        self.assertEqual(server.accounts["to_account"], 20000)
+        server.withdraw("to_account", 50)
+        self.assert_populated(self.restart(server))
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.startswith("snapshot-")]), 1)
+
+    def test_delivered_notifications_are_not_repeated(self):
+        server = self.open_server()
+        self.populate(server)
+        server.get_notifications("to_account")
+        server = self.restart(server)
+        self.assertEqual(server.get_notifications("to_account"), [])
+
+    def test_automatic_snapshot_compacts_log(self):
+        server = self.open_server(snapshot_interval=10)
+        server.create_account("test_account", "password")
+        for _ in range(30):
+            server.deposit("test_account", 1)
+        server.persistence.close()
+        self.servers.remove(server)
+        segments = [name for name in os.listdir(self.directory) if name.startswith("wal-")]
+        self.assertLess(len(segments), 3)
+        server = self.open_server()
+        self.assertEqual(server.accounts["test_account"], 3000)
+
+    def test_torn_record_is_discarded(self):
+        server = self.open_server()
+        server.create_account("test_account", "password")
+        server.deposit("test_account", 100)
+        server.persistence.close()
+        self.servers.remove(server)
+        segment = sorted(name for name in os.listdir(self.directory) if name.startswith("wal-"))[-1]
+        with open(os.path.join(self.directory, segment), 'ab') as log:
+            log.write(b'["deposit","test_acc')
+        server = self.open_server()
+        self.assertEqual(server.accounts["test_account"], 10000)
+        server.deposit("test_account", 1)
+        server = self.restart(server)
+        self.assertEqual(server.accounts["test_account"], 10100)
+
+    def test_recover_legacy_float_amounts(self):
+        password_hash = BankServer(kdf_iterations=1000)._hash_password("password")
+        with open(os.path.join(self.directory, "snapshot-000000000002.json"), "w") as snapshot_file:
+            json.dump({"seq": 2, "accounts": {"a": 10.1}, "credentials": {"a": password_hash},
+                       "transaction_history": {"a": {"kinds": [0], "amounts": [10.1], "counterparties": [None],
+                                                     "timestamps": [1.0]}},
+                       "notifications": {"a": []}}, snapshot_file)
+        with open(os.path.join(self.directory, "wal-000000000003.log"), "w") as segment:
+            segment.write(json.dumps(["create", "b", password_hash]) + "\n")
+            segment.write(json.dumps(["transfer", "a", "b", 0.30000000000000004, 2.0]) + "\n")
+        server = self.open_server()
+        self.assertEqual(server.accounts, {"a": 980, "b": 30})
+        server.deposit("b", 1)
+        server = self.restart(server)
+        self.assertEqual(server.accounts, {"a": 980, "b": 130})
+        server.persistence.snapshot(server)
+        self.assertEqual(self.restart(server).get_balance("a"), 9.8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from bank_ratelimit import RateLimiter
+from atest_support import FakeClock
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_burst_then_sustained_rate(self):
+        limiter = RateLimiter(2, burst=3, clock=self.clock)
+        self.assertEqual([limiter.allow("a") for _ in range(4)], [True, True, True, False])
+        self.assertTrue(limiter.allow("b"))
+        self.clock.now = 0.5
+        self.assertEqual([limiter.allow("a") for _ in range(2)], [True, False])
+        self.clock.now = 100
+        self.assertEqual(sum(limiter.allow("a") for _ in range(10)), 3)
+
+    def test_default_burst_and_validation(self):
+        self.assertEqual(RateLimiter(5).burst, 5)
+        self.assertEqual(RateLimiter(0.1).burst, 1)
+        with self.assertRaises(ValueError):
+            RateLimiter(0)
+        with self.assertRaises(ValueError):
+            RateLimiter(1, burst=0.5)
+
+    def test_keys_are_bounded(self):
+        limiter = RateLimiter(1, max_keys=2, clock=self.clock)
+        for key in ("a", "b", "a", "c"):
+            limiter.allow(key)
+        self.assertEqual(len(limiter), 2)
+        self.assertFalse(limiter.allow("a"))
+        self.assertTrue(limiter.allow("b"))  # Olvidada: vuelve con el cubo lleno
+
+if __name__ == '__main__':
+    unittest.main()
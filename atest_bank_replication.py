@@ -0,0 +1,133 @@
+import multiprocessing
+import socket
+import time
+import unittest
+from xmlrpc.client import ServerProxy
+from bank_replication import ReplicationFollower, ReplicationPrimary
+from bank_server import BankServer, READ_ONLY, run_server
+
+PASSWORD_HASH = "pbkdf2_sha256$1$" + "00" * 16 + "$" + "00" * 32
+
+class TestBankReplication(unittest.TestCase):
+    def setUp(self):
+        self.primary = BankServer(kdf_iterations=1000, replication=ReplicationPrimary())
+        self.followers = []
+
+    def tearDown(self):
+        for follower in self.followers:
+            follower.close()
+        self.primary.replication.close()
+
+    def follow(self):
+        follower = ReplicationFollower(BankServer(), *self.primary.replication.address)
+        follower.start(timeout=5)
+        self.followers.append(follower)
+        return follower
+
+    def catch_up(self, follower):
+        self.assertTrue(follower.wait_for(self.primary.replication.last_seq, timeout=5))
+        return follower.bank_server
+
+    def test_follower_receives_state_and_mutations(self):
+        self.primary.create_account("from_account", "password")
+        self.primary.create_account("to_account", "password")
+        self.primary.deposit("from_account", 500)
+        follower = self.follow()
+        self.primary.withdraw("from_account", 100)
+        self.primary.transfer("from_account", "to_account", 150.25)
+        self.primary.create_account("old_account", "password")
+        self.primary.delete_account("old_account")
+        replica = self.catch_up(follower)
+        self.assertEqual(replica.accounts, self.primary.accounts)
+        self.assertEqual(replica.get_balance("from_account"), 249.75)
+        self.assertEqual(replica.get_transaction_history("to_account"),
+                         self.primary.get_transaction_history("to_account"))
+        self.assertEqual(replica.peek_notifications("to_account"), ["Transferencia recibida de from_account: 150.25"])
+        self.assertEqual(replica.top_accounts(), self.primary.top_accounts())
+        self.assertTrue(replica.authenticate("to_account", "password"))
+        self.assertEqual(self.primary.replication.followers()[0]['acked_seq'], follower.applied_seq)
+
+    def test_several_followers_and_batches(self):
+        followers = [self.follow(), self.follow()]
+        self.primary.create_account("account", "password")
+        self.primary.import_accounts([{'account_id': f"imported_{i}", 'password_hash': PASSWORD_HASH,
+                                       'balance': i} for i in range(1, 200)])
+        self.primary.execute_batch([["deposit", "account", 10], ["withdraw", "account", 3]])
+        self.primary.get_notifications("account")
+        for follower in followers:
+            self.assertEqual(self.catch_up(follower).accounts, self.primary.accounts)
+        self.assertEqual(len(self.primary.replication.followers()), 2)
+
+    def test_replica_rejects_writes_until_promoted(self):
+        self.primary.create_account("account", "password")
+        follower = self.follow()
+        replica = self.catch_up(follower)
+        self.assertEqual(replica._dispatch('deposit', ("account", 10)), READ_ONLY)
+        self.assertEqual(replica._dispatch('get_balance', ("account",)), 0)
+        self.primary.deposit("account", 10)
+        self.catch_up(follower)
+        follower.promote()
+        self.assertFalse(follower.connected)
+        self.assertEqual(replica._dispatch('deposit', ("account", 5)),
+                         "Depósito de 5 en la cuenta account. Nuevo saldo es 15.")
+        self.assertEqual(self.primary.get_balance("account"), 10)
+
+    def test_follower_requires_empty_server(self):
+        server = BankServer()
+        server.create_account("account", "password")
+        with self.assertRaises(ValueError):
+            ReplicationFollower(server, *self.primary.replication.address)
+
+    def test_lagging_follower_is_disconnected(self):
+        self.primary.replication.max_pending = 5
+        # Un seguidor que no lee: el envío se bloquea y los registros se acumulan.
+        with socket.create_connection(self.primary.replication.address) as sock:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            deadline = time.monotonic() + 5
+            while not self.primary.replication.followers() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.primary.create_account("account", "password")
+            while self.primary.replication.followers() and time.monotonic() < deadline:
+                self.primary.deposit("account", 1)
+            self.assertEqual(self.primary.replication.followers(), [])
+
+class TestReplicaProcess(unittest.TestCase):
+    def test_reads_from_replica_process(self):
+        primary = BankServer(kdf_iterations=1000, replication=ReplicationPrimary())
+        with socket.socket() as sock:
+            sock.bind(('localhost', 0))
+            port = sock.getsockname()[1]
+        process = multiprocessing.Process(
+            target=run_server, kwargs={'port': port, 'max_workers': 2, 'log_requests': False,
+                                       'replica_of': primary.replication.address}, daemon=True)
+        process.start()
+        try:
+            primary.create_account("account", "password")
+            primary.create_account("other", "password")
+            primary.deposit("account", 100)
+            replica = ServerProxy(f"http://localhost:{port}/RPC2", allow_none=True)
+            deadline = time.monotonic() + 10
+            while True:
+                try:
+                    if replica.get_balance("account") == 100:
+                        break
+                except OSError:
+                    pass
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.05)
+            primary.transfer("account", "other", 1)
+            primary.withdraw("account", 40)
+            while replica.get_balance("account") != 59:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.05)
+            history = replica.get_transaction_history("account")
+            self.assertEqual([t["type"] for t in history], ["deposit", "transfer_out", "withdraw"])
+            self.assertEqual(replica.get_balance("other"), 1)
+            self.assertEqual(replica.deposit("account", 5), READ_ONLY)
+        finally:
+            process.terminate()
+            process.join()
+            primary.replication.close()
+
+if __name__ == '__main__':
+    unittest.main()
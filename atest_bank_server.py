@@ -1,5 +1,9 @@
 import unittest
-from bank_server import BankServer
+import threading
+from array import array
+import time
+import hashlib
+from bank_server import ADMIN_ONLY, BankServer, DEFAULT_HISTORY_PAGE, INVALID_PAGE, MAX_HISTORY_PAGE
 
 class TestBankServer(unittest.TestCase):
     def setUp(self):
@@ -32,6 +36,62 @@ class TestBankServer(unittest.TestCase):
         response = self.server.authenticate("nonexistent_account", "password")
         self.assertFalse(response)
 
+    def test_password_hash_is_salted(self):
+        self.server.create_account("account_a", "password")
+        self.server.create_account("account_b", "password")
+        self.assertTrue(self.server.credentials["account_a"].startswith("pbkdf2_sha256$"))
+        self.assertNotEqual(self.server.credentials["account_a"], self.server.credentials["account_b"])
+
+    def test_authenticate_legacy_hash(self):   #los hashes SHA-256 sin sal siguen siendo válidos
+        self.server.create_account("test_account", "password")
+        self.server.credentials["test_account"] = hashlib.sha256(b"password").hexdigest()
+        self.assertTrue(self.server.authenticate("test_account", "password"))
+        self.assertFalse(self.server.authenticate("test_account", "wrong_password"))
+
+    def test_login_session(self):
+        self.server.create_account("test_account", "password")
+        self.assertFalse(self.server.login("test_account", "wrong_password"))
+        token = self.server.login("test_account", "password")
+        self.assertEqual(self.server.check_session(token), "test_account")
+        self.assertTrue(self.server.logout(token))
+        self.assertFalse(self.server.check_session(token))
+        self.assertFalse(self.server.logout(token))
+
+    def test_session_token_operations(self):
+        self.server.create_account("test_account", "password")
+        self.server.create_account("another_account", "password")
+        token = self.server.login("test_account", "password")
+        self.server.deposit(token, 100)
+        self.server.transfer(token, "another_account", 40)
+        self.assertEqual(self.server.get_balance(token), 60)
+        self.assertEqual(self.server.execute_batch([["withdraw", token, 10]]),
+                         ["Retiro de 10 de la cuenta test_account. Nuevo saldo es 50."])
+        self.assertEqual(self.server.accounts["another_account"], 4000)
+
+    def test_require_session(self):
+        self.server.require_session = True
+        self.server.create_account("test_account", "password")
+        self.assertEqual(self.server.deposit("test_account", 100), "Sesión inválida o expirada.")
+        self.assertEqual(self.server.execute_batch([["get_balance", "test_account"]]),
+                         ["Sesión inválida o expirada."])
+        token = self.server.login("test_account", "password")
+        self.server.deposit(token, 100)
+        self.assertEqual(self.server.get_balance(token), 100)
+        self.server.logout(token)
+        self.assertEqual(self.server.get_balance(token), "Sesión inválida o expirada.")
+        self.assertEqual(self.server.delete_account("test_account"), "Sesión inválida o expirada.")
+        self.assertEqual(self.server.get_balance(self.server.login("test_account", "password")), 100)
+        self.assertEqual(self.server._dispatch('top_accounts', (1,)), ADMIN_ONLY)
+        self.assertEqual(self.server._dispatch('open_export', ()), ADMIN_ONLY)
+        self.assertFalse(self.server.exports)
+        self.assertEqual(self.server.top_accounts(1), [["test_account", 100]])  # En el mismo proceso sigue disponible
+
+    def test_delete_account_closes_sessions(self):
+        self.server.create_account("test_account", "password")
+        token = self.server.login("test_account", "password")
+        self.server.delete_account("test_account")
+        self.assertFalse(self.server.check_session(token))
+
     def test_get_balance(self):
         self.server.create_account("test_account", "password")
         response = self.server.get_balance("test_account")
@@ -45,7 +105,7 @@ class TestBankServer(unittest.TestCase):
         self.server.create_account("test_account", "password")
         response = self.server.deposit("test_account", 500)
         self.assertEqual(response, "Depósito de 500 en la cuenta test_account. Nuevo saldo es 500.")
-        self.assertEqual(self.server.accounts["test_account"], 500)
+        self.assertEqual(self.server.accounts["test_account"], 50000)
 
     def test_deposit_negative_amount(self):
         self.server.create_account("test_account", "password")
@@ -61,7 +121,7 @@ class TestBankServer(unittest.TestCase):
         self.server.deposit("test_account", 500)
         response = self.server.withdraw("test_account", 200)
         self.assertEqual(response, "Retiro de 200 de la cuenta test_account. Nuevo saldo es 300.")
-        self.assertEqual(self.server.accounts["test_account"], 300)
+        self.assertEqual(self.server.accounts["test_account"], 30000)
 
     def test_withdraw_insufficient_funds(self):
         self.server.create_account("test_account", "password")
@@ -83,8 +143,8 @@ class TestBankServer(unittest.TestCase):
         self.server.deposit("from_account", 500)
         response = self.server.transfer("from_account", "to_account", 300)
         self.assertEqual(response, "Transferencia de 300 desde la cuenta from_account a la cuenta to_account. Nuevos saldos: from_account: 200, to_account: 300.")
-        self.assertEqual(self.server.accounts["from_account"], 200)
-        self.assertEqual(self.server.accounts["to_account"], 300)
+        self.assertEqual(self.server.accounts["from_account"], 20000)
+        self.assertEqual(self.server.accounts["to_account"], 30000)
 
     def test_transfer_insufficient_funds(self):
         self.server.create_account("from_account", "password")
@@ -102,12 +162,56 @@ class TestBankServer(unittest.TestCase):
         self.server.deposit("test_account", 1000)
         self.server.withdraw("test_account", 200)
         response = self.server.get_transaction_history("test_account")
-        self.assertEqual(response, ["Depósito: 1000", "Retiro: 200"])
+        self.assertEqual([(t["seq"], t["type"], t["amount"]) for t in response],
+                         [(0, "deposit", 1000), (1, "withdraw", 200)])
+        self.assertNotIn("counterparty", response[0])
 
     def test_get_transaction_history_nonexistent_account(self):
         response = self.server.get_transaction_history("nonexistent_account")
         self.assertEqual(response, "La cuenta no existe.")
 
+    def test_get_transaction_history_pages(self):
+        self.server.create_account("test_account", "password")
+        for amount in range(1, 6):
+            self.server.deposit("test_account", amount)
+        first = self.server.get_transaction_history("test_account", 0, 2)
+        self.assertEqual([t["amount"] for t in first["transactions"]], [1, 2])
+        self.assertEqual(first["next_cursor"], 2)
+        second = self.server.get_transaction_history("test_account", first["next_cursor"], 10)
+        self.assertEqual([t["amount"] for t in second["transactions"]], [3, 4, 5])
+        self.assertIsNone(second["next_cursor"])
+        for cursor, limit, filters in (("0", 2, None), (0, "2", None), (0, True, None), (0, 2, ["deposit"]),
+                                       (0, 2, {"since": "x"}), (0, 2, {"until": [1]}), (0, 2, {"types": 5}),
+                                       (0, 2, {"types": "deposit"}), (0, 2, {"types": ["pago"]})):
+            self.assertEqual(self.server.get_transaction_history("test_account", cursor, limit, filters),
+                             "Cursor, límite o filtros inválidos.")
+
+    def test_get_transaction_history_default_is_bounded(self):
+        self.server.create_account("test_account", "password")
+        for amount in range(1, DEFAULT_HISTORY_PAGE + 11):
+            self.server.deposit("test_account", amount)
+        history = self.server.get_transaction_history("test_account")
+        self.assertEqual([t["amount"] for t in history], list(range(11, DEFAULT_HISTORY_PAGE + 11)))
+
+    def test_get_transaction_history_filters(self):
+        self.server.create_account("from_account", "password")
+        self.server.create_account("to_account", "password")
+        self.server.deposit("from_account", 1000)
+        self.server.withdraw("from_account", 200)
+        self.server.transfer("from_account", "to_account", 300)
+        self.server.deposit("from_account", 50)
+        response = self.server.get_transaction_history("from_account", None, None, {"types": ["deposit"]})
+        self.assertEqual([t["seq"] for t in response["transactions"]], [0, 3])
+        response = self.server.get_transaction_history("from_account", None, None,
+                                                       {"min_amount": 100, "max_amount": 500})
+        self.assertEqual([t["seq"] for t in response["transactions"]], [1, 2])
+        self.assertEqual(response["transactions"][1]["counterparty"], "to_account")
+        self.server.transaction_history["from_account"].timestamps[:] = array('d', [100, 200, 300, 400])
+        response = self.server.get_transaction_history("from_account", None, None, {"since": 300})
+        self.assertEqual([t["seq"] for t in response["transactions"]], [2, 3])
+        response = self.server.get_transaction_history("from_account", None, None, {"until": 50})
+        self.assertEqual(response, {"transactions": [], "next_cursor": None})
+
     def test_get_notifications(self):   #verfica que no haya notificaciones en una nueva cuenta
         self.server.create_account("test_account", "password")
         self.server.notifications["test_account"].put("Test notification")
@@ -122,6 +226,266 @@ class TestBankServer(unittest.TestCase):
     def test_get_notifications_nonexistent_account(self):
         response = self.server.get_notifications("nonexistent_account")
         self.assertEqual(response, [])
+    def test_wait_notifications_returns_on_transfer(self):
+        self.server.create_account("from_account", "password")
+        self.server.create_account("to_account", "password")
+        self.server.deposit("from_account", 100)
+        timer = threading.Timer(0.1, self.server.transfer, args=("from_account", "to_account", 25))
+        timer.start()
+        started = time.monotonic()
+        response = self.server.wait_notifications("to_account", 5)
+        self.assertEqual(response, ["Transferencia recibida de from_account: 25"])
+        self.assertLess(time.monotonic() - started, 2)
+        timer.join()
+
+    def test_wait_notifications_timeout(self):
+        self.server.create_account("test_account", "password")
+        response = self.server.wait_notifications("test_account", 0.1)
+        self.assertEqual(response, [])
+        self.assertEqual(self.server.wait_notifications("test_account", "5"), "Tiempo de espera inválido.")
+        self.assertEqual(self.server.wait_notifications("test_account", None), "Tiempo de espera inválido.")
+
+    def test_wake_notifications(self): #despertar a quien espera no genera notificaciones
+        self.server.create_account("test_account", "password")
+        threading.Timer(0.1, self.server.wake_notifications, args=("test_account",)).start()
+        started = time.monotonic()
+        self.assertEqual(self.server.wait_notifications("test_account", 5), [])
+        self.assertLess(time.monotonic() - started, 2)
+        self.server.wake_notifications("test_account")
+        self.assertEqual(self.server.get_notifications("test_account"), [])
+
+    def test_wait_notifications_budget(self): #sin cupo de esperas largas se responde al momento
+        self.server.create_account("test_account", "password")
+        self.server.long_polls.clamp(2)
+        waiter = threading.Thread(target=self.server.wait_notifications, args=("test_account", 5))
+        waiter.start()
+        while not self.server.long_polls.active:
+            time.sleep(0.01)
+        started = time.monotonic()
+        self.assertEqual(self.server.wait_notifications("test_account", 5), [])
+        self.assertLess(time.monotonic() - started, 1)
+        self.server.wake_notifications("test_account")
+        waiter.join()
+        self.assertEqual(self.server.long_polls.active, 0)
+
+    def test_execute_batch(self):
+        self.server.create_account("from_account", "password")
+        self.server.create_account("to_account", "password")
+        response = self.server.execute_batch([
+            ["deposit", "from_account", 500],
+            ["transfer", "from_account", "to_account", 200],
+            ["withdraw", "to_account", 500],
+            ["get_balance", "to_account"],
+        ])
+        self.assertEqual(response, [
+            "Depósito de 500 en la cuenta from_account. Nuevo saldo es 500.",
+            "Transferencia de 200 desde la cuenta from_account a la cuenta to_account. Nuevos saldos: from_account: 300, to_account: 200.",
+            "Fondos insuficientes.",
+            200,
+        ])
+
+    def test_execute_batch_invalid_operations(self):
+        self.server.create_account("test_account", "password")
+        response = self.server.execute_batch([
+            ["delete_account", "test_account"],
+            ["deposit", "test_account"],
+            [],
+            ["deposit", "test_account", 10],
+        ])
+        self.assertEqual(response, [
+            "Operación no soportada: delete_account",
+            "Parámetros inválidos para deposit.",
+            "Operación no soportada: None",
+            "Depósito de 10 en la cuenta test_account. Nuevo saldo es 10.",
+        ])
+        self.assertIn("test_account", self.server.accounts)
+
+    def test_disjoint_accounts_do_not_block(self):  #una cuenta bloqueada no detiene operaciones sobre otra
+        self.server.create_account("account_a", "password")
+        self.server.create_account("account_b", "password")
+        with self.server.account_locks["account_a"]:
+            worker = threading.Thread(target=self.server.deposit, args=("account_b", 100))
+            worker.start()
+            worker.join(timeout=2)
+            self.assertFalse(worker.is_alive())
+        self.assertEqual(self.server.accounts["account_b"], 10000)
+
+    def test_missing_account_is_not_created_while_locked(self):  #una operación sobre una cuenta inexistente impide crearla a la vez
+        self.server.create_account("account_a", "password")
+        with self.server._locked_accounts("account_a", "new_account"):
+            worker = threading.Thread(target=self.server.create_account, args=("new_account", "password"))
+            worker.start()
+            worker.join(timeout=0.5)
+            self.assertTrue(worker.is_alive())
+            self.assertNotIn("new_account", self.server.accounts)
+        worker.join(timeout=5)
+        self.assertFalse(worker.is_alive())
+        self.assertIn("new_account", self.server.accounts)
+        with self.server._account_lock("new_account"):   #una vez creada se usa el lock propio de la cuenta
+            self.assertTrue(self.server.account_locks["new_account"].locked())
+
+    def test_opposite_transfers_do_not_deadlock(self):
+        self.server.create_account("account_a", "password")
+        self.server.create_account("account_b", "password")
+        self.server.deposit("account_a", 1000)
+        self.server.deposit("account_b", 1000)
+
+        def transfer(from_account, to_account):
+            for _ in range(500):
+                self.server.transfer(from_account, to_account, 1)
+
+        workers = [threading.Thread(target=transfer, args=("account_a", "account_b")),
+                   threading.Thread(target=transfer, args=("account_b", "account_a"))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=10)
+            self.assertFalse(worker.is_alive())
+        self.assertEqual(self.server.accounts["account_a"] + self.server.accounts["account_b"], 200000)
+
+    def test_import_accounts(self):
+        self.server.kdf_iterations = 1000
+        self.server.create_account("existing", "password")
+        stored_hash = self.server._hash_password("secreta")
+        with self.assertRaises(Exception):  # No se expone por RPC
+            self.server._dispatch('_hash_password', ("secreta", None, 10 ** 9))
+        result = self.server.import_accounts([
+            {"account_id": "plain", "password": "password", "balance": 250},
+            {"account_id": "hashed", "password_hash": stored_hash},
+            {"account_id": "existing", "password": "password"},
+            {"account_id": "plain", "password": "password"},
+            {"account_id": "bad_hash", "password_hash": "sha256$abc"},
+            {"account_id": "negative", "password": "password", "balance": -5},
+            {"password": "password"},
+            {"account_id": "short_salt", "password_hash": "pbkdf2_sha256$1$zz$00"},
+            {"account_id": "costly", "password_hash": stored_hash.replace("$1000$", "$1000000000$")},
+        ])
+        self.assertEqual(result, {"created": 2, "errors": [
+            [2, "La cuenta ya existe."], [3, "Cuenta duplicada en la importación."],
+            [4, "Hash de contraseña inválido."], [5, "Saldo inicial inválido."], [6, "ID de cuenta inválido."],
+            [7, "Hash de contraseña inválido."], [8, "Hash de contraseña inválido."]]})
+        self.assertTrue(self.server.authenticate("plain", "password"))
+        self.assertTrue(self.server.authenticate("hashed", "secreta"))
+        self.assertEqual(self.server.get_balance("plain"), 250)
+        self.assertEqual(self.server.get_transaction_history("plain")[0]["type"], "deposit")
+        self.assertEqual(self.server.get_balance("hashed"), 0)
+
+    def test_export_is_point_in_time(self):
+        self.server.create_account("account_a", "password")
+        self.server.create_account("account_b", "password")
+        self.server.deposit("account_a", 100)
+        self.server.transfer("account_a", "account_b", 30)
+        export = self.server.open_export()
+        self.assertEqual((export["accounts"], export["transactions"]), (2, 3))
+        # Cambios posteriores a la vista que no deben aparecer en la exportación.
+        self.server.deposit("account_b", 5)
+        self.server.create_account("account_c", "password")
+        self.server.delete_account("account_a")
+
+        records, cursor = [], None
+        while True:
+            chunk = self.server.export_chunk(export["export_id"], cursor, 2)
+            self.assertLessEqual(len(chunk["records"]), 2)
+            records.extend(chunk["records"])
+            cursor = chunk["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual([(r["record"], r["account_id"], r.get("balance", r.get("type"))) for r in records], [
+            ("account", "account_a", 70), ("transaction", "account_a", "deposit"),
+            ("transaction", "account_a", "transfer_out"),
+            ("account", "account_b", 30), ("transaction", "account_b", "transfer_in")])
+        for cursor, limit in (([-1, 0], 2), ([5, -1], 2), ([0, 9], 2), ([0], 2), ("0", 2), ([0, True], 2),
+                              ([0, -1], "2")):
+            self.assertEqual(self.server.export_chunk(export["export_id"], cursor, limit), INVALID_PAGE)
+        self.assertEqual(self.server.export_chunk(export["export_id"], [2, -1])["next_cursor"], None)
+        self.assertTrue(self.server.close_export(export["export_id"]))
+        self.assertEqual(self.server.export_chunk(export["export_id"]), "Exportación inexistente o cerrada.")
+
+    def test_dormant_account_notifications_are_bounded(self):
+        server = BankServer(notification_limit=3)
+        server.create_account("payroll", "password")
+        server.create_account("employee", "password")
+        server.deposit("payroll", 1000)
+        for _ in range(50):
+            server.transfer("payroll", "employee", 10)
+        self.assertEqual(len(server.notifications["employee"]), 4)
+        self.assertEqual(server.get_notifications("employee"),
+                         ["47 transferencias recibidas por un total de 470"]
+                         + ["Transferencia recibida de payroll: 10"] * 3)
+
+    def test_small_deposits_are_exact(self):
+        self.server.create_account("payroll", "password")
+        for _ in range(1000):
+            self.server.deposit("payroll", 0.1)
+        self.assertEqual(self.server.get_balance("payroll"), 100)
+        self.assertEqual(self.server.withdraw("payroll", "99.70"),
+                         "Retiro de 99.7 de la cuenta payroll. Nuevo saldo es 0.3.")
+        self.assertEqual(self.server.deposit("payroll", 0.005), "Importe inválido.")
+        self.assertEqual(self.server.execute_batch([["deposit", "payroll", "diez"], ["get_balance", "payroll"]]),
+                         ["Importe inválido.", 0.3])
+
+    def test_huge_amounts_are_rejected(self):
+        self.server.create_account("from_account", "password")
+        self.server.create_account("to_account", "password")
+        self.assertEqual(self.server.deposit("from_account", 1e17), "Importe inválido.")
+        self.assertEqual(self.server.deposit("from_account", 2 ** 60), "Importe inválido.")
+        self.server.deposit("from_account", 50e12)
+        self.server.deposit("to_account", 50e12)
+        self.assertEqual(self.server.deposit("to_account", 50e12), "El saldo resultante supera el máximo permitido.")
+        self.assertEqual(self.server.transfer("from_account", "to_account", 50e12),
+                         "El saldo resultante supera el máximo permitido.")
+        self.assertEqual(self.server.get_balance("to_account"), 50e12)
+        self.assertEqual(len(self.server.get_transaction_history("to_account")), 1)
+
+    def test_idempotency_key_applies_mutation_once(self):
+        self.server.create_account("from_account", "password")
+        self.server.create_account("to_account", "password")
+        first = self.server.deposit("from_account", 100, "pago-1")
+        self.assertEqual(self.server.deposit("from_account", 100, "pago-1"), first)
+        self.assertEqual(self.server.deposit("from_account", 50, "pago-1"),
+                         "Clave de idempotencia ya usada con otros parámetros.")
+        transfer = self.server.transfer("from_account", "to_account", 30, "transferencia-1")
+        self.assertEqual(self.server.transfer("from_account", "to_account", 30, "transferencia-1"), transfer)
+        self.assertEqual(self.server.deposit("to_account", 5, "pago-1"),
+                         "Depósito de 5 en la cuenta to_account. Nuevo saldo es 35.")
+        self.assertEqual([self.server.get_balance("from_account"), self.server.get_balance("to_account")], [70, 35])
+        self.assertEqual(len(self.server.get_transaction_history("from_account")), 2)
+        self.assertEqual(self.server.delete_account("to_account", "baja"),
+                         self.server.delete_account("to_account", "baja"))
+
+    def test_reads_do_not_wait_for_writers(self):
+        self.server.create_account("test_account", "password")
+        self.server.deposit("test_account", 100)
+        with self.server.account_locks["test_account"], self.server.lock, self.server.ledger._lock:
+            self.assertEqual(self.server.get_balance("test_account"), 100)
+            self.assertEqual(len(self.server.get_transaction_history("test_account")), 1)
+            self.assertEqual(self.server.top_accounts(1), [["test_account", 100]])
+            self.assertEqual(self.server.peek_notifications("test_account"), [])
+
+    def test_reads_during_writes_are_consistent(self):
+        self.server.create_account("account_a", "password")
+        self.server.create_account("account_b", "password")
+        self.server.deposit("account_a", 1000)
+        stop = threading.Event()
+
+        def writer():
+            while not stop.is_set():
+                self.server.transfer("account_a", "account_b", 1)
+                self.server.transfer("account_b", "account_a", 1)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            for _ in range(200):
+                history = self.server.get_transaction_history("account_b", limit=MAX_HISTORY_PAGE)
+                for transaction in history["transactions"]:
+                    self.assertEqual(transaction["amount"], 1)
+                    self.assertEqual(transaction["counterparty"], "account_a")
+                self.assertIn(self.server.get_balance("account_b"), (0, 1))
+        finally:
+            stop.set()
+            thread.join()
+        self.assertEqual(self.server.peek_notifications("account_b"), self.server.get_notifications("account_b"))
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from bank_sessions import SessionCache
+from atest_support import FakeClock
+
+class TestSessionCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sessions = SessionCache(max_sessions=3, ttl=10, clock=self.clock)
+
+    def test_create_and_get(self):
+        token = self.sessions.create("account_a")
+        self.assertEqual(self.sessions.get(token), "account_a")
+        self.assertIsNone(self.sessions.get("unknown"))
+
+    def test_expired_session(self):
+        token = self.sessions.create("account_a")
+        self.clock.now = 10
+        self.assertIsNone(self.sessions.get(token))
+        self.assertEqual(len(self.sessions), 0)
+
+    def test_use_renews_session(self):
+        token = self.sessions.create("account_a")
+        self.clock.now = 8
+        self.assertEqual(self.sessions.get(token), "account_a")
+        self.clock.now = 16
+        self.assertEqual(self.sessions.get(token), "account_a")
+        self.clock.now = 26
+        self.assertIsNone(self.sessions.get(token))
+
+    def test_expired_sessions_are_purged_on_create(self):
+        self.sessions.create("account_a")
+        self.sessions.create("account_b")
+        self.clock.now = 11
+        self.sessions.create("account_c")
+        self.assertEqual(len(self.sessions), 1)
+
+    def test_oldest_session_evicted_when_full(self):
+        tokens = [self.sessions.create(f"account_{i}") for i in range(4)]
+        self.assertEqual(len(self.sessions), 3)
+        self.assertIsNone(self.sessions.get(tokens[0]))
+        self.assertEqual(self.sessions.get(tokens[3]), "account_3")
+
+    def test_discard(self):
+        token = self.sessions.create("account_a")
+        self.assertTrue(self.sessions.discard(token))
+        self.assertFalse(self.sessions.discard(token))
+        self.assertIsNone(self.sessions.get(token))
+
+    def test_discard_account(self):
+        first = self.sessions.create("account_a")
+        second = self.sessions.create("account_a")
+        other = self.sessions.create("account_b")
+        self.sessions.discard_account("account_a")
+        self.assertIsNone(self.sessions.get(first))
+        self.assertIsNone(self.sessions.get(second))
+        self.assertEqual(self.sessions.get(other), "account_b")
+
+if __name__ == '__main__':
+    unittest.main()
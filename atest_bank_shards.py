@@ -0,0 +1,245 @@
+import asyncio
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from bank_async_server import BinaryBankServer
+from bank_client import BankClient
+from bank_idempotency import IDEMPOTENCY_CONFLICT
+from bank_persistence import BankPersistence
+from bank_server import ADMIN_ONLY, INVALID_PAGE, INVALID_SESSION, create_server
+from bank_shards import TRANSFER_COMMITTED, ShardRouter, ShardServer, shard_for, start_shards, stop_shards
+
+def accounts_on_distinct_shards(shard_count, prefix="cuenta"):
+    """Devuelve un ID de cuenta por shard."""
+    accounts = {}
+    index = 0
+    while len(accounts) < shard_count:
+        account_id = f"{prefix}_{index}"
+        accounts.setdefault(shard_for(account_id, shard_count), account_id)
+        index += 1
+    return [accounts[shard] for shard in range(shard_count)]
+
+class TestShardServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.shard = ShardServer(persistence=BankPersistence(self.directory, fsync=False), kdf_iterations=1000)
+        self.shard.create_account("origen", "password")
+        self.shard.deposit("origen", 100)
+
+    def tearDown(self):
+        self.shard.persistence.close()
+        shutil.rmtree(self.directory)
+
+    def test_prepare_holds_funds_until_abort(self):
+        self.assertTrue(self.shard.prepare_debit("tx1", "origen", "remota", 8000, 1.0))
+        self.assertEqual(self.shard.get_balance("origen"), 20)
+        self.assertEqual(self.shard.prepare_debit("tx2", "origen", "remota", 3000, 1.0), "Fondos insuficientes.")
+        self.assertEqual(self.shard.delete_account("origen"), "La cuenta tiene transferencias pendientes.")
+        self.assertTrue(self.shard.abort_transfer("tx1"))
+        self.assertEqual(self.shard.get_balance("origen"), 100)
+        self.assertEqual(self.shard.get_transaction_history("origen")[-1]["type"], "deposit")
+
+    def test_commit_records_history_and_is_remembered(self):
+        self.shard.prepare_debit("tx1", "origen", "remota", 4000, 1.0)
+        self.assertEqual(self.shard.commit_transfer("tx1"), 6000)
+        self.assertEqual(self.shard.transfer_status("tx1"), "committed")
+        self.assertEqual(self.shard.prepare_debit("tx1", "origen", "remota", 4000, 1.0), TRANSFER_COMMITTED)
+        self.assertEqual(self.shard.get_balance("origen"), 60)
+        self.assertEqual(self.shard.get_transaction_history("origen")[-1]["counterparty"], "remota")
+        self.assertTrue(self.shard.forget_transfer("tx1"))
+        self.assertEqual(self.shard.transfer_status("tx1"), "unknown")
+
+    def test_prepared_transfer_survives_restart(self):
+        self.shard.prepare_debit("tx1", "origen", "remota", 4000, 1.0)
+        self.shard.persistence.snapshot(self.shard)
+        self.shard.prepare_credit("tx2", "remota", "origen", 500, 2.0)
+        self.shard.persistence.close()
+        self.shard = ShardServer(persistence=BankPersistence(self.directory, fsync=False))
+        self.assertEqual(set(self.shard.pending_transfers()["prepared"]), {"tx1", "tx2"})
+        self.assertEqual(self.shard.commit_transfer("tx2"), 6500)
+        self.assertEqual(self.shard.get_notifications("origen"), ["Transferencia recibida de remota: 5"])
+
+class TestShardRouter(unittest.TestCase):
+    SHARDS = 3
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever)
+        self.loop_thread.start()
+        self.shards = [ShardServer(kdf_iterations=1000) for _ in range(self.SHARDS)]
+        self.binary_servers = [BinaryBankServer(shard, max_workers=4) for shard in self.shards]
+        urls = []
+        for binary_server in self.binary_servers:
+            server = asyncio.run_coroutine_threadsafe(binary_server.start(port=0), self.loop).result()
+            host, port = server.sockets[0].getsockname()[:2]
+            urls.append(f"bank://{host}:{port}")
+        self.router = ShardRouter(urls, pool_size=4)
+        self.accounts = accounts_on_distinct_shards(self.SHARDS)
+        for account_id in self.accounts:
+            self.router.create_account(account_id, "password")
+            self.router.deposit(account_id, 100)
+
+    def tearDown(self):
+        self.router._close()
+        for binary_server in self.binary_servers:
+            asyncio.run_coroutine_threadsafe(binary_server.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join()
+        self.loop.close()
+
+    def test_accounts_live_on_their_shard(self):
+        for index, account_id in enumerate(self.accounts):
+            self.assertEqual(list(self.shards[index].accounts), [account_id])
+
+    def test_cross_shard_transfer(self):
+        a, b, _ = self.accounts
+        self.assertEqual(self.router.transfer(a, b, 30),
+                         f"Transferencia de 30 desde la cuenta {a} a la cuenta {b}. Nuevos saldos: {a}: 70, {b}: 130.")
+        self.assertEqual(self.router.get_transaction_history(b)[-1]["counterparty"], a)
+        self.assertEqual(self.router.get_notifications(b), [f"Transferencia recibida de {a}: 30"])
+        self.assertEqual(self.router.transfer(a, b, 500), "Fondos insuficientes.")
+        self.assertEqual(self.router.transfer(a, "no_existe", 10), "Cuenta de destino no existe.")
+        self.assertEqual([self.router.get_balance(a), self.router.get_balance(b)], [70, 130])
+        self.assertTrue(all(not shard.prepared and not shard.committed for shard in self.shards))
+        self.assertEqual(self.router.top_accounts(2), [[b, 130], [self.accounts[2], 100]])
+        retried = self.router.transfer(b, a, 5, "retry")
+        self.assertEqual(self.router.transfer(b, a, 5, "retry"), retried)
+        self.assertEqual([self.router.get_balance(a), self.router.get_balance(b)], [75, 125])
+
+    def lose_response(self, index, method):
+        """Hace que la siguiente llamada ``method`` al shard ``index`` se aplique pero falle al responder."""
+        call = self.router._call
+
+        def failing_call(shard_index, shard_method, *params):
+            result = call(shard_index, shard_method, *params)
+            if (shard_index, shard_method) == (index, method):
+                self.router._call = call
+                raise ConnectionError("respuesta perdida")
+            return result
+        self.router._call = failing_call
+
+    def test_retried_transfer_is_not_applied_twice(self):
+        a, b, c = self.accounts
+        expected = f"Transferencia de 10 desde la cuenta {a} a la cuenta {b}. Nuevos saldos: {a}: 90, {b}: 110."
+        self.lose_response(0, 'prepare_debit')
+        with self.assertRaises(ConnectionError):
+            self.router.transfer(a, b, 10)
+        self.assertEqual(self.router.get_balance(a), 100)   #el débito retenido se deshace
+        self.assertFalse(self.shards[0].prepared)
+        for index, method in ((0, 'prepare_debit'), (0, 'commit_transfer'), (1, 'commit_transfer'),
+                              (0, 'forget_transfer')):
+            self.lose_response(index, method)
+            with self.assertRaises(ConnectionError):
+                self.router.transfer(a, b, 10, f"pago-{index}-{method}")
+            self.assertEqual(self.router.transfer(a, b, 10, f"pago-{index}-{method}"), expected)
+            self.router.transfer(b, a, 10)
+        self.assertEqual([self.router.get_balance(account_id) for account_id in self.accounts], [100, 100, 100])
+        self.assertTrue(all(not shard.prepared and not shard.committed for shard in self.shards))
+        self.assertFalse(self.router._transfer_attempts)
+        self.router.transfer(a, c, 10, "pago")
+        self.assertEqual(self.router.transfer(a, c, 20, "pago"), IDEMPOTENCY_CONFLICT)
+        self.assertEqual(self.router.transfer(a, b, 10, "pago"), IDEMPOTENCY_CONFLICT)
+        self.assertEqual(self.router.get_balance(a), 90)
+
+    def test_concurrent_cross_shard_transfers_conserve_money(self):
+        def worker(source, target):
+            for _ in range(20):
+                self.router.transfer(source, target, 3)
+        pairs = [(a, b) for a in self.accounts for b in self.accounts if a != b]
+        threads = [threading.Thread(target=worker, args=pair) for pair in pairs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(self.router.get_balance(account_id) for account_id in self.accounts), 300)
+
+    def test_recover_in_doubt_transfers(self):
+        a, b, c = self.accounts
+        # Débito y crédito preparados y débito confirmado: el crédito debe completarse.
+        self.shards[0].prepare_debit("tx1", a, b, 1000, 1.0)
+        self.shards[1].prepare_credit("tx1", a, b, 1000, 1.0)
+        self.shards[0].commit_transfer("tx1")
+        # Solo el débito preparado: debe deshacerse.
+        self.shards[2].prepare_debit("tx2", c, a, 5000, 1.0)
+        self.assertEqual(self.router._recover_transfers(), 2)
+        self.assertEqual([self.router.get_balance(account_id) for account_id in self.accounts], [90, 110, 100])
+        self.assertTrue(all(not shard.prepared and not shard.committed for shard in self.shards))
+
+    def test_import_accounts_across_shards(self):
+        accounts = [{"account_id": f"importada_{i}", "password": "password", "balance": i} for i in range(30)]
+        accounts.insert(5, {"account_id": self.accounts[1], "password": "password"})
+        accounts.insert(7, "no es una cuenta")
+        result = self.router.import_accounts(accounts)
+        self.assertEqual(result, {"created": 30, "errors": [[5, "La cuenta ya existe."], [7, "Cuenta inválida."]]})
+        self.assertEqual(self.router.get_balance("importada_29"), 29)
+        self.assertEqual(sum(len(shard.accounts) for shard in self.shards), self.SHARDS + 30)
+
+    def test_export_across_shards(self):
+        a, b, _ = self.accounts
+        self.router.transfer(a, b, 10)
+        export = self.router.open_export()
+        self.router.deposit(a, 1)
+        records, cursor = [], None
+        while True:
+            chunk = self.router.export_chunk(export["export_id"], cursor, 2)
+            records.extend(chunk["records"])
+            cursor = chunk["next_cursor"]
+            if cursor is None:
+                break
+        balances = {r["account_id"]: r["balance"] for r in records if r["record"] == "account"}
+        self.assertEqual(balances, {a: 90, b: 110, self.accounts[2]: 100})
+        self.assertEqual(len(records), 3 + export["transactions"])
+        for cursor in ([self.SHARDS], [-1], ["0"], [0, 99, 0]):
+            self.assertEqual(self.router.export_chunk(export["export_id"], cursor), INVALID_PAGE)
+        self.assertTrue(self.router.close_export(export["export_id"]))
+        self.assertTrue(all(not shard.exports for shard in self.shards))
+
+    def test_sessions_and_batches(self):
+        a, b, c = self.accounts
+        self.router.require_session = True
+        token = self.router.login(a, "password")
+        self.assertEqual(self.router.get_balance(a), INVALID_SESSION)
+        self.assertEqual(self.router.execute_batch([["deposit", token, 5], ["withdraw", token, 1]]),
+                         [f"Depósito de 5 en la cuenta {a}. Nuevo saldo es 105.",
+                          f"Retiro de 1 de la cuenta {a}. Nuevo saldo es 104."])
+        results = self.router.execute_batch([["transfer", token, b, 4], ["get_balance", token], ["pay", a]])
+        self.assertEqual(results[1:], [100, "Operación no soportada: pay"])
+        self.assertEqual(self.router._dispatch('open_export', ()), ADMIN_ONLY)
+        self.assertEqual(self.router._dispatch('total_inflow', ()), ADMIN_ONLY)
+        self.assertEqual(self.router.delete_account(a), INVALID_SESSION)
+        self.assertEqual(self.router.delete_account(token), "Cuenta eliminada exitosamente.")
+        self.assertFalse(self.router.check_session(token))
+
+class TestShardProcesses(unittest.TestCase):
+    def test_client_against_sharded_server(self):
+        with socket.socket() as sock:
+            sock.bind(('localhost', 0))
+            base_port = sock.getsockname()[1]
+        processes, urls = start_shards(2, base_port=base_port, kdf_iterations=1000, max_workers=2)
+        router = ShardRouter(urls, pool_size=4)
+        server = create_server(router, port=0, max_workers=4, log_requests=False)
+        server_thread = threading.Thread(target=server.serve_forever)
+        server_thread.start()
+        try:
+            client = BankClient(f"http://localhost:{server.server_address[1]}/RPC2")
+            a, b = accounts_on_distinct_shards(2)
+            client.create_account(a, "password")
+            client.create_account(b, "password")
+            self.assertTrue(client.login(a, "password", notifications_enabled=False))
+            client.deposit(100)
+            client.transfer(b, 25)
+            self.assertEqual(client.get_balance(), 75)
+            self.assertEqual(router.get_balance(b), 25)
+            client.logout()
+            client.close()
+        finally:
+            server.shutdown()
+            server_thread.join()
+            server.server_close()
+            router._close()
+            stop_shards(processes)
+
+if __name__ == '__main__':
+    unittest.main()
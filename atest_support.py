@@ -0,0 +1,10 @@
+"""Utilidades compartidas por las pruebas."""
+
+class FakeClock:
+    """Reloj manual para las pruebas: devuelve ``now`` hasta que la prueba lo cambia."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1,354 @@
+import asyncio
+from urllib.parse import urlsplit
+import xmlrpc.client
+
+from bank_client import (DEFAULT_HISTORY_PAGE, DEFAULT_POOL_SIZE, MAX_BATCH_SIZE, NOTIFICATION_POLL_INTERVAL,
+                         NOTIFICATION_WAIT, BankBatch, idempotency_params)
+
+MAX_HEADER_SIZE = 64 * 1024
+
+class AsyncConnectionPool:
+    """
+    Pool de conexiones HTTP/1.1 persistentes para llamadas XML-RPC desde asyncio.
+
+    Las conexiones se abren a demanda hasta ``size`` y se reutilizan mientras el
+    servidor las mantenga abiertas (AsyncBankServer lo hace; el servidor de hilos
+    las cierra tras cada respuesta y se abre otra). Una corrutina que encuentra
+    todas las conexiones ocupadas espera a que se libere alguna, sin bloquear el
+    bucle de eventos. Varios AsyncBankClient pueden compartir el mismo pool.
+
+    Atributos:
+        server_url (str): URL del servidor RPC.
+        size (int): Número máximo de conexiones abiertas.
+    """
+
+    def __init__(self, server_url, size=DEFAULT_POOL_SIZE):
+        """
+        Inicializa el pool sin abrir ninguna conexión.
+
+        Args:
+            server_url (str): URL del servidor RPC, por ejemplo ``http://localhost:8000/RPC2``.
+            size (int): Número máximo de conexiones abiertas.
+        """
+        if size < 1:
+            raise ValueError("size debe ser al menos 1.")
+        url = urlsplit(server_url)
+        if url.scheme != 'http':
+            raise ValueError(f"Esquema no soportado: {url.scheme}")
+        self.server_url = server_url
+        self.size = size
+        self._host = url.hostname
+        self._port = url.port or 80
+        self._path = url.path or '/RPC2'
+        self._idle = []  # Pila de conexiones libres (reader, writer)
+        self._slots = asyncio.Semaphore(size)
+
+    async def call(self, method, *params):
+        """
+        Llama a un método remoto.
+
+        Args:
+            method (str): Nombre del método.
+            *params: Parámetros del método.
+
+        Returns:
+            object: El resultado de la llamada.
+
+        Raises:
+            xmlrpc.client.Fault: Si el método falla en el servidor.
+            xmlrpc.client.ProtocolError: Si el servidor responde con un error HTTP.
+        """
+        body = xmlrpc.client.dumps(params, method, allow_none=True).encode()
+        async with self._slots:
+            if self._idle:
+                try:
+                    payload = await self._request(self._idle.pop(), body)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    # El servidor cerró la conexión reutilizada: se reintenta con una nueva.
+                    payload = await self._request(await self._connect(), body)
+            else:
+                payload = await self._request(await self._connect(), body)
+        return xmlrpc.client.loads(payload, use_builtin_types=True)[0][0]
+
+    async def _connect(self):
+        """Abre una conexión nueva con el servidor."""
+        return await asyncio.open_connection(self._host, self._port, limit=MAX_HEADER_SIZE)
+
+    async def _request(self, connection, body):
+        """Envía una solicitud por una conexión y devuelve el cuerpo de la respuesta."""
+        reader, writer = connection
+        keep_alive = False
+        try:
+            writer.write((f"POST {self._path} HTTP/1.1\r\n"
+                          f"Host: {self._host}:{self._port}\r\n"
+                          f"Content-Type: text/xml\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body)
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            status_line, *header_lines = head.decode('latin-1').split("\r\n")
+            version, status, reason = (status_line.split(" ", 2) + [""])[:3]
+            headers = {}
+            for line in header_lines:
+                if line:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+            payload = await reader.readexactly(int(headers.get('content-length', 0)))
+            connection_header = headers.get('connection', '').lower()
+            keep_alive = (connection_header != 'close' if version == 'HTTP/1.1'
+                          else connection_header == 'keep-alive')
+            if status != '200':
+                raise xmlrpc.client.ProtocolError(self.server_url, int(status), reason, headers)
+            return payload
+        finally:
+            if keep_alive:
+                self._idle.append(connection)
+            else:
+                writer.close()
+
+    async def close(self):
+        """Cierra las conexiones libres del pool."""
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+class AsyncBankBatch(BankBatch):
+    """
+    Lote de operaciones de un AsyncBankClient. Ver BankBatch.
+
+    Se usa como gestor de contexto asíncrono; al salir del bloque sin errores
+    envía las operaciones pendientes::
+
+        async with await client.batch() as batch:
+            batch.deposit(100, "empleado_1")
+            batch.transfer("empleado_2", 50)
+        print(batch.results)
+    """
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self.execute()
+        return False
+
+    async def execute(self):
+        """
+        Envía las operaciones pendientes en llamadas de hasta max_batch_size operaciones.
+
+        Returns:
+            list: Los resultados de las operaciones enviadas, en orden.
+        """
+        results = []
+        while self.operations:
+            chunk = self.operations[:self.max_batch_size]
+            results.extend(await self.client.execute_batch(chunk))
+            del self.operations[:len(chunk)]
+        self.results.extend(results)
+        return results
+
+class AsyncBankClient:
+    """
+    Cliente del banco para asyncio.
+
+    Ofrece los mismos métodos que BankClient como corrutinas. Cada instancia
+    representa a un usuario (su cuenta y su sesión) y puede compartir el pool de
+    conexiones con otras, de modo que un solo proceso simula miles de clientes
+    concurrentes con unas pocas conexiones y sin un hilo por cliente.
+
+    Atributos:
+        pool (AsyncConnectionPool): Conexiones al servidor RPC.
+        current_account (str): La cuenta actual autenticada.
+        session (str): Token de la sesión abierta con login, o None.
+        notification_wait (float): Segundos que el servidor retiene cada espera de notificaciones.
+        notification_task (asyncio.Task): Tarea que recibe las notificaciones.
+        stop_notification_task (bool): Bandera para detener la tarea de notificaciones.
+    """
+
+    def __init__(self, server_url=None, pool=None, notification_wait=NOTIFICATION_WAIT,
+                 pool_size=DEFAULT_POOL_SIZE):
+        """
+        Inicializa el cliente.
+
+        Args:
+            server_url (str): URL del servidor RPC. No hace falta si se indica ``pool``.
+            pool (AsyncConnectionPool): Pool compartido. Si es None se crea uno propio.
+            notification_wait (float): Segundos que el servidor retiene cada espera de notificaciones.
+            pool_size (int): Conexiones como máximo del pool propio.
+        """
+        self.pool = pool if pool is not None else AsyncConnectionPool(server_url, pool_size)
+        self.current_account = None
+        self.session = None
+        self.notification_wait = notification_wait
+        self.notification_task = None
+        self.stop_notification_task = False
+
+    @property
+    def caller(self):
+        """Identificador de la cuenta actual que se envía al servidor: el token de sesión o, sin sesión, el ID."""
+        return self.session or self.current_account
+
+    async def delete_account(self, account_id, idempotency_key=None):
+        """Elimina una cuenta del servidor bancario. Ver BankClient.delete_account."""
+        if account_id == self.current_account:
+            account_id = self.caller
+        return await self.pool.call('delete_account', account_id, *idempotency_params(idempotency_key))
+
+    async def create_account(self, account_id, password, idempotency_key=None):
+        """Crea una nueva cuenta en el servidor bancario. Ver BankClient.create_account."""
+        return await self.pool.call('create_account', account_id, password, *idempotency_params(idempotency_key))
+
+    async def import_accounts(self, accounts, idempotency_key=None):
+        """Crea muchas cuentas en una sola llamada RPC. Ver BankClient.import_accounts."""
+        return await self.pool.call('import_accounts', accounts, *idempotency_params(idempotency_key))
+
+    async def authenticate(self, account_id, password):
+        """Autentica a un usuario sin abrir sesión. Ver BankClient.authenticate."""
+        return await self.pool.call('authenticate', account_id, password)
+
+    async def get_balance(self):
+        """Obtiene el saldo de la cuenta actual."""
+        return await self.pool.call('get_balance', self.caller)
+
+    async def deposit(self, amount, idempotency_key=None):
+        """Realiza un depósito en la cuenta actual. Ver BankClient.deposit."""
+        return await self.pool.call('deposit', self.caller, amount, *idempotency_params(idempotency_key))
+
+    async def withdraw(self, amount, idempotency_key=None):
+        """Realiza un retiro de la cuenta actual. Ver BankClient.withdraw."""
+        return await self.pool.call('withdraw', self.caller, amount, *idempotency_params(idempotency_key))
+
+    async def transfer(self, to_account, amount, idempotency_key=None):
+        """Realiza una transferencia desde la cuenta actual a otra cuenta. Ver BankClient.transfer."""
+        return await self.pool.call('transfer', self.caller, to_account, amount,
+                                    *idempotency_params(idempotency_key))
+
+    async def execute_batch(self, operations, idempotency_key=None):
+        """Ejecuta varias operaciones en una sola llamada RPC. Ver BankClient.execute_batch."""
+        return await self.pool.call('execute_batch', operations, *idempotency_params(idempotency_key))
+
+    async def batch(self, max_batch_size=MAX_BATCH_SIZE):
+        """Crea un lote de operaciones que se envía al salir del bloque ``async with``. Ver BankClient.batch."""
+        return AsyncBankBatch(self, max_batch_size)
+
+    async def get_transaction_history(self, cursor=None, limit=None, filters=None):
+        """Obtiene el historial de la cuenta actual. Ver BankClient.get_transaction_history."""
+        if cursor is None and limit is None and filters is None:
+            return await self.pool.call('get_transaction_history', self.caller)
+        return await self.pool.call('get_transaction_history', self.caller, cursor, limit, filters)
+
+    async def iter_transaction_history(self, page_size=DEFAULT_HISTORY_PAGE, filters=None):
+        """
+        Recorre el historial de la cuenta actual página a página.
+
+        Args:
+            page_size (int): Transacciones por página.
+            filters (dict): Filtros por tipo, importe y fecha.
+
+        Yields:
+            dict: Cada transacción, en orden.
+        """
+        cursor = 0
+        while cursor is not None:
+            page = await self.get_transaction_history(cursor, page_size, filters or {})
+            if not isinstance(page, dict):
+                for transaction in page if isinstance(page, list) else ():
+                    yield transaction
+                return
+            for transaction in page["transactions"]:
+                yield transaction
+            cursor = page["next_cursor"]
+
+    async def open_export(self):
+        """Abre una exportación de todos los saldos y transacciones. Ver BankClient.open_export."""
+        return await self.pool.call('open_export')
+
+    async def export_chunk(self, export_id, cursor=None, limit=None):
+        """Obtiene el siguiente bloque de una exportación. Ver BankClient.export_chunk."""
+        return await self.pool.call('export_chunk', export_id, cursor, limit)
+
+    async def close_export(self, export_id):
+        """Cierra una exportación en el servidor."""
+        return await self.pool.call('close_export', export_id)
+
+    async def get_notifications(self):
+        """Obtiene las notificaciones de la cuenta actual."""
+        return await self.pool.call('get_notifications', self.caller)
+
+    async def peek_notifications(self):
+        """Consulta las notificaciones de la cuenta actual sin consumirlas. Ver BankClient.peek_notifications."""
+        return await self.pool.call('peek_notifications', self.caller)
+
+    async def login(self, account_id, password, notifications_enabled=True):
+        """
+        Abre una sesión en el servidor y, opcionalmente, la tarea de notificaciones.
+
+        Args:
+            account_id (str): El ID de la cuenta.
+            password (str): La contraseña de la cuenta.
+            notifications_enabled (bool): Si se deben habilitar las notificaciones.
+
+        Returns:
+            bool: True si la autenticación es exitosa, False en caso contrario.
+        """
+        session = await self.pool.call('login', account_id, password)
+        if not session:
+            return False
+        self.current_account = account_id
+        self.session = session
+        if notifications_enabled:
+            self.stop_notification_task = False
+            self.notification_task = asyncio.create_task(self.listen_for_notifications())
+        return True
+
+    async def logout(self):
+        """Cierra la sesión del usuario actual y detiene la tarea de notificaciones."""
+        await self.stop_notifications()
+        if self.session:
+            await self.pool.call('logout', self.session)
+        self.current_account = None
+        self.session = None
+
+    async def stop_notifications(self):
+        """Detiene la tarea de notificaciones."""
+        self.stop_notification_task = True
+        if self.notification_task:
+            if not self.notification_task.done():
+                await self.pool.call('wake_notifications', self.caller)
+            await self.notification_task
+            self.notification_task = None
+
+    async def listen_for_notifications(self):
+        """
+        Escucha y muestra las notificaciones de la cuenta actual.
+
+        Usa una conexión propia para no ocupar una del pool durante la espera
+        larga en el servidor. Si el servidor responde al instante, o con un error
+        en lugar de una lista, vuelve a consultar cada NOTIFICATION_POLL_INTERVAL
+        segundos.
+        """
+        connection = AsyncConnectionPool(self.pool.server_url, 1)
+        account_id = self.caller
+        loop = asyncio.get_running_loop()
+        try:
+            while not self.stop_notification_task:
+                started = loop.time()
+                notifications = await connection.call('wait_notifications', account_id, self.notification_wait)
+                if not isinstance(notifications, list):
+                    notifications = []
+                for notification in notifications:
+                    print(f"\nNotificación: {notification}")
+                if (not notifications and not self.stop_notification_task
+                        and loop.time() - started < NOTIFICATION_POLL_INTERVAL):
+                    await asyncio.sleep(NOTIFICATION_POLL_INTERVAL)
+        finally:
+            await connection.close()
+
+    async def close(self):
+        """Cierra las conexiones del pool."""
+        await self.pool.close()
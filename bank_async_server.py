@@ -0,0 +1,346 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+import socket
+import xmlrpc.client
+from xmlrpc.server import SimpleXMLRPCDispatcher
+
+from bank_binary import FRAME_HEADER, MAX_FRAME_SIZE, decode, encode, frame
+from bank_metrics import METRICS_CONTENT_TYPE, METRICS_PATH
+from bank_server import BankServer, RequestHandler, DEFAULT_MAX_WORKERS, DEFAULT_REQUEST_QUEUE_SIZE
+
+MAX_HEADER_SIZE = 64 * 1024
+MAX_BODY_SIZE = 10 * 1024 * 1024
+
+def _make_dispatcher(bank_server):
+    """Crea un despachador con los mismos métodos que expone ``create_server``."""
+    dispatcher = SimpleXMLRPCDispatcher(allow_none=True)
+    dispatcher.register_instance(bank_server)
+    dispatcher.register_multicall_functions()
+    return dispatcher
+
+def _set_ready(future):
+    """Marca como lista la espera de una llamada, si no ha terminado ya."""
+    if not future.done():
+        future.set_result(None)
+
+async def _wait_in_loop(bank_server, params):
+    """
+    Espera en el bucle de eventos, sin ocupar un hilo, a que haya notificaciones para una cuenta.
+
+    Args:
+        bank_server (BankServer): Servidor con las colas de notificaciones.
+        params (tuple): Parámetros de la llamada a wait_notifications.
+
+    Returns:
+        bool: True si la espera se ha atendido y la llamada puede despacharse con timeout 0;
+        False si los parámetros no son válidos y la llamada debe despacharse tal cual.
+    """
+    try:
+        wait = bank_server._prepare_wait(*params)
+    except TypeError:
+        return False
+    if wait is None:
+        return False
+    _, notification_queue, timeout = wait
+    if notification_queue is None or not timeout:
+        return True
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+
+    def notify():
+        loop.call_soon_threadsafe(_set_ready, ready)
+
+    if notification_queue.add_listener(notify):
+        try:
+            await asyncio.wait((ready,), timeout=timeout)
+        finally:
+            notification_queue.remove_listener(notify)
+    return True
+
+class AsyncBankServer:
+    """
+    Servidor XML-RPC basado en asyncio que expone un BankServer.
+
+    Usa el mismo formato de mensajes y la misma ruta ``/RPC2`` que ``run_server``,
+    pero mantiene las conexiones HTTP/1.1 abiertas (keep-alive) en el bucle de
+    eventos: una conexión inactiva no ocupa ningún hilo. Solo la ejecución de
+    cada llamada pasa a un pool acotado de hilos, ya que los métodos de
+    BankServer son bloqueantes. La espera de wait_notifications tampoco ocupa
+    un hilo: se hace en el bucle de eventos y solo el vaciado de la cola pasa
+    al pool, así que no consume el cupo de long_polls.
+
+    Atributos:
+        bank_server (BankServer): Instancia expuesta.
+        dispatcher (SimpleXMLRPCDispatcher): Despachador de las llamadas XML-RPC.
+        executor (ThreadPoolExecutor): Pool de hilos que ejecuta las llamadas.
+        idle_timeout (float): Segundos que una conexión puede estar inactiva (None sin límite).
+        open_connections (int): Número de conexiones abiertas.
+    """
+
+    def __init__(self, bank_server=None, max_workers=DEFAULT_MAX_WORKERS, idle_timeout=None):
+        """
+        Inicializa el servidor asíncrono.
+
+        Args:
+            bank_server (BankServer): Instancia a exponer. Si es None se crea una nueva.
+            max_workers (int): Hilos que ejecutan las llamadas.
+            idle_timeout (float): Segundos de inactividad tras los que se cierra una conexión.
+        """
+        self.bank_server = bank_server if bank_server is not None else BankServer()
+        self.dispatcher = _make_dispatcher(self.bank_server)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bank-async")
+        self.bank_server.long_polls.clamp(max_workers)
+        self.idle_timeout = idle_timeout
+        self.open_connections = 0
+        self.server = None
+
+    async def start(self, host='localhost', port=8000, backlog=DEFAULT_REQUEST_QUEUE_SIZE):
+        """
+        Empieza a aceptar conexiones.
+
+        Args:
+            host (str): Dirección en la que escuchar.
+            port (int): Puerto en el que escuchar (0 elige uno libre).
+            backlog (int): Tamaño del backlog de conexiones pendientes.
+
+        Returns:
+            asyncio.Server: El servidor en escucha.
+        """
+        self.server = await asyncio.start_server(self._handle_connection, host, port,
+                                                 backlog=backlog, limit=MAX_HEADER_SIZE)
+        return self.server
+
+    async def close(self):
+        """Deja de aceptar conexiones y libera el pool de hilos."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader, writer):
+        """Atiende todas las solicitudes de una conexión hasta que se cierre."""
+        self.open_connections += 1
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                ConnectionError, ValueError):
+            pass
+        finally:
+            self.open_connections -= 1
+            writer.close()
+
+    async def _handle_request(self, reader, writer):
+        """
+        Lee una solicitud HTTP, la despacha y escribe la respuesta.
+
+        Returns:
+            bool: True si la conexión debe seguir abierta.
+        """
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.idle_timeout)
+        request_line, *header_lines = head.decode('latin-1').split("\r\n")
+        method, path, version = request_line.split(" ", 2)
+        headers = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+        if method == 'GET' and path == METRICS_PATH:
+            body = self.bank_server.metrics.render().encode()
+            await self._send(writer, HTTPStatus.OK, body, keep_alive, METRICS_CONTENT_TYPE)
+            return keep_alive
+        if method != 'POST':
+            await self._send(writer, HTTPStatus.NOT_IMPLEMENTED, b"", False)
+            return False
+        length = int(headers.get('content-length', -1))
+        if length < 0 or length > MAX_BODY_SIZE:
+            await self._send(writer, HTTPStatus.LENGTH_REQUIRED if length < 0
+                             else HTTPStatus.REQUEST_ENTITY_TOO_LARGE, b"", False)
+            return False
+        body = await reader.readexactly(length)
+        if path not in RequestHandler.rpc_paths:
+            await self._send(writer, HTTPStatus.NOT_FOUND, b"", keep_alive)
+            return keep_alive
+
+        if b"wait_notifications" in body:
+            body = await self._long_poll(body)
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(self.executor, self.dispatcher._marshaled_dispatch, body)
+        await self._send(writer, HTTPStatus.OK, response, keep_alive)
+        return keep_alive
+
+    async def _long_poll(self, body):
+        """Si la llamada es wait_notifications, espera en el bucle y devuelve la misma llamada sin espera."""
+        try:
+            params, method = xmlrpc.client.loads(body)
+        except Exception:  # El despachador responde a la llamada mal formada.
+            return body
+        if method != 'wait_notifications' or not await _wait_in_loop(self.bank_server, params):
+            return body
+        return xmlrpc.client.dumps((params[0], 0), method).encode()
+
+    async def _send(self, writer, status, body, keep_alive, content_type="text/xml"):
+        """Escribe una respuesta HTTP/1.1."""
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+class BinaryBankServer:
+    """
+    Servidor del protocolo binario de bank_binary que expone un BankServer.
+
+    Cada solicitud es una trama ``[método, [parámetros...]]`` y cada respuesta
+    ``[True, resultado]`` o ``[False, mensaje]``. Los métodos disponibles son
+    los mismos que por XML-RPC. Como AsyncBankServer, mantiene las conexiones
+    abiertas en el bucle de eventos y solo ejecuta las llamadas en un pool de
+    hilos, y espera las notificaciones de wait_notifications en el bucle; puede
+    compartir el BankServer (y el pool) con un AsyncBankServer para atender
+    ambos protocolos sobre el mismo estado.
+
+    Atributos:
+        bank_server (BankServer): Instancia expuesta.
+        dispatcher (SimpleXMLRPCDispatcher): Despachador de las llamadas.
+        executor (ThreadPoolExecutor): Pool de hilos que ejecuta las llamadas.
+        idle_timeout (float): Segundos que una conexión puede estar inactiva (None sin límite).
+        open_connections (int): Número de conexiones abiertas.
+    """
+
+    def __init__(self, bank_server=None, max_workers=DEFAULT_MAX_WORKERS, idle_timeout=None, executor=None):
+        """
+        Inicializa el servidor binario.
+
+        Args:
+            bank_server (BankServer): Instancia a exponer. Si es None se crea una nueva.
+            max_workers (int): Hilos que ejecutan las llamadas, si no se indica ``executor``.
+            idle_timeout (float): Segundos de inactividad tras los que se cierra una conexión.
+            executor (ThreadPoolExecutor): Pool compartido. Si es None se crea uno propio.
+        """
+        self.bank_server = bank_server if bank_server is not None else BankServer()
+        self.dispatcher = _make_dispatcher(self.bank_server)
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bank-binary")
+        if self._owns_executor:
+            # Un pool compartido ya acotó las esperas largas de quien lo creó.
+            self.bank_server.long_polls.clamp(max_workers)
+        self.idle_timeout = idle_timeout
+        self.open_connections = 0
+        self.server = None
+
+    async def start(self, host='localhost', port=8001, backlog=DEFAULT_REQUEST_QUEUE_SIZE):
+        """
+        Empieza a aceptar conexiones.
+
+        Args:
+            host (str): Dirección en la que escuchar.
+            port (int): Puerto en el que escuchar (0 elige uno libre).
+            backlog (int): Tamaño del backlog de conexiones pendientes.
+
+        Returns:
+            asyncio.Server: El servidor en escucha.
+        """
+        self.server = await asyncio.start_server(self._handle_connection, host, port, backlog=backlog)
+        return self.server
+
+    async def close(self):
+        """Deja de aceptar conexiones y, si es propio, libera el pool de hilos."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader, writer):
+        """Atiende todas las tramas de una conexión hasta que se cierre."""
+        self.open_connections += 1
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                header = await asyncio.wait_for(reader.readexactly(FRAME_HEADER.size), self.idle_timeout)
+                size = FRAME_HEADER.unpack(header)[0]
+                if size > MAX_FRAME_SIZE:
+                    break
+                payload = await reader.readexactly(size)
+                if b"wait_notifications" in payload:
+                    payload = await self._long_poll(payload)
+                writer.write(await loop.run_in_executor(self.executor, self._dispatch, payload))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.open_connections -= 1
+            writer.close()
+
+    async def _long_poll(self, payload):
+        """Si la trama es wait_notifications, espera en el bucle y devuelve la misma llamada sin espera."""
+        try:
+            method, params = decode(payload)
+        except (ValueError, TypeError):  # _dispatch responde a la trama mal formada.
+            return payload
+        if method != 'wait_notifications' or not await _wait_in_loop(self.bank_server, params):
+            return payload
+        return encode([method, [params[0], 0]])
+
+    def _dispatch(self, payload):
+        """Decodifica una solicitud, la ejecuta y devuelve la trama de respuesta."""
+        try:
+            method, params = decode(payload)
+            return frame([True, self.dispatcher._dispatch(method, params)])
+        except Exception as exc:
+            return frame([False, f"{type(exc)}:{exc}"])
+
+async def serve(host='localhost', port=8000, max_workers=DEFAULT_MAX_WORKERS, idle_timeout=None,
+                binary_port=None):
+    """
+    Corrutina que atiende el servidor bancario asíncrono hasta que se cancele.
+
+    Args:
+        host (str): Dirección en la que escuchar.
+        port (int): Puerto en el que escuchar.
+        max_workers (int): Hilos que ejecutan las llamadas.
+        idle_timeout (float): Segundos de inactividad tras los que se cierra una conexión.
+        binary_port (int): Si se indica, puerto del protocolo binario, servido por el
+            mismo BankServer.
+    """
+    async_server = AsyncBankServer(max_workers=max_workers, idle_timeout=idle_timeout)
+    server = await async_server.start(host, port)
+    print(f"Servidor bancario asíncrono corriendo en el puerto {port}...")
+    binary_server = None
+    if binary_port is not None:
+        binary_server = BinaryBankServer(async_server.bank_server, idle_timeout=idle_timeout,
+                                         executor=async_server.executor)
+        await binary_server.start(host, binary_port)
+        print(f"Protocolo binario en el puerto {binary_port}...")
+    try:
+        await server.serve_forever()
+    finally:
+        if binary_server is not None:
+            await binary_server.close()
+        await async_server.close()
+
+def run_async_server(host='localhost', port=8000, max_workers=DEFAULT_MAX_WORKERS, idle_timeout=None,
+                     binary_port=None):
+    """
+    Inicia el servidor bancario asíncrono.
+
+    Args:
+        host (str): Dirección en la que escuchar.
+        port (int): Puerto en el que escuchar.
+        max_workers (int): Hilos que ejecutan las llamadas.
+        idle_timeout (float): Segundos de inactividad tras los que se cierra una conexión.
+        binary_port (int): Si se indica, puerto del protocolo binario.
+    """
+    asyncio.run(serve(host, port, max_workers, idle_timeout, binary_port))
+
+if __name__ == "__main__":
+    run_async_server()
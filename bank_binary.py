@@ -0,0 +1,241 @@
+import socket
+import struct
+from urllib.parse import urlsplit
+import xmlrpc.client
+
+BINARY_SCHEME = "bank"
+DEFAULT_BINARY_PORT = 8001
+MAX_FRAME_SIZE = 10 * 1024 * 1024
+
+FRAME_HEADER = struct.Struct('>I')
+_INT = struct.Struct('>cq')
+_FLOAT = struct.Struct('>cd')
+_SIZED = struct.Struct('>cI')
+_INT_VALUE = struct.Struct('>q')
+_FLOAT_VALUE = struct.Struct('>d')
+_SIZE = struct.Struct('>I')
+_INT_RANGE = range(-2 ** 63, 2 ** 63)
+
+def encode(value):
+    """
+    Serializa un valor en el formato binario del protocolo.
+
+    Cada valor empieza con una etiqueta de un byte: ``N`` (None), ``T``/``F``
+    (booleanos), ``i`` (entero de 64 bits), ``d`` (float de 64 bits), ``s``
+    (texto UTF-8), ``b`` (bytes), ``l`` (lista) y ``m`` (diccionario). Los
+    textos, bytes, listas y diccionarios llevan su tamaño en 4 bytes. Todos los
+    números van en orden de red.
+
+    Args:
+        value: None, bool, int, float, str, bytes, o listas, tuplas y diccionarios de ellos.
+
+    Returns:
+        bytes: El valor serializado.
+
+    Raises:
+        TypeError: Si el valor no se puede serializar.
+        OverflowError: Si un entero no cabe en 64 bits.
+    """
+    parts = []
+    _encode(value, parts.append)
+    return b"".join(parts)
+
+def _encode(value, write):
+    """Escribe un valor serializado con ``write``."""
+    if value is None:
+        write(b"N")
+    elif value is True:
+        write(b"T")
+    elif value is False:
+        write(b"F")
+    elif isinstance(value, int):
+        if value not in _INT_RANGE:
+            raise OverflowError("El entero no cabe en 64 bits.")
+        write(_INT.pack(b"i", value))
+    elif isinstance(value, float):
+        write(_FLOAT.pack(b"d", value))
+    elif isinstance(value, str):
+        data = value.encode()
+        write(_SIZED.pack(b"s", len(data)))
+        write(data)
+    elif isinstance(value, (bytes, bytearray)):
+        write(_SIZED.pack(b"b", len(value)))
+        write(bytes(value))
+    elif isinstance(value, (list, tuple)):
+        write(_SIZED.pack(b"l", len(value)))
+        for item in value:
+            _encode(item, write)
+    elif isinstance(value, dict):
+        write(_SIZED.pack(b"m", len(value)))
+        for key, item in value.items():
+            _encode(key, write)
+            _encode(item, write)
+    else:
+        raise TypeError(f"No se puede serializar {type(value).__name__}")
+
+def decode(data):
+    """
+    Deserializa un valor del formato binario del protocolo.
+
+    Args:
+        data (bytes): El valor serializado, sin bytes de más.
+
+    Returns:
+        El valor.
+
+    Raises:
+        ValueError: Si los datos están incompletos o mal formados.
+    """
+    try:
+        value, offset = _decode(data, 0)
+    except (struct.error, IndexError, UnicodeDecodeError, RecursionError, TypeError) as exc:
+        raise ValueError(f"Mensaje mal formado: {exc}") from exc
+    if offset != len(data):
+        raise ValueError("Mensaje mal formado: bytes de más.")
+    return value
+
+def _decode(data, offset):
+    """Lee un valor desde ``offset`` y devuelve el valor y la posición siguiente."""
+    tag = data[offset]
+    offset += 1
+    if tag == 0x4E:  # N
+        return None, offset
+    if tag == 0x54:  # T
+        return True, offset
+    if tag == 0x46:  # F
+        return False, offset
+    if tag == 0x69:  # i
+        return _INT_VALUE.unpack_from(data, offset)[0], offset + 8
+    if tag == 0x64:  # d
+        return _FLOAT_VALUE.unpack_from(data, offset)[0], offset + 8
+    size = _SIZE.unpack_from(data, offset)[0]
+    offset += 4
+    if tag in (0x73, 0x62):  # s, b
+        end = offset + size
+        if end > len(data):
+            raise IndexError("texto incompleto")
+        chunk = bytes(data[offset:end])
+        return (chunk.decode() if tag == 0x73 else chunk), end
+    if tag == 0x6C:  # l
+        items = []
+        for _ in range(size):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == 0x6D:  # m
+        mapping = {}
+        for _ in range(size):
+            key, offset = _decode(data, offset)
+            mapping[key], offset = _decode(data, offset)
+        return mapping, offset
+    raise ValueError(f"Etiqueta desconocida: {tag:#x}")
+
+def frame(value):
+    """
+    Serializa un valor precedido de su longitud en 4 bytes.
+
+    Args:
+        value: Valor a serializar (ver encode).
+
+    Returns:
+        bytes: La trama.
+    """
+    payload = encode(value)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+def _recv_exactly(sock, size):
+    """Lee exactamente ``size`` bytes de un socket."""
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("Conexión cerrada por el servidor.")
+        buffer += chunk
+    return bytes(buffer)
+
+def recv_frame(sock):
+    """
+    Lee una trama de un socket y deserializa su contenido.
+
+    Args:
+        sock (socket.socket): Socket conectado.
+
+    Returns:
+        El valor de la trama.
+    """
+    size = FRAME_HEADER.unpack(_recv_exactly(sock, FRAME_HEADER.size))[0]
+    if size > MAX_FRAME_SIZE:
+        raise ValueError("Trama demasiado grande.")
+    return decode(_recv_exactly(sock, size))
+
+class BinaryProxy:
+    """
+    Proxy del protocolo binario con la misma interfaz que ``xmlrpc.client.ServerProxy``.
+
+    Cada llamada envía la trama ``[método, [parámetros...]]`` y recibe
+    ``[True, resultado]`` o ``[False, mensaje]``; en el segundo caso se lanza
+    ``xmlrpc.client.Fault`` como haría ServerProxy. La conexión TCP se mantiene
+    abierta entre llamadas y se reabre si el servidor la cerró. Como
+    ServerProxy, no es seguro usar un mismo proxy desde varios hilos a la vez.
+
+    Atributos:
+        address (tuple): Dirección (host, puerto) del servidor.
+    """
+
+    def __init__(self, server_url):
+        """
+        Inicializa el proxy sin conectar.
+
+        Args:
+            server_url (str): URL con la forma ``bank://host:puerto``.
+        """
+        url = urlsplit(server_url)
+        if url.scheme != BINARY_SCHEME:
+            raise ValueError(f"Esquema no soportado: {url.scheme}")
+        self.address = (url.hostname, url.port or DEFAULT_BINARY_PORT)
+        self._sock = None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *params: self._call(name, params)
+
+    def __call__(self, attr):
+        """Da acceso a ``close`` como ``ServerProxy('...')('close')``."""
+        if attr == 'close':
+            return self._close
+        raise AttributeError(attr)
+
+    def _call(self, method, params):
+        """Envía una llamada y devuelve su resultado."""
+        request = frame([method, list(params)])
+        reused = self._sock is not None
+        try:
+            response = self._exchange(request)
+        except ConnectionError:
+            if not reused:
+                raise
+            # El servidor cerró la conexión reutilizada: se reintenta con una nueva.
+            response = self._exchange(request)
+        ok, result = response
+        if not ok:
+            raise xmlrpc.client.Fault(1, result)
+        return result
+
+    def _exchange(self, request):
+        """Envía una trama y lee la respuesta, conectando si hace falta."""
+        if self._sock is None:
+            self._sock = socket.create_connection(self.address)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            self._sock.sendall(request)
+            return recv_frame(self._sock)
+        except BaseException:
+            self._close()
+            raise
+
+    def _close(self):
+        """Cierra la conexión."""
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
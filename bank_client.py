@@ -1,58 +1,308 @@
 import xmlrpc.client
+from contextlib import contextmanager
 import threading
 import time
 
+from bank_binary import BINARY_SCHEME, BinaryProxy
+
+NOTIFICATION_WAIT = 20
+NOTIFICATION_POLL_INTERVAL = 1
+MAX_BATCH_SIZE = 1000
+DEFAULT_HISTORY_PAGE = 50
+DEFAULT_POOL_SIZE = 8
+
+def connect(server_url):
+    """
+    Crea un proxy para llamar al servidor.
+
+    Args:
+        server_url (str): URL del servidor. Con el esquema ``bank://`` se usa el
+            protocolo binario; con cualquier otro, XML-RPC.
+
+    Returns:
+        ServerProxy | BinaryProxy: El proxy.
+    """
+    if server_url.startswith(BINARY_SCHEME + "://"):
+        return BinaryProxy(server_url)
+    return xmlrpc.client.ServerProxy(server_url)
+
+def idempotency_params(idempotency_key):
+    """
+    Devuelve el parámetro de la clave de idempotencia para añadir a una llamada RPC.
+
+    ServerProxy no admite None, así que sin clave no se envía nada.
+
+    Args:
+        idempotency_key (str): La clave, o None.
+
+    Returns:
+        tuple: ``(clave,)`` o una tupla vacía.
+    """
+    return (idempotency_key,) if idempotency_key else ()
+
+def format_amount(amount):
+    """
+    Formatea un importe, sin decimales si es entero.
+
+    Args:
+        amount (float): El importe.
+
+    Returns:
+        str: El importe formateado.
+    """
+    return str(int(amount)) if float(amount).is_integer() else str(amount)
+
+def format_transaction(transaction):
+    """
+    Genera la descripción legible de una transacción del historial.
+
+    Args:
+        transaction (dict | str): Transacción devuelta por el servidor. Las
+            descripciones que ya son texto se devuelven tal cual.
+
+    Returns:
+        str: Descripción como "Depósito: 100" o "Transferencia a cuenta_b: 25".
+    """
+    if isinstance(transaction, str):
+        return transaction
+    amount = format_amount(transaction['amount'])
+    kind = transaction['type']
+    if kind == 'deposit':
+        return f"Depósito: {amount}"
+    if kind == 'withdraw':
+        return f"Retiro: {amount}"
+    if kind == 'transfer_out':
+        return f"Transferencia a {transaction['counterparty']}: {amount}"
+    return f"Transferencia de {transaction['counterparty']}: {amount}"
+
+class ConnectionPool:
+    """
+    Pool de conexiones persistentes al servidor bancario.
+
+    Cada conexión es un proxy propio creado con ``connect``. Un ServerProxy
+    reutiliza la misma conexión HTTP/1.1 entre llamadas mientras el servidor la
+    mantenga abierta (AsyncBankServer lo hace; el servidor de hilos responde con
+    HTTP/1.0 y la cierra tras cada respuesta, ver RequestHandler, así que ahí el
+    pool solo permite llamadas en paralelo y cada una vuelve a conectar); un
+    BinaryProxy mantiene siempre su conexión TCP. Las conexiones se crean a demanda hasta
+    ``size``; si todas están en uso, el hilo espera a que se libere alguna.
+
+    Atributos:
+        server_url (str): URL del servidor RPC.
+        size (int): Número máximo de conexiones abiertas.
+    """
+
+    def __init__(self, server_url, size=DEFAULT_POOL_SIZE):
+        """
+        Inicializa el pool sin abrir ninguna conexión.
+
+        Args:
+            server_url (str): URL del servidor RPC.
+            size (int): Número máximo de conexiones abiertas.
+        """
+        if size < 1:
+            raise ValueError("size debe ser al menos 1.")
+        self.server_url = server_url
+        self.size = size
+        self._idle = []  # Pila: se reutiliza primero la conexión usada más recientemente
+        self._created = 0
+        self._available = threading.Condition()
+
+    @contextmanager
+    def connection(self):
+        """
+        Presta una conexión del pool durante el bloque ``with``.
+
+        Yields:
+            ServerProxy: Proxy de uso exclusivo mientras dure el bloque.
+        """
+        with self._available:
+            while not self._idle and self._created >= self.size:
+                self._available.wait()
+            if self._idle:
+                proxy = self._idle.pop()
+            else:
+                # Crear el proxy no conecta: la conexión se abre en la primera llamada.
+                proxy = connect(self.server_url)
+                self._created += 1
+        try:
+            yield proxy
+        finally:
+            with self._available:
+                self._idle.append(proxy)
+                self._available.notify()
+
+    def close(self):
+        """Cierra las conexiones libres del pool."""
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._available.notify_all()
+        for proxy in idle:
+            proxy('close')()
+
+class BankBatch:
+    """
+    Acumula operaciones de un BankClient para enviarlas con execute_batch.
+
+    Se usa como gestor de contexto: al salir del bloque sin errores envía las
+    operaciones pendientes y deja los resultados en ``results``::
+
+        with client.batch() as batch:
+            batch.deposit(100, "empleado_1")
+            batch.transfer("empleado_2", 50)
+        print(batch.results)
+
+    Atributos:
+        client (BankClient): Cliente que envía las operaciones.
+        operations (list): Operaciones pendientes de enviar.
+        results (list): Resultados de las operaciones ya enviadas.
+        max_batch_size (int): Operaciones como máximo por llamada RPC.
+    """
+
+    def __init__(self, client, max_batch_size=MAX_BATCH_SIZE):
+        """
+        Inicializa el lote.
+
+        Args:
+            client (BankClient): Cliente que envía las operaciones.
+            max_batch_size (int): Operaciones como máximo por llamada RPC.
+        """
+        self.client = client
+        self.operations = []
+        self.results = []
+        self.max_batch_size = max_batch_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+        return False
+
+    def get_balance(self, account_id=None):
+        """Añade una consulta de saldo (por defecto de la cuenta actual)."""
+        self.operations.append(['get_balance', account_id or self.client.caller])
+
+    def deposit(self, amount, account_id=None):
+        """Añade un depósito (por defecto en la cuenta actual)."""
+        self.operations.append(['deposit', account_id or self.client.caller, amount])
+
+    def withdraw(self, amount, account_id=None):
+        """Añade un retiro (por defecto de la cuenta actual)."""
+        self.operations.append(['withdraw', account_id or self.client.caller, amount])
+
+    def transfer(self, to_account, amount, from_account=None):
+        """Añade una transferencia (por defecto desde la cuenta actual)."""
+        self.operations.append(['transfer', from_account or self.client.caller, to_account, amount])
+
+    def execute(self):
+        """
+        Envía las operaciones pendientes en llamadas de hasta max_batch_size operaciones.
+
+        Returns:
+            list: Los resultados de las operaciones enviadas, en orden.
+        """
+        results = []
+        while self.operations:
+            chunk = self.operations[:self.max_batch_size]
+            results.extend(self.client.execute_batch(chunk))
+            del self.operations[:len(chunk)]
+        self.results.extend(results)
+        return results
+
 class BankClient:
     """
     Clase que representa un cliente del banco.
 
+    Las operaciones que modifican el estado aceptan una clave de idempotencia
+    opcional, por ejemplo ``uuid.uuid4().hex``. Si una llamada falla sin saber
+    si se aplicó (por ejemplo, por un timeout), repetirla con la misma clave es
+    seguro: el servidor devuelve el resultado de la primera.
+
     Atributos:
-        proxy (ServerProxy): Proxy para comunicarse con el servidor RPC.
+        server_url (str): URL del servidor RPC.
+        pool (ConnectionPool): Conexiones persistentes al servidor RPC; varios hilos
+            pueden usar el cliente a la vez.
         current_account (str): La cuenta actual autenticada.
+        session (str): Token de la sesión abierta con login, o None.
         notification_thread (threading.Thread): Hilo para recibir notificaciones.
         stop_notification_thread (bool): Bandera para detener el hilo de notificaciones.
-        lock (threading.Lock): Lock para sincronizar las solicitudes RPC.
+        notification_wait (float): Segundos que el servidor retiene cada espera de notificaciones.
     """
 
-    def __init__(self, server_url):
+    def __init__(self, server_url, notification_wait=NOTIFICATION_WAIT, pool_size=DEFAULT_POOL_SIZE):
         """
         Inicializa los atributos del cliente bancario.
 
         Args:
-            server_url (str): URL del servidor RPC.
+            server_url (str): URL del servidor RPC. Con ``bank://host:puerto`` se usa el
+                protocolo binario en lugar de XML-RPC.
+            notification_wait (float): Segundos que el servidor retiene cada espera de notificaciones.
+            pool_size (int): Conexiones como máximo en el pool.
         """
-        self.proxy = xmlrpc.client.ServerProxy(server_url)
+        self.server_url = server_url
+        self.notification_wait = notification_wait
+        self.pool = ConnectionPool(server_url, pool_size)
         self.current_account = None
+        self.session = None
         self.notification_thread = None
         self.stop_notification_thread = False
-        self.lock = threading.Lock()
 
-    def delete_account(self, account_id):
+    @property
+    def caller(self):
+        """Identificador de la cuenta actual que se envía al servidor: el token de sesión o, sin sesión, el ID."""
+        return self.session or self.current_account
+
+    def delete_account(self, account_id, idempotency_key=None):
         """
         Elimina una cuenta del servidor bancario.
 
+        Si es la cuenta actual se envía el token de sesión, que el servidor
+        exige con ``require_session``.
+
         Args:
             account_id (str): El ID de la cuenta.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
 
         Returns:
             str: Mensaje de éxito o error.
         """
-        with self.lock:
-            return self.proxy.delete_account(account_id)
+        with self.pool.connection() as proxy:
+            if account_id == self.current_account:
+                account_id = self.caller
+            return proxy.delete_account(account_id, *idempotency_params(idempotency_key))
     
-    def create_account(self, account_id, password):
+    def create_account(self, account_id, password, idempotency_key=None):
         """
         Crea una nueva cuenta en el servidor bancario.
 
         Args:
             account_id (str): El ID de la cuenta.
             password (str): La contraseña de la cuenta.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
 
         Returns:
             str: Mensaje de éxito o error.
         """
-        with self.lock:
-            return self.proxy.create_account(account_id, password)
+        with self.pool.connection() as proxy:
+            return proxy.create_account(account_id, password, *idempotency_params(idempotency_key))
+
+    def import_accounts(self, accounts, idempotency_key=None):
+        """
+        Crea muchas cuentas en una sola llamada RPC.
+
+        Args:
+            accounts (list): Diccionarios con ``account_id``, ``password`` o
+                ``password_hash`` y, opcionalmente, ``balance``.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
+
+        Returns:
+            dict: ``{"created": int, "errors": [[posición, mensaje], ...]}``.
+        """
+        with self.pool.connection() as proxy:
+            return proxy.import_accounts(accounts, *idempotency_params(idempotency_key))
 
     def authenticate(self, account_id, password):
         """
@@ -65,8 +315,8 @@ class BankClient:
         Returns:
             bool: True si la autenticación es exitosa, False en caso contrario.
         """
-        with self.lock:
-            return self.proxy.authenticate(account_id, password)
+        with self.pool.connection() as proxy:
+            return proxy.authenticate(account_id, password)
 
     def get_balance(self):
         """
@@ -75,58 +325,153 @@ class BankClient:
         Returns:
             float: El saldo de la cuenta.
         """
-        with self.lock:
-            return self.proxy.get_balance(self.current_account)
+        with self.pool.connection() as proxy:
+            return proxy.get_balance(self.caller)
 
-    def deposit(self, amount):
+    def deposit(self, amount, idempotency_key=None):
         """
         Realiza un depósito en la cuenta actual.
 
         Args:
             amount (float): La cantidad a depositar.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
 
         Returns:
             str: Mensaje de éxito o error.
         """
-        with self.lock:
-            return self.proxy.deposit(self.current_account, amount)
+        with self.pool.connection() as proxy:
+            return proxy.deposit(self.caller, amount, *idempotency_params(idempotency_key))
 
-    def withdraw(self, amount):
+    def withdraw(self, amount, idempotency_key=None):
         """
         Realiza un retiro de la cuenta actual.
 
         Args:
             amount (float): La cantidad a retirar.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
 
         Returns:
             str: Mensaje de éxito o error.
         """
-        with self.lock:
-            return self.proxy.withdraw(self.current_account, amount)
+        with self.pool.connection() as proxy:
+            return proxy.withdraw(self.caller, amount, *idempotency_params(idempotency_key))
 
-    def transfer(self, to_account, amount):
+    def transfer(self, to_account, amount, idempotency_key=None):
         """
         Realiza una transferencia desde la cuenta actual a otra cuenta.
 
         Args:
             to_account (str): El ID de la cuenta de destino.
             amount (float): La cantidad a transferir.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
 
         Returns:
             str: Mensaje de éxito o error.
         """
-        with self.lock:
-            return self.proxy.transfer(self.current_account, to_account, amount)
+        with self.pool.connection() as proxy:
+            return proxy.transfer(self.caller, to_account, amount, *idempotency_params(idempotency_key))
 
-    def get_transaction_history(self):
+    def execute_batch(self, operations, idempotency_key=None):
+        """
+        Ejecuta varias operaciones en una sola llamada RPC.
+
+        Args:
+            operations (list): Lista de operaciones ``[método, parámetros...]``.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
+
+        Returns:
+            list: El resultado de cada operación.
+        """
+        with self.pool.connection() as proxy:
+            return proxy.execute_batch(operations, *idempotency_params(idempotency_key))
+
+    def batch(self, max_batch_size=MAX_BATCH_SIZE):
+        """
+        Crea un lote de operaciones que se envía al salir del bloque ``with``.
+
+        Args:
+            max_batch_size (int): Operaciones como máximo por llamada RPC.
+
+        Returns:
+            BankBatch: El lote.
+        """
+        return BankBatch(self, max_batch_size)
+
+    def get_transaction_history(self, cursor=None, limit=None, filters=None):
         """
         Obtiene el historial de transacciones de la cuenta actual.
 
+        Sin argumentos devuelve el historial completo; con cualquiera de ellos,
+        una página ``{"transactions": [...], "next_cursor": ...}``.
+
+        Args:
+            cursor (int): Posición desde la que continuar.
+            limit (int): Transacciones como máximo en la página.
+            filters (dict): Filtros por tipo, importe y fecha (ver BankServer.get_transaction_history).
+
         Returns:
-            list: Lista de transacciones.
+            list | dict: Lista de transacciones o una página.
         """
-        with self.lock:
-            return self.proxy.get_transaction_history(self.current_account)
+        with self.pool.connection() as proxy:
+            if cursor is None and limit is None and filters is None:
+                return proxy.get_transaction_history(self.caller)
+            # ServerProxy no admite None: el servidor trata 0 y {} como sus valores por defecto.
+            return proxy.get_transaction_history(self.caller, cursor or 0, limit or 0, filters or {})
+
+    def iter_transaction_history(self, page_size=DEFAULT_HISTORY_PAGE, filters=None):
+        """
+        Recorre el historial de la cuenta actual página a página.
+
+        Args:
+            page_size (int): Transacciones por página.
+            filters (dict): Filtros por tipo, importe y fecha.
+
+        Yields:
+            dict: Cada transacción, en orden.
+        """
+        cursor = 0
+        while cursor is not None:
+            page = self.get_transaction_history(cursor, page_size, filters or {})
+            if not isinstance(page, dict):
+                # Respuesta sin paginar (la lista completa) o un mensaje de error.
+                yield from page if isinstance(page, list) else ()
+                return
+            yield from page["transactions"]
+            cursor = page["next_cursor"]
+
+    def open_export(self):
+        """
+        Abre una exportación de todos los saldos y transacciones en el instante actual.
+
+        Un servidor que exige sesiones no atiende exportaciones por RPC.
+
+        Returns:
+            dict | str: ``export_id``, ``timestamp``, ``accounts`` y ``transactions``,
+            o un mensaje de error.
+        """
+        with self.pool.connection() as proxy:
+            return proxy.open_export()
+
+    def export_chunk(self, export_id, cursor=None, limit=None):
+        """
+        Obtiene el siguiente bloque de registros de una exportación.
+
+        Args:
+            export_id (str): ID devuelto por open_export.
+            cursor (list): ``next_cursor`` del bloque anterior; None para empezar.
+            limit (int): Registros como máximo en el bloque.
+
+        Returns:
+            dict | str: ``{"records": [...], "next_cursor": list | None}`` o un mensaje de error.
+        """
+        with self.pool.connection() as proxy:
+            # ServerProxy no admite None: el servidor trata [] y 0 como sus valores por defecto.
+            return proxy.export_chunk(export_id, cursor or [], limit or 0)
+
+    def close_export(self, export_id):
+        """Cierra una exportación en el servidor."""
+        with self.pool.connection() as proxy:
+            return proxy.close_export(export_id)
 
     def get_notifications(self):
         """
@@ -135,12 +480,24 @@ class BankClient:
         Returns:
             list: Lista de notificaciones.
         """
-        with self.lock:
-            return self.proxy.get_notifications(self.current_account)
+        with self.pool.connection() as proxy:
+            return proxy.get_notifications(self.caller)
+
+    def peek_notifications(self):
+        """
+        Consulta las notificaciones pendientes de la cuenta actual sin consumirlas.
+
+        Returns:
+            list: Lista de notificaciones.
+        """
+        with self.pool.connection() as proxy:
+            return proxy.peek_notifications(self.caller)
 
     def login(self, account_id, password, notifications_enabled=True):
         """
-        Autentica a un usuario y, opcionalmente, inicia el hilo de notificaciones.
+        Abre una sesión en el servidor y, opcionalmente, inicia el hilo de notificaciones.
+
+        Las operaciones posteriores se identifican con el token de la sesión.
 
         Args:
             account_id (str): El ID de la cuenta.
@@ -150,8 +507,11 @@ class BankClient:
         Returns:
             bool: True si la autenticación es exitosa, False en caso contrario.
         """
-        if self.authenticate(account_id, password):
+        with self.pool.connection() as proxy:
+            session = proxy.login(account_id, password)
+        if session:
             self.current_account = account_id
+            self.session = session
             print("Ingreso exitoso.")
             if notifications_enabled:
                 self.stop_notification_thread = False
@@ -165,22 +525,47 @@ class BankClient:
     def logout(self):
         """Cierra la sesión del usuario actual y detiene el hilo de notificaciones."""
         self.stop_notifications()
+        if self.session:
+            with self.pool.connection() as proxy:
+                proxy.logout(self.session)
         self.current_account = None
+        self.session = None
         print("Sesión cerrada.")
 
+    def close(self):
+        """Cierra las conexiones del pool."""
+        self.pool.close()
+
     def stop_notifications(self):
         """Detiene el hilo de notificaciones."""
         self.stop_notification_thread = True
         if self.notification_thread:
+            if self.notification_thread.is_alive():
+                with self.pool.connection() as proxy:
+                    proxy.wake_notifications(self.caller)
             self.notification_thread.join()
 
     def listen_for_notifications(self):
-        """Escucha y muestra las notificaciones de la cuenta actual."""
+        """
+        Escucha y muestra las notificaciones de la cuenta actual.
+
+        Usa su propio proxy para no ocupar una conexión del pool durante la
+        espera larga en el servidor. Si el servidor no admite esperas largas y responde
+        al instante, o con un error en lugar de una lista, vuelve a consultar cada
+        NOTIFICATION_POLL_INTERVAL segundos.
+        """
+        proxy = connect(self.server_url)
+        account_id = self.caller
         while not self.stop_notification_thread:
-            notifications = self.get_notifications()
+            started = time.monotonic()
+            notifications = proxy.wait_notifications(account_id, self.notification_wait)
+            if not isinstance(notifications, list):
+                notifications = []
             for notification in notifications:
                 print(f"\nNotificación: {notification}")
-            time.sleep(1)
+            if (not notifications and not self.stop_notification_thread
+                    and time.monotonic() - started < NOTIFICATION_POLL_INTERVAL):
+                time.sleep(NOTIFICATION_POLL_INTERVAL)
 
 def main_menu(client, input_func=input):
     """
@@ -231,11 +616,13 @@ def user_menu(client, input_func=input):
             amount = float(input_func("Ingrese la cantidad a transferir: "))
             print(client.transfer(to_account, amount))
         elif sub_choice == '5':
-            transactions = client.get_transaction_history()
-            if transactions:
+            transactions = client.iter_transaction_history()
+            first = next(transactions, None)
+            if first is not None:
                 print("Historial de transacciones:")
+                print(format_transaction(first))
                 for transaction in transactions:
-                    print(transaction)
+                    print(format_transaction(transaction))
             else:
                 print("No hay transacciones.")
         elif sub_choice == '6':
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+
+DEFAULT_MAX_IDEMPOTENCY_KEYS = 100000
+DEFAULT_IDEMPOTENCY_TTL = 60 * 60
+IDEMPOTENCY_CONFLICT = "Clave de idempotencia ya usada con otros parámetros."
+
+def _fingerprint(request):
+    """Resume los parámetros de una operación para compararlos sin guardarlos."""
+    return hashlib.sha256(repr(request).encode()).digest()
+
+class IdempotencyCache:
+    """
+    Caché acotada de resultados de operaciones con clave de idempotencia.
+
+    Un cliente que no sabe si su operación llegó a aplicarse (por ejemplo,
+    tras un timeout) la repite con la misma clave y recibe el resultado de la
+    primera ejecución en lugar de aplicarla otra vez. Si la repetición llega
+    mientras la primera aún se ejecuta, espera a que termine. Las claves se
+    agrupan por ámbito (normalmente la cuenta que opera), de modo que un
+    cliente no puede leer resultados de otra cuenta adivinando su clave. Junto
+    a cada resultado se guarda una huella de los parámetros de la operación:
+    reutilizar una clave con parámetros distintos devuelve IDEMPOTENCY_CONFLICT
+    en lugar del resultado de otra operación.
+
+    Los resultados caducan ``ttl`` segundos después de guardarse y, si se
+    supera ``max_keys``, se descartan primero los más antiguos. Las
+    operaciones que lanzan una excepción no se guardan. La caché solo vive en
+    memoria: tras reiniciar el servidor una repetición se vuelve a ejecutar.
+
+    Atributos:
+        max_keys (int): Número máximo de resultados guardados.
+        ttl (float): Segundos que se guarda cada resultado.
+    """
+
+    def __init__(self, max_keys=DEFAULT_MAX_IDEMPOTENCY_KEYS, ttl=DEFAULT_IDEMPOTENCY_TTL, clock=time.monotonic):
+        """
+        Inicializa la caché.
+
+        Args:
+            max_keys (int): Número máximo de resultados guardados.
+            ttl (float): Segundos que se guarda cada resultado.
+            clock (callable): Reloj monotónico, reemplazable en las pruebas.
+        """
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._clock = clock
+        # (ámbito, clave) -> (resultado, vencimiento, huella), del más antiguo al más reciente
+        self._results = OrderedDict()
+        self._running = {}  # (ámbito, clave) -> Event que se activa al terminar la ejecución
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._results)
+
+    def run(self, scope, key, function, *args, request=None):
+        """
+        Ejecuta una operación una sola vez por clave.
+
+        Args:
+            scope: Ámbito de la clave, por ejemplo el ID de la cuenta.
+            key (str): Clave de idempotencia elegida por el cliente. Sin clave
+                (None o vacía) la operación se ejecuta siempre.
+            function (callable): La operación.
+            *args: Argumentos de la operación.
+            request: Parámetros de la operación tal como los pidió el cliente,
+                con los que se compara una repetición. Por defecto, ``args``.
+
+        Returns:
+            El resultado de la operación; si la clave ya se usó, el guardado, o
+            IDEMPOTENCY_CONFLICT si se usó con otros parámetros.
+        """
+        if not key:
+            return function(*args)
+        entry_key = (scope, key)
+        fingerprint = _fingerprint(request if request is not None else args)
+        while True:
+            with self._lock:
+                now = self._clock()
+                # El orden de la caché coincide con el de vencimiento: se purgan desde el principio.
+                while self._results and next(iter(self._results.values()))[1] <= now:
+                    self._results.popitem(last=False)
+                stored = self._results.get(entry_key)
+                if stored is not None:
+                    return stored[0] if stored[2] == fingerprint else IDEMPOTENCY_CONFLICT
+                finished = self._running.get(entry_key)
+                if finished is None:
+                    finished = self._running[entry_key] = threading.Event()
+                    break
+            # Otra ejecución con la misma clave está en curso: al terminar se
+            # vuelve a mirar la caché (si falló, esta la reintenta).
+            finished.wait()
+        try:
+            result = function(*args)
+        except BaseException:
+            with self._lock:
+                del self._running[entry_key]
+            finished.set()
+            raise
+        with self._lock:
+            del self._running[entry_key]
+            self._results[entry_key] = (result, self._clock() + self.ttl, fingerprint)
+            while len(self._results) > self.max_keys:
+                self._results.popitem(last=False)
+        finished.set()
+        return result
@@ -0,0 +1,133 @@
+"""
+Importa cuentas en bloque desde un archivo CSV o JSONL.
+
+El archivo se lee en streaming y se envía al servidor en bloques de
+``--chunk-size`` cuentas con ``import_accounts``; mientras el servidor procesa
+un bloque se lee el siguiente. Cada cuenta tiene ``account_id`` y ``password``
+o ``password_hash`` (hash con el formato del servidor) y, opcionalmente,
+``balance``. En CSV son las columnas de la cabecera; en JSONL, las claves de
+cada línea. Los saldos con decimales se envían como texto para que el
+servidor los convierta a céntimos sin pasar por float.
+
+Uso:
+    python bank_import.py cuentas.csv [--server http://localhost:8000/RPC2]
+        [--chunk-size 5000] [--connections 2] [--format csv|jsonl]
+"""
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import json
+import sys
+import time
+
+from bank_client import BankClient
+from bank_money import to_cents
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_CONNECTIONS = 2
+
+def read_accounts(lines, file_format):
+    """
+    Lee las cuentas de un archivo.
+
+    Args:
+        lines (iterable): Líneas del archivo.
+        file_format (str): ``csv`` o ``jsonl``.
+
+    Yields:
+        tuple: (número de línea, diccionario de la cuenta). Las líneas que no se
+        pueden interpretar dan un mensaje de error en lugar del diccionario.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            account = {key: value for key, value in row.items() if key and value not in (None, '')}
+            if 'balance' in account and to_cents(account['balance']) is None:
+                yield reader.line_num, "Saldo inicial inválido."
+                continue
+            yield reader.line_num, account
+    else:
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line, parse_float=str)
+            except ValueError:
+                yield line_number, "JSON inválido."
+
+def import_file(target, lines, file_format='csv', chunk_size=DEFAULT_CHUNK_SIZE,
+                connections=DEFAULT_CONNECTIONS):
+    """
+    Importa las cuentas de un archivo por bloques.
+
+    Args:
+        target: Objeto con ``import_accounts``, como BankClient o BankServer.
+        lines (iterable): Líneas del archivo.
+        file_format (str): ``csv`` o ``jsonl``.
+        chunk_size (int): Cuentas por llamada.
+        connections (int): Bloques enviados a la vez.
+
+    Returns:
+        dict: ``{"created": int, "errors": [[línea, mensaje], ...]}``.
+    """
+    created = 0
+    errors = []
+
+    def collect(pending):
+        nonlocal created
+        future, line_numbers = pending
+        result = future.result()
+        created += result['created']
+        errors.extend([line_numbers[position], message] for position, message in result['errors'])
+
+    with ThreadPoolExecutor(connections) as executor:
+        in_flight = deque()
+        chunk, line_numbers = [], []
+        for line_number, account in read_accounts(lines, file_format):
+            if isinstance(account, str):
+                errors.append([line_number, account])
+                continue
+            chunk.append(account)
+            line_numbers.append(line_number)
+            if len(chunk) == chunk_size:
+                if len(in_flight) == connections:
+                    collect(in_flight.popleft())
+                in_flight.append((executor.submit(target.import_accounts, chunk), line_numbers))
+                chunk, line_numbers = [], []
+        if chunk:
+            in_flight.append((executor.submit(target.import_accounts, chunk), line_numbers))
+        while in_flight:
+            collect(in_flight.popleft())
+    errors.sort()
+    return {'created': created, 'errors': errors}
+
+def main():
+    """Importa el archivo indicado e informa del resultado."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path', help="archivo CSV o JSONL")
+    parser.add_argument('--server', default="http://localhost:8000/RPC2")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--connections', type=int, default=DEFAULT_CONNECTIONS)
+    parser.add_argument('--format', choices=('csv', 'jsonl'),
+                        help="formato del archivo; por defecto según la extensión")
+    args = parser.parse_args()
+
+    file_format = args.format or ('jsonl' if args.path.endswith(('.jsonl', '.json')) else 'csv')
+    client = BankClient(args.server, pool_size=args.connections)
+    started = time.perf_counter()
+    try:
+        with open(args.path, newline='', encoding='utf-8') as accounts_file:
+            result = import_file(client, accounts_file, file_format, args.chunk_size, args.connections)
+    finally:
+        client.close()
+    elapsed = time.perf_counter() - started
+    print(f"{result['created']} cuentas creadas en {elapsed:.2f} s "
+          f"({result['created'] / elapsed:.0f} cuentas/s), {len(result['errors'])} errores.")
+    for line_number, message in result['errors']:
+        print(f"  línea {line_number}: {message}")
+    if result['errors']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
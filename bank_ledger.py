@@ -0,0 +1,224 @@
+from array import array
+from datetime import datetime, timezone
+import heapq
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él las consultas recorren las columnas en Python
+    np = None
+
+SECONDS_PER_DAY = 86400
+
+# Tipos de transacción; el historial y el libro mayor guardan el índice del tipo
+TRANSACTION_TYPES = ('deposit', 'withdraw', 'transfer_out', 'transfer_in')
+DEPOSIT, WITHDRAW, TRANSFER_OUT, TRANSFER_IN = range(len(TRANSACTION_TYPES))
+
+class Ledger:
+    """
+    Libro mayor de todas las cuentas almacenado por columnas.
+
+    Cada movimiento de saldo añade una fila con el índice de la cuenta, el tipo
+    de transacción (índice en TRANSACTION_TYPES), el importe con signo en
+    céntimos (positivo si entra dinero en la cuenta) y la marca de tiempo. Una
+    transferencia añade una fila por cada cuenta. Las consultas agregadas copian
+    las columnas y operan sobre la copia con NumPy si está instalado.
+
+    Las escrituras se serializan con un lock propio y publican el número de
+    filas en ``length`` después de escribir todas las columnas. Las consultas
+    no toman el lock: copian las primeras ``length`` filas, que ya no cambian,
+    así que nunca retrasan a quien escribe.
+
+    Cada creación de cuenta recibe un índice nuevo, así que las filas de una
+    cuenta eliminada no se mezclan con las de otra que reutilice su ID.
+
+    Atributos:
+        accounts (array): Índice de cuenta de cada fila.
+        kinds (array): Tipo de transacción de cada fila.
+        amounts (array): Importe con signo de cada fila, en céntimos.
+        timestamps (array): Marca de tiempo (epoch) de cada fila.
+        account_ids (list): ID de la cuenta de cada índice.
+        active (bytearray): 1 si la cuenta del índice sigue existiendo.
+        index (dict): Índice actual de cada ID de cuenta.
+        length (int): Filas completas, publicadas para las consultas.
+    """
+
+    def __init__(self):
+        """Crea un libro mayor vacío."""
+        self.accounts = array('I')
+        self.kinds = array('B')
+        self.amounts = array('q')
+        self.timestamps = array('d')
+        self.account_ids = []
+        self.active = bytearray()
+        self.index = {}
+        self.length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.length
+
+    def open_account(self, account_id):
+        """
+        Asigna un índice nuevo a una cuenta recién creada.
+
+        Args:
+            account_id (str): El ID de la cuenta.
+        """
+        with self._lock:
+            self.index[account_id] = len(self.account_ids)
+            self.account_ids.append(account_id)
+            self.active.append(1)
+
+    def close_account(self, account_id):
+        """
+        Marca como eliminada una cuenta. Sus filas se conservan.
+
+        Args:
+            account_id (str): El ID de la cuenta.
+        """
+        with self._lock:
+            self.active[self.index.pop(account_id)] = 0
+
+    def append(self, account_id, kind, amount, timestamp):
+        """
+        Añade una fila.
+
+        Args:
+            account_id (str): El ID de la cuenta.
+            kind (int): Tipo de transacción.
+            amount (int): Importe con signo en céntimos.
+            timestamp (float): Marca de tiempo (epoch).
+        """
+        with self._lock:
+            self.accounts.append(self.index[account_id])
+            self.kinds.append(kind)
+            self.amounts.append(amount)
+            self.timestamps.append(timestamp)
+            self.length += 1
+
+    def _snapshot(self):
+        """Copia sin lock las filas publicadas y el estado de las cuentas."""
+        # Cada copia es atómica con el GIL. Las cuentas se copian después de leer
+        # length, de modo que incluyen la de cualquier fila copiada.
+        length = self.length
+        return (self.accounts[:length], self.kinds[:length], self.amounts[:length], self.timestamps[:length],
+                list(self.account_ids), bytes(self.active))
+
+    def total_inflow(self):
+        """
+        Suma el dinero que ha entrado en cada cuenta existente.
+
+        Returns:
+            dict: Total en céntimos de depósitos y transferencias recibidas por ID de cuenta.
+        """
+        accounts, _, amounts, _, account_ids, active = self._snapshot()
+        if np is not None:
+            amount_values = np.frombuffer(amounts, dtype=np.int64)
+            totals = _exact_bincount(np.frombuffer(accounts, dtype=np.uint32),
+                                     np.where(amount_values > 0, amount_values, 0), len(account_ids))
+        else:
+            totals = [0] * len(account_ids)
+            for index, amount in zip(accounts, amounts):
+                if amount > 0:
+                    totals[index] += amount
+        return {account_id: totals[index] for index, account_id in enumerate(account_ids) if active[index]}
+
+    def balances(self):
+        """
+        Calcula el saldo de cada cuenta existente como suma de sus movimientos.
+
+        Returns:
+            dict: Saldo en céntimos por ID de cuenta.
+        """
+        accounts, _, amounts, _, account_ids, active = self._snapshot()
+        totals = self._net(accounts, amounts, len(account_ids))
+        return {account_id: totals[index] for index, account_id in enumerate(account_ids) if active[index]}
+
+    def top_accounts(self, n=10):
+        """
+        Devuelve las n cuentas existentes con mayor saldo.
+
+        Args:
+            n (int): Número de cuentas.
+
+        Returns:
+            list: Pares ``[ID de cuenta, saldo en céntimos]`` de mayor a menor saldo.
+        """
+        accounts, _, amounts, _, account_ids, active = self._snapshot()
+        totals = self._net(accounts, amounts, len(account_ids))
+        if np is not None:
+            net = np.asarray(totals, dtype=np.float64)
+            net[np.frombuffer(active, dtype=np.uint8) == 0] = -np.inf
+            ranked = [index for index in np.argsort(-net, kind='stable')[:max(n, 0)].tolist()
+                      if active[index]]
+        else:
+            ranked = heapq.nlargest(n, (index for index in range(len(account_ids)) if active[index]),
+                                    key=totals.__getitem__)
+        return [[account_ids[index], totals[index]] for index in ranked]
+
+    def daily_volume(self, since=None, until=None):
+        """
+        Suma el volumen movido por día (UTC).
+
+        Cada transferencia cuenta una sola vez, por su lado de salida.
+
+        Args:
+            since (float): Marca de tiempo mínima (inclusive).
+            until (float): Marca de tiempo máxima (inclusive).
+
+        Returns:
+            dict: Volumen en céntimos por día con formato ``AAAA-MM-DD``.
+        """
+        _, kinds, amounts, timestamps, _, _ = self._snapshot()
+        if np is not None:
+            kind_values = np.frombuffer(kinds, dtype=np.uint8)
+            time_values = np.frombuffer(timestamps, dtype=np.float64)
+            mask = kind_values != TRANSFER_IN
+            if since is not None:
+                mask &= time_values >= since
+            if until is not None:
+                mask &= time_values <= until
+            days, positions = np.unique((time_values[mask] // SECONDS_PER_DAY).astype(np.int64),
+                                        return_inverse=True)
+            volumes = _exact_bincount(positions, np.abs(np.frombuffer(amounts, dtype=np.int64)[mask]), len(days))
+            totals = dict(zip(days.tolist(), volumes))
+        else:
+            totals = {}
+            for kind, amount, timestamp in zip(kinds, amounts, timestamps):
+                if (kind == TRANSFER_IN or (since is not None and timestamp < since)
+                        or (until is not None and timestamp > until)):
+                    continue
+                day = int(timestamp // SECONDS_PER_DAY)
+                totals[day] = totals.get(day, 0) + abs(amount)
+        return {datetime.fromtimestamp(day * SECONDS_PER_DAY, timezone.utc).strftime('%Y-%m-%d'): volume
+                for day, volume in sorted(totals.items())}
+
+    @staticmethod
+    def _net(accounts, amounts, account_count):
+        """Suma los importes con signo por índice de cuenta."""
+        if np is not None:
+            return _exact_bincount(np.frombuffer(accounts, dtype=np.uint32),
+                                   np.frombuffer(amounts, dtype=np.int64), account_count)
+        totals = [0] * account_count
+        for index, amount in zip(accounts, amounts):
+            totals[index] += amount
+        return totals
+
+def _exact_bincount(indexes, amounts, length):
+    """
+    Suma importes en céntimos por índice con ``np.bincount``.
+
+    ``np.bincount`` suma los pesos en float64, que representa exactamente
+    cualquier entero de hasta 2**53 céntimos (unos 90 billones de unidades),
+    así que el resultado se devuelve como enteros sin error de redondeo.
+
+    Args:
+        indexes (ndarray): Índice de cada importe.
+        amounts (ndarray): Importes en céntimos (int64).
+        length (int): Número de índices.
+
+    Returns:
+        list: Suma por índice, como enteros de Python.
+    """
+    return np.bincount(indexes, weights=amounts, minlength=length).astype(np.int64).tolist()
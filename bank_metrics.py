@@ -0,0 +1,369 @@
+from bisect import bisect_left
+import threading
+import time
+
+METRICS_PATH = '/metrics'
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    """Escapa el valor de una etiqueta."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=()):
+    """Formatea las etiquetas de una muestra, como ``{method="deposit"}``."""
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value):
+    """Formatea un valor numérico como en el formato de texto de Prometheus."""
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _ThreadShards:
+    """
+    Valores de una métrica repartidos por hilo.
+
+    Cada hilo actualiza solo su propio diccionario, sin locks; al exportar se
+    suman los de todos los hilos. Copiar un diccionario es atómico con el GIL,
+    así que la lectura no interfiere con el hilo que escribe.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def mine(self):
+        """Devuelve el diccionario del hilo actual."""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._shards.append(values)
+            return values
+
+    def snapshots(self):
+        """Devuelve una copia del diccionario de cada hilo."""
+        with self._lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+class Counter:
+    """
+    Contador monótono, opcionalmente con etiquetas.
+
+    Atributos:
+        name (str): Nombre de la métrica.
+        documentation (str): Descripción de la métrica.
+        label_names (tuple): Nombres de las etiquetas.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        """
+        Inicializa el contador.
+
+        Args:
+            name (str): Nombre de la métrica.
+            documentation (str): Descripción de la métrica.
+            label_names (tuple): Nombres de las etiquetas.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = _ThreadShards()
+
+    def inc(self, labels=(), amount=1):
+        """
+        Incrementa el contador.
+
+        Args:
+            labels (tuple): Valores de las etiquetas, en el orden de label_names.
+            amount (float): Cantidad a sumar.
+        """
+        values = self._values.mine()
+        values[labels] = values.get(labels, 0) + amount
+
+    def _totals(self):
+        """Suma los valores de todos los hilos por etiquetas."""
+        totals = {}
+        for shard in self._values.snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def value(self, labels=()):
+        """Devuelve el valor actual para unas etiquetas."""
+        return self._totals().get(labels, 0)
+
+    def samples(self):
+        """Devuelve las muestras ``(sufijo, etiquetas, etiquetas extra, valor)``."""
+        return [("", labels, (), value) for labels, value in sorted(self._totals().items())]
+
+class Gauge(Counter):
+    """
+    Valor que sube y baja, o que se calcula al exportar con una función.
+
+    Atributos:
+        name (str): Nombre de la métrica.
+        documentation (str): Descripción de la métrica.
+        label_names (tuple): Nombres de las etiquetas.
+        function (callable): Si no es None, da el valor (sin etiquetas) al exportar.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, label_names=(), function=None):
+        """
+        Inicializa el indicador.
+
+        Args:
+            name (str): Nombre de la métrica.
+            documentation (str): Descripción de la métrica.
+            label_names (tuple): Nombres de las etiquetas.
+            function (callable): Si se indica, el valor (sin etiquetas) se obtiene llamándola al exportar.
+        """
+        super().__init__(name, documentation, label_names)
+        self.function = function
+
+    def dec(self, labels=(), amount=1):
+        """Decrementa el indicador."""
+        self.inc(labels, -amount)
+
+    def samples(self):
+        if self.function is not None:
+            return [("", (), (), self.function())]
+        return super().samples()
+
+class Histogram:
+    """
+    Histograma de observaciones con cubetas fijas, opcionalmente con etiquetas.
+
+    Cada observación cuesta una búsqueda binaria en las cubetas y dos sumas en
+    los valores del hilo actual, sin locks; las cubetas acumuladas solo se
+    calculan al exportar.
+
+    Atributos:
+        name (str): Nombre de la métrica.
+        documentation (str): Descripción de la métrica.
+        label_names (tuple): Nombres de las etiquetas.
+        buckets (tuple): Límites superiores de las cubetas, en orden creciente.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        Inicializa el histograma.
+
+        Args:
+            name (str): Nombre de la métrica.
+            documentation (str): Descripción de la métrica.
+            label_names (tuple): Nombres de las etiquetas.
+            buckets (tuple): Límites superiores de las cubetas, en orden creciente.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = _ThreadShards()  # etiquetas -> [conteos por cubeta (+Inf al final), suma]
+
+    def observe(self, value, labels=()):
+        """
+        Registra una observación.
+
+        Args:
+            value (float): Valor observado.
+            labels (tuple): Valores de las etiquetas, en el orden de label_names.
+        """
+        shard = self._series.mine()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def _totals(self):
+        """Suma los conteos y sumas de todos los hilos por etiquetas."""
+        totals = {}
+        for shard in self._series.snapshots():
+            for labels, (counts, total) in shard.items():
+                counts = list(counts)
+                merged = totals.get(labels)
+                if merged is None:
+                    totals[labels] = [counts, total]
+                else:
+                    merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                    merged[1] += total
+        return totals
+
+    def count(self, labels=()):
+        """Devuelve el número de observaciones para unas etiquetas."""
+        series = self._totals().get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        """Devuelve las muestras ``(sufijo, etiquetas, etiquetas extra, valor)``."""
+        samples = []
+        for labels, (counts, total) in sorted(self._totals().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append(("_bucket", labels, (("le", _format_value(float(bound))),), cumulative))
+            samples.append(("_sum", labels, (), total))
+            samples.append(("_count", labels, (), cumulative))
+        return samples
+
+class MetricsRegistry:
+    """Conjunto de métricas que se exportan juntas en el formato de texto de Prometheus."""
+
+    def __init__(self):
+        """Crea un registro vacío."""
+        self._metrics = []
+
+    def register(self, metric):
+        """
+        Añade una métrica al registro.
+
+        Args:
+            metric (Counter | Gauge | Histogram): La métrica.
+
+        Returns:
+            La misma métrica.
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Exporta todas las métricas.
+
+        Returns:
+            str: Las métricas en el formato de texto de Prometheus 0.0.4.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, extra, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(metric.label_names, labels, extra)} "
+                             f"{_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+class TimedLock:
+    """
+    Lock que registra cuánto se espera para adquirirlo y cuánto se retiene.
+
+    Se usa igual que ``threading.Lock``, también en sentencias ``with``.
+
+    Atributos:
+        name (str): Valor de la etiqueta ``lock`` de las observaciones.
+    """
+
+    def __init__(self, name, wait_histogram, hold_histogram):
+        """
+        Inicializa el lock.
+
+        Args:
+            name (str): Valor de la etiqueta ``lock`` de las observaciones.
+            wait_histogram (Histogram): Histograma de las esperas, con la etiqueta ``lock``.
+            hold_histogram (Histogram): Histograma de las retenciones, con la etiqueta ``lock``.
+        """
+        self.name = name
+        self._labels = (name,)
+        self._wait = wait_histogram
+        self._hold = hold_histogram
+        self._lock = threading.Lock()
+        self._acquired_at = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        """Adquiere el lock como ``threading.Lock.acquire``."""
+        started = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        if acquired:
+            # Solo quien tiene el lock escribe _acquired_at.
+            self._acquired_at = now = time.perf_counter()
+            self._wait.observe(now - started, self._labels)
+        return acquired
+
+    def release(self):
+        """Libera el lock."""
+        held = time.perf_counter() - self._acquired_at
+        self._lock.release()
+        self._hold.observe(held, self._labels)
+
+    def locked(self):
+        """Indica si el lock está tomado."""
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+class BankMetrics(MetricsRegistry):
+    """
+    Métricas del servidor bancario.
+
+    Atributos:
+        calls (Counter): Llamadas RPC por método y resultado (``ok``, ``error`` o ``rejected``).
+        latency (Histogram): Duración de las llamadas RPC por método, en segundos.
+        in_flight (Gauge): Llamadas RPC en curso.
+        lock_wait (Histogram): Espera para adquirir los locks instrumentados, en segundos.
+        lock_hold (Histogram): Tiempo que se retienen los locks instrumentados, en segundos.
+        notifications_pending (Gauge): Notificaciones en cola en todas las cuentas.
+        notification_queue_max (Gauge): Longitud de la cola de notificaciones más larga.
+        rejected (Counter): Solicitudes rechazadas por los límites de admisión, por motivo
+            (``busy``, ``client_rate`` o ``account_rate``).
+    """
+
+    def __init__(self):
+        """Registra las métricas del servidor bancario."""
+        super().__init__()
+        self.calls = self.register(Counter(
+            'bank_rpc_calls_total', "Llamadas RPC por método y resultado.", ('method', 'status')))
+        self.latency = self.register(Histogram(
+            'bank_rpc_latency_seconds', "Duración de las llamadas RPC.", ('method',)))
+        self.in_flight = self.register(Gauge(
+            'bank_rpc_in_flight', "Llamadas RPC en curso."))
+        self.lock_wait = self.register(Histogram(
+            'bank_lock_wait_seconds', "Espera para adquirir el lock.", ('lock',)))
+        self.lock_hold = self.register(Histogram(
+            'bank_lock_hold_seconds', "Tiempo que se retiene el lock.", ('lock',)))
+        self.notifications_pending = self.register(Gauge(
+            'bank_notifications_pending', "Notificaciones en cola en todas las cuentas."))
+        self.notification_queue_max = self.register(Gauge(
+            'bank_notification_queue_max_depth', "Longitud de la cola de notificaciones más larga."))
+        self.rejected = self.register(Counter(
+            'bank_rejected_requests_total', "Solicitudes rechazadas por los límites de admisión.", ('reason',)))
+
+    def timed_lock(self, name):
+        """
+        Crea un lock cuyas esperas y retenciones se registran con la etiqueta ``name``.
+
+        Args:
+            name (str): Nombre del lock.
+
+        Returns:
+            TimedLock: El lock.
+        """
+        return TimedLock(name, self.lock_wait, self.lock_hold)
+
+    def observe_call(self, method, status, seconds):
+        """
+        Registra una llamada RPC terminada.
+
+        Args:
+            method (str): Nombre del método.
+            status (str): ``ok``, ``error`` o ``rejected``.
+            seconds (float): Duración de la llamada.
+        """
+        self.calls.inc((method, status))
+        self.latency.observe(seconds, (method,))
@@ -0,0 +1,85 @@
+from decimal import Decimal, InvalidOperation
+
+CENTS_PER_UNIT = 100
+MONEY_UNIT = 'cents'
+INVALID_AMOUNT = "Importe inválido."
+BALANCE_LIMIT = "El saldo resultante supera el máximo permitido."
+# Mayor importe en céntimos admitido: cabe en las columnas array('q') y
+# from_cents lo convierte a float sin perder precisión.
+MAX_CENTS = 2 ** 53
+
+def to_cents(amount, exact=True):
+    """
+    Convierte un importe recibido por RPC en un número entero de céntimos.
+
+    Los enteros se convierten directamente. Un float se acepta si es el float
+    más cercano a un importe con dos decimales como mucho (``0.1`` o ``19.99``,
+    pero no ``0.005``), de modo que la conversión es exacta. Los textos y
+    Decimal se interpretan en base diez sin pasar por float. Los importes
+    cuyo valor absoluto supera MAX_CENTS céntimos se rechazan.
+
+    Args:
+        amount (int | float | str | Decimal): Importe en unidades.
+        exact (bool): Con False, un importe con más decimales se redondea al
+            céntimo más cercano en lugar de rechazarse.
+
+    Returns:
+        int | None: El importe en céntimos, o None si no es un importe válido.
+    """
+    cents = _to_cents(amount, exact)
+    if cents is None or abs(cents) > MAX_CENTS:
+        return None
+    return cents
+
+def _to_cents(amount, exact):
+    """Convierte un importe en céntimos sin comprobar su magnitud. Ver to_cents."""
+    if type(amount) is int:
+        return amount * CENTS_PER_UNIT
+    if type(amount) is float:
+        # int() con medio céntimo es bastante más rápido que round(); el
+        # resultado solo se acepta si al dividir vuelve a dar el mismo float.
+        try:
+            cents = int(amount * CENTS_PER_UNIT + (0.5 if amount > 0 else -0.5))
+        except (OverflowError, ValueError):
+            return None
+        if exact and cents / CENTS_PER_UNIT != amount:
+            return None
+        return cents
+    if isinstance(amount, (str, Decimal)):
+        try:
+            value = Decimal(amount) * CENTS_PER_UNIT
+        except InvalidOperation:
+            return None
+        if not value.is_finite():
+            return None
+        cents = value.to_integral_value()
+        if exact and cents != value:
+            return None
+        return int(cents)
+    return None
+
+def from_cents(cents):
+    """
+    Convierte céntimos en el importe que se devuelve por RPC.
+
+    Args:
+        cents (int): Importe en céntimos.
+
+    Returns:
+        int | float: Un entero si no hay céntimos sueltos; si no, el float más
+        cercano, que se representa con sus dos decimales exactos.
+    """
+    units, remainder = divmod(cents, CENTS_PER_UNIT)
+    return cents / CENTS_PER_UNIT if remainder else units
+
+def format_amount(cents):
+    """
+    Formatea un importe en céntimos para los mensajes del servidor.
+
+    Args:
+        cents (int): Importe en céntimos.
+
+    Returns:
+        str: El importe en unidades, sin decimales si no hay céntimos sueltos.
+    """
+    return str(from_cents(cents))
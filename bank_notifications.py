@@ -0,0 +1,218 @@
+import threading
+
+from bank_money import format_amount
+
+DEFAULT_NOTIFICATION_LIMIT = 100
+DROP_OLDEST = 'drop_oldest'
+COALESCE = 'coalesce'
+OVERFLOW_POLICIES = (DROP_OLDEST, COALESCE)
+
+class NotificationQueue:
+    """
+    Cola acotada de notificaciones de una cuenta.
+
+    Guarda como mucho ``limit`` notificaciones. Al llegar una más con la cola
+    llena, la más antigua se descarta (``drop_oldest``) o se acumula en un
+    único resumen ``"N transferencias recibidas por un total de X"`` que se
+    entrega antes que las demás (``coalesce``). Así la memoria de una cuenta
+    que nunca lee sus notificaciones no crece aunque reciba muchas
+    transferencias. Es más ligera que ``queue.Queue``: la condición para
+    esperar solo se crea la primera vez que alguien espera. Además de con
+    wait, se puede esperar sin ocupar un hilo registrando un aviso con
+    add_listener.
+
+    Atributos:
+        limit (int): Notificaciones como máximo, sin contar el resumen.
+        overflow (str): Política al desbordarse: ``drop_oldest`` o ``coalesce``.
+        overflowed (int): Notificaciones descartadas o acumuladas en el resumen.
+    """
+
+    __slots__ = ('limit', 'overflow', 'overflowed', '_items', '_summary_count', '_summary_total',
+                 '_lock', '_changed', '_woken', '_listeners')
+
+    def __init__(self, limit=DEFAULT_NOTIFICATION_LIMIT, overflow=COALESCE):
+        """
+        Crea una cola vacía.
+
+        Args:
+            limit (int): Notificaciones como máximo, sin contar el resumen.
+            overflow (str): Política al desbordarse: ``drop_oldest`` o ``coalesce``.
+        """
+        if limit < 1:
+            raise ValueError("limit debe ser al menos 1.")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de desbordamiento desconocida: {overflow}")
+        self.limit = limit
+        self.overflow = overflow
+        self.overflowed = 0
+        self._items = []  # (texto, importe o None), de la más antigua a la más reciente
+        self._summary_count = 0
+        self._summary_total = 0
+        self._lock = threading.Lock()
+        self._changed = None
+        self._woken = False
+        self._listeners = None
+
+    def __len__(self):
+        """Número de notificaciones que se entregarían, contando el resumen como una."""
+        return len(self._items) + (1 if self._summary_count else 0)
+
+    def put(self, notification, amount=None):
+        """
+        Añade una notificación.
+
+        Args:
+            notification (str): Texto de la notificación.
+            amount (int): Importe en céntimos que se suma al resumen si la notificación se acumula.
+        """
+        with self._lock:
+            self._items.append((notification, amount))
+            if len(self._items) > self.limit:
+                _, oldest_amount = self._items.pop(0)
+                self.overflowed += 1
+                if self.overflow == COALESCE:
+                    self._summary_count += 1
+                    self._summary_total += oldest_amount or 0
+            self._notify()
+
+    def wake(self):
+        """Despierta a quien esté esperando en wait, aunque no haya notificaciones."""
+        with self._lock:
+            self._woken = True
+            self._notify()
+
+    def wait(self, timeout):
+        """
+        Espera a que haya notificaciones o a que se llame a wake.
+
+        Args:
+            timeout (float): Segundos máximos de espera.
+        """
+        with self._lock:
+            if self._items or self._summary_count or self._woken:
+                return
+            if self._changed is None:
+                self._changed = threading.Condition(self._lock)
+            self._changed.wait(timeout)
+
+    def add_listener(self, callback):
+        """
+        Registra un aviso para cuando haya notificaciones o se llame a wake.
+
+        El aviso se llama una sola vez, con el lock de la cola tomado, así que
+        debe ser breve (por ejemplo, ``loop.call_soon_threadsafe``).
+
+        Args:
+            callback (callable): Función sin argumentos.
+
+        Returns:
+            bool: False, sin registrar el aviso, si ya hay algo que entregar.
+        """
+        with self._lock:
+            if self._items or self._summary_count or self._woken:
+                return False
+            if self._listeners is None:
+                self._listeners = []
+            self._listeners.append(callback)
+            return True
+
+    def remove_listener(self, callback):
+        """
+        Retira un aviso registrado con add_listener, si aún no se ha llamado.
+
+        Args:
+            callback (callable): El aviso registrado.
+        """
+        with self._lock:
+            if self._listeners and callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _notify(self):
+        """Despierta a quien espera y llama a los avisos registrados. Quien llama debe tener el lock."""
+        if self._changed is not None:
+            self._changed.notify_all()
+        if self._listeners:
+            listeners, self._listeners = self._listeners, None
+            for callback in listeners:
+                callback()
+
+    def drain(self):
+        """
+        Vacía la cola.
+
+        Returns:
+            list: El resumen, si lo hay, seguido de las notificaciones en orden de llegada.
+        """
+        with self._lock:
+            notifications = self._contents()
+            self._items = []
+            self._summary_count = 0
+            self._summary_total = 0
+            self._woken = False
+            return notifications
+
+    def peek(self):
+        """
+        Copia el contenido de la cola sin vaciarla.
+
+        Returns:
+            list: Lo que devolvería drain en este momento.
+        """
+        with self._lock:
+            return self._contents()
+
+    def discard(self, count):
+        """
+        Descarta las ``count`` primeras notificaciones que entregaría drain.
+
+        Args:
+            count (int): Número de notificaciones, contando el resumen como una.
+        """
+        with self._lock:
+            if count > 0 and self._summary_count:
+                self._summary_count = 0
+                self._summary_total = 0
+                count -= 1
+            del self._items[:max(count, 0)]
+
+    def _contents(self):
+        """El resumen, si lo hay, y las notificaciones. Quien llama debe tener el lock."""
+        notifications = [self._summary_text()] if self._summary_count else []
+        notifications.extend(notification for notification, _ in self._items)
+        return notifications
+
+    def _summary_text(self):
+        """Texto del resumen de las notificaciones acumuladas."""
+        total = format_amount(self._summary_total)
+        if self._summary_count == 1:
+            return f"1 transferencia recibida por un total de {total}"
+        return f"{self._summary_count} transferencias recibidas por un total de {total}"
+
+    def to_state(self):
+        """
+        Devuelve el contenido de la cola serializable como JSON.
+
+        Returns:
+            dict: ``items`` (pares ``[texto, importe]``) y ``summary`` (``[número, total]``),
+            con los importes en céntimos.
+        """
+        with self._lock:
+            return {'items': [list(item) for item in self._items],
+                    'summary': [self._summary_count, self._summary_total]}
+
+    def load_state(self, state):
+        """
+        Carga un contenido guardado con to_state en la cola.
+
+        Acepta también la lista de textos de versiones anteriores. Si el
+        contenido supera el límite, se aplica la política de desbordamiento.
+
+        Args:
+            state (dict | list): Contenido de la cola.
+        """
+        if isinstance(state, list):
+            state = {'items': [[notification, None] for notification in state], 'summary': [0, 0]}
+        with self._lock:
+            self._summary_count, self._summary_total = state['summary']
+        for notification, amount in state['items']:
+            self.put(notification, amount)
@@ -0,0 +1,275 @@
+import json
+import os
+import threading
+
+DEFAULT_SNAPSHOT_INTERVAL = 10000
+SNAPSHOT_PREFIX = "snapshot-"
+SEGMENT_PREFIX = "wal-"
+
+class WriteAheadLog:
+    """
+    Log de escritura anticipada (WAL) con commit en grupo.
+
+    Los registros se añaden a un buffer en memoria y un hilo de escritura los
+    vuelca al disco por lotes, con un único fsync por lote. Quien necesita que
+    sus registros sean durables llama a ``sync``, que espera al lote que los
+    contiene. El log se divide en segmentos ``wal-<secuencia>.log``, donde la
+    secuencia es la del primer registro del segmento.
+
+    Atributos:
+        directory (str): Directorio de los segmentos.
+        fsync (bool): Si cada lote se sincroniza con el disco.
+        last_seq (int): Secuencia del último registro añadido.
+        durable_seq (int): Secuencia del último registro ya escrito en disco.
+    """
+
+    def __init__(self, directory, start_seq=0, fsync=True):
+        """
+        Abre un segmento nuevo a continuación de ``start_seq``.
+
+        Args:
+            directory (str): Directorio de los segmentos.
+            start_seq (int): Secuencia del último registro ya existente.
+            fsync (bool): Si cada lote se sincroniza con el disco.
+        """
+        self.directory = directory
+        self.fsync = fsync
+        self.last_seq = start_seq
+        self.durable_seq = start_seq
+        self._pending = []
+        self._lock = threading.Lock()
+        self._has_pending = threading.Condition(self._lock)
+        self._flushed = threading.Condition(self._lock)
+        self._io_lock = threading.Lock()
+        self._closed = False
+        self._file = self._open_segment(start_seq + 1)
+        self._writer = threading.Thread(target=self._write_loop, name="bank-wal", daemon=True)
+        self._writer.start()
+
+    def _open_segment(self, first_seq):
+        """Abre el segmento cuyo primer registro tendrá la secuencia dada."""
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{first_seq:012d}.log")
+        return open(path, 'ab')
+
+    def append(self, record):
+        """
+        Añade un registro al log sin esperar a que llegue al disco.
+
+        Args:
+            record (list): Registro serializable como JSON.
+
+        Returns:
+            int: La secuencia asignada al registro.
+        """
+        line = json.dumps(record, separators=(',', ':')).encode() + b"\n"
+        with self._lock:
+            self.last_seq += 1
+            self._pending.append(line)
+            self._has_pending.notify()
+            return self.last_seq
+
+    def sync(self, seq=None):
+        """
+        Espera a que los registros hasta ``seq`` estén en disco.
+
+        Args:
+            seq (int): Secuencia a esperar. Por defecto, el último registro añadido.
+        """
+        with self._lock:
+            target = self.last_seq if seq is None else seq
+            while self.durable_seq < target and not self._closed:
+                self._flushed.wait()
+
+    def _write_loop(self):
+        """Vuelca los registros pendientes al disco por lotes."""
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._has_pending.wait()
+                if not self._pending and self._closed:
+                    return
+            self._flush()
+
+    def _flush(self):
+        """Escribe en el segmento actual todos los registros pendientes."""
+        with self._io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                batch_seq = self.last_seq
+            if batch:
+                self._file.write(b"".join(batch))
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+            with self._lock:
+                self.durable_seq = max(self.durable_seq, batch_seq)
+                self._flushed.notify_all()
+
+    def rotate(self):
+        """
+        Vuelca lo pendiente y empieza un segmento nuevo.
+
+        Quien llama debe impedir que se añadan registros mientras tanto.
+
+        Returns:
+            int: Secuencia del último registro del segmento cerrado.
+        """
+        self._flush()
+        with self._io_lock:
+            self._file.close()
+            self._file = self._open_segment(self.last_seq + 1)
+            return self.last_seq
+
+    def close(self):
+        """Vuelca lo pendiente, detiene el hilo de escritura y cierra el segmento."""
+        with self._lock:
+            self._closed = True
+            self._has_pending.notify()
+        self._writer.join()
+        self._flush()
+        self._file.close()
+
+def _seq_from_name(name, prefix):
+    """Extrae la secuencia del nombre de un segmento o snapshot."""
+    return int(name[len(prefix):].split('.', 1)[0])
+
+class BankPersistence:
+    """
+    Persistencia durable del estado de un BankServer.
+
+    Cada mutación se registra en un WriteAheadLog antes de responder al cliente.
+    Cada ``snapshot_interval`` registros se guarda un snapshot compacto del
+    estado y se borran los segmentos que cubre, de modo que la recuperación
+    solo reproduce los registros posteriores al último snapshot.
+
+    Atributos:
+        directory (str): Directorio con los snapshots y segmentos del log.
+        fsync (bool): Si el log se sincroniza con el disco en cada lote.
+        snapshot_interval (int): Registros entre snapshots automáticos (0 los desactiva).
+        wal (WriteAheadLog): Log activo, creado al recuperar el estado.
+    """
+
+    def __init__(self, directory, fsync=True, snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL):
+        """
+        Inicializa la persistencia.
+
+        Args:
+            directory (str): Directorio con los snapshots y segmentos del log.
+            fsync (bool): Si el log se sincroniza con el disco en cada lote.
+            snapshot_interval (int): Registros entre snapshots automáticos (0 los desactiva).
+        """
+        self.directory = directory
+        self.fsync = fsync
+        self.snapshot_interval = snapshot_interval
+        self.wal = None
+        self._snapshot_seq = 0
+        self._snapshot_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _files(self, prefix):
+        """Devuelve los archivos con el prefijo dado ordenados por secuencia."""
+        names = [name for name in os.listdir(self.directory)
+                 if name.startswith(prefix) and not name.endswith('.tmp')]
+        return sorted(names, key=lambda name: _seq_from_name(name, prefix))
+
+    def recover(self, bank_server):
+        """
+        Reconstruye el estado del servidor a partir del disco y abre el log.
+
+        Args:
+            bank_server (BankServer): Servidor vacío sobre el que aplicar el estado.
+        """
+        snapshots = self._files(SNAPSHOT_PREFIX)
+        seq = 0
+        if snapshots:
+            with open(os.path.join(self.directory, snapshots[-1]), encoding='utf-8') as snapshot_file:
+                state = json.load(snapshot_file)
+            bank_server._restore(state)
+            seq = state['seq']
+        self._snapshot_seq = seq
+
+        for name in self._files(SEGMENT_PREFIX):
+            record_seq = _seq_from_name(name, SEGMENT_PREFIX) - 1
+            with open(os.path.join(self.directory, name), 'r+b') as segment:
+                valid_size = 0
+                for line in segment:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError(line)
+                        record = json.loads(line)
+                    except ValueError:
+                        # Registro incompleto al final del log tras una caída: se descarta.
+                        segment.truncate(valid_size)
+                        break
+                    valid_size += len(line)
+                    record_seq += 1
+                    if record_seq > seq:
+                        bank_server._replay(record)
+                        seq = record_seq
+        self.wal = WriteAheadLog(self.directory, start_seq=seq, fsync=self.fsync)
+
+    def append(self, record):
+        """
+        Registra una mutación.
+
+        Args:
+            record (list): Registro serializable como JSON.
+        """
+        self.wal.append(record)
+
+    def sync(self, bank_server):
+        """
+        Espera a que las mutaciones registradas sean durables y, si toca, lanza un snapshot.
+
+        Args:
+            bank_server (BankServer): Servidor al que pertenece el log.
+        """
+        self.wal.sync()
+        if (self.snapshot_interval and self.wal.last_seq - self._snapshot_seq >= self.snapshot_interval
+                and self._snapshot_lock.acquire(blocking=False)):
+            self._snapshot_seq = self.wal.last_seq
+            threading.Thread(target=self._background_snapshot, args=(bank_server,),
+                             name="bank-snapshot", daemon=True).start()
+
+    def _background_snapshot(self, bank_server):
+        """Toma un snapshot desde un hilo auxiliar."""
+        try:
+            self._write_snapshot(bank_server)
+        finally:
+            self._snapshot_lock.release()
+
+    def snapshot(self, bank_server):
+        """
+        Guarda un snapshot del estado actual y borra los segmentos que cubre.
+
+        Args:
+            bank_server (BankServer): Servidor del que tomar el estado.
+        """
+        with self._snapshot_lock:
+            self._write_snapshot(bank_server)
+
+    def _write_snapshot(self, bank_server):
+        """Captura el estado, lo escribe de forma atómica y compacta el log."""
+        with bank_server._frozen():
+            state = bank_server._capture()
+            state['seq'] = seq = self.wal.rotate()
+        path = os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{seq:012d}.json")
+        with open(path + '.tmp', 'w', encoding='utf-8') as snapshot_file:
+            json.dump(state, snapshot_file, separators=(',', ':'))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(path + '.tmp', path)
+        self._snapshot_seq = seq
+
+        for name in self._files(SNAPSHOT_PREFIX):
+            if _seq_from_name(name, SNAPSHOT_PREFIX) < seq:
+                os.remove(os.path.join(self.directory, name))
+        for name in self._files(SEGMENT_PREFIX):
+            if _seq_from_name(name, SEGMENT_PREFIX) <= seq:
+                os.remove(os.path.join(self.directory, name))
+
+    def close(self):
+        """Vuelca el log pendiente y lo cierra."""
+        with self._snapshot_lock:
+            if self.wal is not None:
+                self.wal.close()
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+import threading
+import time
+
+DEFAULT_MAX_RATE_KEYS = 100000
+RATE_LIMITED = "Demasiadas solicitudes: reintente más tarde."
+
+class RateLimiter:
+    """
+    Límite de ritmo por clave con el algoritmo del cubo de fichas (token bucket).
+
+    Cada clave (una cuenta o una dirección de cliente) tiene un cubo con
+    capacidad para ``burst`` fichas que se rellena a ``rate`` fichas por
+    segundo; cada solicitud gasta una ficha y, si el cubo está vacío, se
+    rechaza. Así se admiten ráfagas cortas de hasta ``burst`` solicitudes pero
+    no un ritmo sostenido mayor que ``rate``.
+
+    Solo se guardan los cubos de las ``max_keys`` claves usadas más
+    recientemente: una clave olvidada vuelve a empezar con el cubo lleno, igual
+    que si hubiera estado inactiva el tiempo suficiente para rellenarlo.
+
+    Atributos:
+        rate (float): Fichas que recupera cada clave por segundo.
+        burst (float): Capacidad del cubo de cada clave.
+        max_keys (int): Número máximo de cubos guardados.
+    """
+
+    def __init__(self, rate, burst=None, max_keys=DEFAULT_MAX_RATE_KEYS, clock=time.monotonic):
+        """
+        Inicializa el límite.
+
+        Args:
+            rate (float): Solicitudes por segundo admitidas de forma sostenida por clave.
+            burst (float): Solicitudes seguidas admitidas por clave. Por defecto,
+                las de un segundo (y al menos una).
+            max_keys (int): Número máximo de cubos guardados.
+            clock (callable): Reloj monotónico, reemplazable en las pruebas.
+        """
+        if rate <= 0:
+            raise ValueError("rate debe ser positivo.")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        if self.burst < 1:
+            raise ValueError("burst debe ser al menos 1.")
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = OrderedDict()  # clave -> [fichas, instante], de la menos a la más recientemente usada
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def allow(self, key):
+        """
+        Gasta una ficha de una clave, si le queda alguna.
+
+        Args:
+            key: La clave, por ejemplo el ID de la cuenta o la dirección IP.
+
+        Returns:
+            bool: True si la solicitud se admite; False si supera el límite.
+        """
+        with self._lock:
+            now = self._clock()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
@@ -0,0 +1,321 @@
+import json
+import socket
+import threading
+
+DEFAULT_MAX_PENDING = 100000
+RECV_SIZE = 256 * 1024
+
+def _encode(message):
+    """Serializa un mensaje de replicación como una línea JSON."""
+    return json.dumps(message, separators=(',', ':')).encode() + b"\n"
+
+class _Follower:
+    """Estado de un seguidor conectado a un ReplicationPrimary."""
+
+    __slots__ = ('sock', 'address', 'pending', 'sent_seq', 'acked_seq', 'closed')
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.pending = []  # Registros aún no enviados, del más antiguo al más reciente
+        self.sent_seq = 0
+        self.acked_seq = 0
+        self.closed = False
+
+class ReplicationPrimary:
+    """
+    Envía las mutaciones de un BankServer a sus seguidores por un socket local.
+
+    Cada seguidor que se conecta recibe primero el estado completo del
+    servidor, tomado con _frozen igual que un snapshot, y después los mismos
+    registros que el servidor escribe en su log durable (ver ``BankServer._log``),
+    en el mismo orden. Los registros se acumulan en memoria y un hilo por
+    seguidor los envía por lotes, con una sola escritura en el socket por lote;
+    el envío no espera la confirmación de los lotes anteriores, que el seguidor
+    devuelve aparte con la secuencia que ya aplicó.
+
+    Publicar un registro solo lo añade a la lista de cada seguidor, de modo que
+    las mutaciones no esperan a la red. Si un seguidor acumula más de
+    ``max_pending`` registros sin enviar, se desconecta para que la memoria del
+    primario no crezca; al reconectarse recibe de nuevo el estado completo.
+
+    Atributos:
+        address (tuple): (host, puerto) en el que se aceptan seguidores.
+        max_pending (int): Registros sin enviar que se guardan como mucho por seguidor.
+        last_seq (int): Secuencia del último registro publicado.
+        bank_server (BankServer): Servidor replicado, asignado en start.
+    """
+
+    def __init__(self, host='localhost', port=0, max_pending=DEFAULT_MAX_PENDING):
+        """
+        Abre el socket en el que se aceptan seguidores, sin empezar a aceptarlos.
+
+        Args:
+            host (str): Dirección en la que escuchar.
+            port (int): Puerto en el que escuchar (0 elige uno libre).
+            max_pending (int): Registros sin enviar que se guardan como mucho por seguidor.
+        """
+        self.max_pending = max_pending
+        self.last_seq = 0
+        self.bank_server = None
+        self._followers = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._listener = socket.create_server((host, port))
+        self.address = self._listener.getsockname()[:2]
+
+    def start(self, bank_server):
+        """
+        Empieza a aceptar seguidores del servidor.
+
+        Args:
+            bank_server (BankServer): Servidor que publica sus mutaciones con append.
+        """
+        self.bank_server = bank_server
+        threading.Thread(target=self._accept_loop, name="bank-replication", daemon=True).start()
+
+    def append(self, record):
+        """
+        Publica una mutación a los seguidores sin esperar a que la reciban.
+
+        Se llama con los locks de las cuentas afectadas tomados, igual que
+        ``BankPersistence.append``, así que el orden de los registros es el de
+        las mutaciones.
+
+        Args:
+            record (tuple): Registro ``(operación, parámetros...)``.
+        """
+        with self._lock:
+            self.last_seq += 1
+            if not self._followers:
+                return
+            for follower in list(self._followers):
+                follower.pending.append(record)
+                if len(follower.pending) > self.max_pending:
+                    self._disconnect(follower)
+            self._changed.notify_all()
+
+    def followers(self):
+        """
+        Describe los seguidores conectados.
+
+        Returns:
+            list: Diccionarios con ``address`` (``host:puerto``), ``sent_seq``,
+            ``acked_seq`` y ``lag``, los registros publicados que el seguidor
+            aún no ha confirmado.
+        """
+        with self._lock:
+            return [{'address': f"{follower.address[0]}:{follower.address[1]}",
+                     'sent_seq': follower.sent_seq, 'acked_seq': follower.acked_seq,
+                     'lag': self.last_seq - follower.acked_seq}
+                    for follower in self._followers]
+
+    def close(self):
+        """Deja de aceptar seguidores y desconecta los que haya."""
+        try:
+            # En Linux cerrar el socket no despierta al hilo bloqueado en accept.
+            self._listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._listener.close()
+        with self._lock:
+            for follower in list(self._followers):
+                self._disconnect(follower)
+
+    def _accept_loop(self):
+        """Acepta seguidores hasta que se cierra el socket."""
+        while True:
+            try:
+                sock, address = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve_follower, args=(sock, address),
+                             name="bank-replication-send", daemon=True).start()
+
+    def _serve_follower(self, sock, address):
+        """Envía a un seguidor el estado completo y, después, los registros por lotes."""
+        follower = _Follower(sock, address)
+        with self.bank_server._frozen():
+            state = self.bank_server._capture()
+            with self._lock:
+                state['seq'] = follower.sent_seq = follower.acked_seq = self.last_seq
+                self._followers.append(follower)
+        threading.Thread(target=self._read_acks, args=(follower,),
+                         name="bank-replication-ack", daemon=True).start()
+        try:
+            sock.sendall(_encode(state))
+            del state  # No se retiene la copia del estado mientras se sigue enviando
+            while True:
+                with self._lock:
+                    while not follower.pending and not follower.closed:
+                        self._changed.wait()
+                    if follower.closed:
+                        return
+                    batch, follower.pending = follower.pending, []
+                    follower.sent_seq += len(batch)
+                sock.sendall(b"".join(map(_encode, batch)))
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._disconnect(follower)
+            sock.close()
+
+    def _read_acks(self, follower):
+        """Lee las secuencias que confirma un seguidor hasta que se desconecta."""
+        try:
+            with follower.sock.makefile('rb') as acks:
+                for line in acks:
+                    follower.acked_seq = int(line)
+        except (OSError, ValueError):
+            pass
+        with self._lock:
+            self._disconnect(follower)
+
+    def _disconnect(self, follower):
+        """Quita un seguidor y corta su conexión. Quien llama debe tener el lock."""
+        if follower.closed:
+            return
+        follower.closed = True
+        follower.pending = []
+        self._followers.remove(follower)
+        self._changed.notify_all()
+        try:
+            follower.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+class ReplicationFollower:
+    """
+    Mantiene un BankServer como réplica de solo lectura de un primario.
+
+    El servidor réplica debe estar vacío y sin persistencia: recibe el estado
+    del primario al conectarse y después aplica con ``BankServer._replay`` cada
+    lote de registros que llega, con una sola adquisición del lock global por
+    lote, y confirma al primario la secuencia aplicada. Mientras sigue al
+    primario, el servidor rechaza las llamadas RPC que modifican el estado (ver
+    ``BankServer.read_only``) y atiende las consultas sin locks, así que se
+    pueden añadir réplicas para repartir la carga de lectura. Las lecturas
+    pueden ir por detrás del primario; wait_for espera a una secuencia.
+
+    Si se pierde la conexión, la réplica conserva el último estado aplicado y
+    sigue atendiendo lecturas. promote la convierte en un servidor normal para
+    sustituir al primario; las sesiones y las claves de idempotencia del
+    primario no se replican.
+
+    Atributos:
+        bank_server (BankServer): Servidor réplica.
+        address (tuple): (host, puerto) del primario.
+        applied_seq (int): Secuencia del primario aplicada, o None hasta recibir su estado.
+        connected (bool): Si la conexión con el primario sigue abierta.
+    """
+
+    def __init__(self, bank_server, host='localhost', port=0):
+        """
+        Prepara la réplica sin conectarla todavía.
+
+        Args:
+            bank_server (BankServer): Servidor vacío que hará de réplica.
+            host (str): Dirección del primario.
+            port (int): Puerto de replicación del primario.
+        """
+        if bank_server.persistence is not None or bank_server.accounts:
+            raise ValueError("La réplica debe ser un BankServer vacío y sin persistencia.")
+        self.bank_server = bank_server
+        self.address = (host, port)
+        self.applied_seq = None
+        self.connected = False
+        self._sock = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        bank_server.read_only = True
+
+    def start(self, timeout=None):
+        """
+        Se conecta al primario y empieza a aplicar sus mutaciones en un hilo.
+
+        Args:
+            timeout (float): Segundos máximos para establecer la conexión.
+        """
+        self._sock = socket.create_connection(self.address, timeout)
+        self._sock.settimeout(None)
+        self.connected = True
+        self._thread = threading.Thread(target=self._follow, name="bank-replica", daemon=True)
+        self._thread.start()
+
+    def wait_for(self, seq, timeout=None):
+        """
+        Espera a que la réplica haya aplicado los registros hasta ``seq``.
+
+        Args:
+            seq (int): Secuencia del primario (``ReplicationPrimary.last_seq``).
+            timeout (float): Segundos máximos de espera.
+
+        Returns:
+            bool: True si la réplica llegó a la secuencia; False si se agotó el
+            tiempo o se perdió la conexión antes.
+        """
+        with self._lock:
+            self._changed.wait_for(lambda: (self.applied_seq or 0) >= seq or not self.connected, timeout)
+            return (self.applied_seq or 0) >= seq
+
+    def promote(self):
+        """Deja de seguir al primario y acepta escrituras, para sustituirlo."""
+        self.close()
+        self.bank_server.read_only = False
+
+    def close(self):
+        """Cierra la conexión con el primario y espera a que termine el hilo de la réplica."""
+        if self._sock is None:
+            return
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._thread.join()
+        self._sock.close()
+
+    def _follow(self):
+        """Recibe las mutaciones del primario y las aplica por lotes."""
+        buffer = bytearray()
+        try:
+            while True:
+                data = self._sock.recv(RECV_SIZE)
+                if not data:
+                    break
+                buffer += data
+                # Solo se busca el salto de línea en lo recibido, para no recorrer
+                # varias veces un estado inicial grande.
+                newline = data.rfind(b"\n")
+                if newline < 0:
+                    continue
+                end = len(buffer) - len(data) + newline
+                messages = [json.loads(line) for line in buffer[:end].split(b"\n")]
+                del buffer[:end + 1]
+                self._apply(messages)
+                self._sock.sendall(b"%d\n" % self.applied_seq)
+        except (OSError, ValueError):
+            # ValueError: mensaje que no es JSON; se trata como una conexión rota.
+            pass
+        finally:
+            with self._lock:
+                self.connected = False
+                self._changed.notify_all()
+
+    def _apply(self, messages):
+        """Aplica un lote: el estado inicial, si aún no se recibió, y los registros."""
+        bank_server = self.bank_server
+        with bank_server.lock:
+            if self.applied_seq is None:
+                state = messages.pop(0)
+                bank_server._restore(state)
+                seq = state['seq']
+            else:
+                seq = self.applied_seq
+            for record in messages:
+                bank_server._replay(record)
+            seq += len(messages)
+        with self._lock:
+            self.applied_seq = seq
+            self._changed.notify_all()
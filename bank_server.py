@@ -1,83 +1,887 @@
-from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler, resolve_dotted_attribute
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from contextlib import contextmanager
+from array import array
+from collections import OrderedDict
 import threading
 import hashlib
-import queue
+import hmac
+import os
+import secrets
+import time
+
+from bank_idempotency import IdempotencyCache
+from bank_ledger import Ledger, TRANSACTION_TYPES, DEPOSIT, WITHDRAW, TRANSFER_OUT, TRANSFER_IN
+from bank_metrics import BankMetrics, METRICS_CONTENT_TYPE, METRICS_PATH
+from bank_money import BALANCE_LIMIT, INVALID_AMOUNT, MAX_CENTS, MONEY_UNIT, format_amount, from_cents, to_cents
+from bank_notifications import COALESCE, DEFAULT_NOTIFICATION_LIMIT, NotificationQueue
+from bank_persistence import BankPersistence
+from bank_ratelimit import RATE_LIMITED, RateLimiter
+from bank_replication import ReplicationFollower, ReplicationPrimary
+from bank_sessions import SessionCache
+
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_REQUEST_QUEUE_SIZE = 128
+MAX_NOTIFICATION_WAIT = 60
+DEFAULT_HISTORY_PAGE = 50
+MAX_HISTORY_PAGE = 500
+DEFAULT_KDF_ITERATIONS = 100000
+KDF_NAME = 'pbkdf2_sha256'
+SALT_BYTES = 16
+KDF_DIGEST_BYTES = hashlib.sha256().digest_size
+# Un hash importado puede tener como mucho este múltiplo de las iteraciones del
+# servidor (o de DEFAULT_KDF_ITERATIONS, si son más): verificarlo cuesta lo mismo.
+MAX_IMPORT_KDF_FACTOR = 10
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+INVALID_SESSION = "Sesión inválida o expirada."
+INVALID_WAIT = "Tiempo de espera inválido."
+INVALID_PAGE = "Cursor, límite o filtros inválidos."
+IMPORT_CHUNK_SIZE = 5000
+DEFAULT_EXPORT_CHUNK = 1000
+MAX_EXPORT_CHUNK = 10000
+MAX_OPEN_EXPORTS = 4
+UNKNOWN_EXPORT = "Exportación inexistente o cerrada."
+READ_ONLY = "Servidor de solo lectura: las escrituras se envían al primario."
+ADMIN_ONLY = "Operación no disponible por RPC cuando se exigen sesiones."
+
+# Métodos RPC que modifican el estado y que una réplica de solo lectura rechaza
+MUTATING_METHODS = frozenset({
+    'create_account', 'delete_account', 'import_accounts', 'deposit', 'withdraw', 'transfer',
+    'execute_batch', 'get_notifications', 'wait_notifications',
+})
+
+# Métodos RPC que leen los datos de todas las cuentas. Con require_session no se
+# atienden por RPC, porque ninguna sesión de cuenta autoriza a verlos; siguen
+# disponibles para quien use el servidor en el mismo proceso.
+ADMIN_METHODS = frozenset({
+    'total_inflow', 'daily_volume', 'top_accounts', 'open_export', 'export_chunk', 'close_export',
+})
+
+# Métodos RPC cuyo primer parámetro es la cuenta (ID o token de sesión), a la que
+# se aplica el límite de ritmo por cuenta. wait_notifications y wake_notifications
+# quedan fuera: las esperas largas ya están acotadas por long_polls, y el
+# resultado de wait_notifications debe ser siempre una lista.
+ACCOUNT_METHODS = frozenset({
+    'create_account', 'delete_account', 'authenticate', 'login', 'get_balance', 'deposit', 'withdraw',
+    'transfer', 'get_transaction_history', 'get_notifications', 'peek_notifications',
+})
+
+# Segundos que se espera a leer una solicitud rechazada antes de cerrar la conexión
+REJECT_TIMEOUT = 1
+MAX_REJECTED_BODY = 64 * 1024
+
+# Operaciones admitidas en execute_batch: (número de parámetros, cuántos son IDs de cuenta)
+BATCH_OPERATIONS = {
+    'get_balance': (1, 1),
+    'deposit': (2, 1),
+    'withdraw': (2, 1),
+    'transfer': (3, 2),
+}
+
+# Franjas de locks que protegen las cuentas que todavía no tienen lock propio (ver _absent_lock).
+ABSENT_LOCK_STRIPES = 64
 
 class RequestHandler(SimpleXMLRPCRequestHandler):
-    """Clase para manejar solicitudes RPC."""
+    """
+    Clase para manejar solicitudes RPC y exportar las métricas en ``/metrics``.
+
+    Responde con HTTP/1.0 y cierra la conexión tras cada respuesta: en
+    ThreadPoolXMLRPCServer cada conexión ocupa un hilo del pool mientras está
+    abierta, y la admisión (``max_in_flight``, ``client_limiter``) se decide al
+    aceptar la conexión. Con keep-alive, una conexión inactiva de un pool de
+    clientes retendría un hilo y sus solicitudes siguientes no pasarían por la
+    admisión. Las conexiones persistentes las atiende AsyncBankServer.
+    """
     rpc_paths = ('/RPC2',)
+    protocol_version = "HTTP/1.0"
+
+    def do_GET(self):
+        """Responde a ``GET /metrics`` con las métricas del BankServer registrado."""
+        metrics = getattr(self.server.instance, 'metrics', None)
+        if self.path != METRICS_PATH or metrics is None:
+            self.report_404()
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-type", METRICS_CONTENT_TYPE)
+        self.send_header("Content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class RejectedRequestHandler(BaseHTTPRequestHandler):
+    """
+    Responde a una solicitud rechazada sin ejecutarla.
+
+    Lee la solicitud (así el cierre de la conexión no descarta la respuesta) y
+    contesta con el estado indicado y ``Retry-After``. ServerProxy lo recibe
+    como un ``xmlrpc.client.ProtocolError`` con ese código.
+    """
+
+    timeout = REJECT_TIMEOUT
+
+    def __init__(self, request, client_address, server, status):
+        """
+        Atiende la solicitud.
+
+        Args:
+            status (HTTPStatus): ``SERVICE_UNAVAILABLE`` o ``TOO_MANY_REQUESTS``.
+        """
+        self.status = status
+        super().__init__(request, client_address, server)
+
+    def do_POST(self):
+        """Descarta el cuerpo de la solicitud y responde con el estado de rechazo."""
+        length = int(self.headers.get('content-length') or 0)
+        if 0 < length <= MAX_REJECTED_BODY:
+            self.rfile.read(length)
+        self.send_response(self.status)
+        self.send_header("Retry-After", "1")
+        self.send_header("Content-length", "0")
+        self.end_headers()
+        self.close_connection = True
+
+    do_GET = do_POST
+
+    def log_request(self, code='-', size='-'):
+        """Registra la solicitud solo si el servidor registra las solicitudes."""
+        if self.server.logRequests:
+            super().log_request(code, size)
+
+class ThreadPoolXMLRPCServer(SimpleXMLRPCServer):
+    """
+    Servidor XML-RPC que atiende las solicitudes con un pool acotado de hilos.
+
+    Por defecto, cuando todos los hilos del pool están ocupados, el hilo que
+    acepta conexiones se bloquea y las conexiones nuevas esperan en el backlog
+    del socket, cuyo tamaño se controla con ``request_queue_size``.
+
+    Con ``max_in_flight`` se admiten como mucho esas solicitudes a la vez (las
+    que no caben en el pool esperan su turno en él) y las demás se rechazan en
+    el acto con ``503 Service Unavailable``, en lugar de acumularse en el
+    backlog. Con ``client_limiter`` las solicitudes de una dirección que supera
+    su límite de ritmo se rechazan con ``429 Too Many Requests``. Los rechazos
+    los contesta un hilo aparte; si también él está desbordado, la conexión se
+    cierra sin respuesta.
+
+    Atributos:
+        max_workers (int): Número máximo de solicitudes atendidas a la vez.
+        max_in_flight (int): Solicitudes admitidas a la vez, o None para no rechazar ninguna.
+        client_limiter (RateLimiter): Límite de ritmo por dirección IP del cliente, o None.
+        executor (ThreadPoolExecutor): Pool de hilos que procesa las solicitudes.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, addr, max_workers=DEFAULT_MAX_WORKERS,
+                 request_queue_size=DEFAULT_REQUEST_QUEUE_SIZE, max_in_flight=None,
+                 client_limiter=None, **kwargs):
+        """
+        Inicializa el servidor y su pool de hilos.
+
+        Args:
+            addr (tuple): Dirección (host, puerto) en la que escuchar.
+            max_workers (int): Número de hilos del pool.
+            request_queue_size (int): Tamaño del backlog de conexiones pendientes.
+            max_in_flight (int): Solicitudes admitidas a la vez, en ejecución o
+                esperando un hilo. Con None el servidor espera a tener un hilo libre.
+            client_limiter (RateLimiter): Límite de ritmo por dirección IP del cliente.
+            **kwargs: Argumentos adicionales para SimpleXMLRPCServer.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers debe ser al menos 1.")
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight debe ser al menos 1.")
+        self.request_queue_size = request_queue_size
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self.client_limiter = client_limiter
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bank-rpc")
+        self._slots = threading.BoundedSemaphore(max_in_flight or max_workers)
+        self._rejector = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bank-reject")
+        self._rejections = threading.BoundedSemaphore(request_queue_size)
+        super().__init__(addr, **kwargs)
+
+    def process_request(self, request, client_address):
+        """Entrega la solicitud al pool o la rechaza si supera los límites."""
+        if self.client_limiter is not None and not self.client_limiter.allow(client_address[0]):
+            self._reject(request, client_address, HTTPStatus.TOO_MANY_REQUESTS, 'client_rate')
+            return
+        if self.max_in_flight is None:
+            self._slots.acquire()
+        elif not self._slots.acquire(blocking=False):
+            self._reject(request, client_address, HTTPStatus.SERVICE_UNAVAILABLE, 'busy')
+            return
+        try:
+            self.executor.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _reject(self, request, client_address, status, reason):
+        """Rechaza una solicitud sin bloquear al hilo que acepta conexiones."""
+        metrics = getattr(getattr(self, 'instance', None), 'metrics', None)
+        if metrics is not None:
+            metrics.rejected.inc((reason,))
+        if not self._rejections.acquire(blocking=False):
+            self.shutdown_request(request)
+            return
+        try:
+            self._rejector.submit(self._reject_worker, request, client_address, status)
+        except RuntimeError:
+            self._rejections.release()
+            self.shutdown_request(request)
+
+    def _reject_worker(self, request, client_address, status):
+        """Contesta una solicitud rechazada desde el hilo de rechazos."""
+        try:
+            RejectedRequestHandler(request, client_address, self, status)
+        except Exception:
+            pass
+        finally:
+            self.shutdown_request(request)
+            self._rejections.release()
+
+    def _process_request_worker(self, request, client_address):
+        """Procesa una solicitud dentro de un hilo del pool."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        """Cierra el socket y espera a que terminen las solicitudes en curso."""
+        super().server_close()
+        self.executor.shutdown(wait=True)
+        self._rejector.shutdown(wait=True)
+
+class LongPollBudget:
+    """
+    Limita cuántas esperas largas (long-polls) ocupan a la vez un hilo del pool.
+
+    Cada wait_notifications en curso retiene un hilo durante toda la espera;
+    sin límite, unos pocos clientes escuchando notificaciones dejarían sin
+    hilos al resto de las operaciones. Con el cupo agotado la espera se
+    responde al momento con lo que haya pendiente, y el cliente vuelve a
+    consultar pasado un intervalo. El servidor con hilos (create_server)
+    queda así acotado; los de bank_async_server esperan en el bucle de
+    eventos sin ocupar hilos y no consumen el cupo.
+
+    Atributos:
+        limit (int): Esperas largas admitidas a la vez.
+        active (int): Esperas largas en curso.
+    """
+
+    def __init__(self, limit):
+        """
+        Inicializa el cupo.
+
+        Args:
+            limit (int): Esperas largas admitidas a la vez.
+        """
+        self.limit = limit
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Reserva una espera larga, si queda cupo.
+
+        Returns:
+            bool: True si la espera se admite; quien la reserva debe llamar a release al terminar.
+        """
+        with self._lock:
+            if self.active >= self.limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        """Libera una espera larga reservada con acquire."""
+        with self._lock:
+            self.active -= 1
+
+    def clamp(self, max_workers):
+        """
+        Ajusta el cupo a un pool de ``max_workers`` hilos, dejando libre al menos la mitad.
+
+        Args:
+            max_workers (int): Hilos del pool que atiende las esperas.
+        """
+        self.limit = min(self.limit, max_workers // 2)
+
+class TransactionLog:
+    """
+    Historial de transacciones de una cuenta almacenado por columnas.
+
+    Cada transacción ocupa una posición en arrays compactos (tipo, importe en
+    céntimos y marca de tiempo) y una referencia a la cuenta contraparte, en
+    lugar de un texto formateado. La posición de la transacción es su número de
+    secuencia dentro de la cuenta.
+
+    El historial solo crece y ``length`` se actualiza después de escribir todas
+    las columnas, así que un lector que lee la longitud sin ningún lock puede
+    leer después las posiciones anteriores a ella mientras otro hilo añade
+    transacciones: cada operación sobre un array es atómica con el GIL.
+
+    Atributos:
+        kinds (array): Índice en TRANSACTION_TYPES de cada transacción.
+        amounts (array): Importe de cada transacción, en céntimos.
+        counterparties (list): Cuenta contraparte de cada transacción, o None.
+        timestamps (array): Marca de tiempo (epoch) de cada transacción.
+        length (int): Transacciones completas, publicadas para los lectores.
+    """
+
+    __slots__ = ('kinds', 'amounts', 'counterparties', 'timestamps', 'length')
+
+    def __init__(self):
+        """Crea un historial vacío."""
+        self.kinds = array('B')
+        self.amounts = array('q')
+        self.counterparties = []
+        self.timestamps = array('d')
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def append(self, kind, amount, counterparty, timestamp):
+        """
+        Añade una transacción.
+
+        Args:
+            kind (int): Índice del tipo en TRANSACTION_TYPES.
+            amount (int): Importe en céntimos.
+            counterparty (str): Cuenta contraparte, o None.
+            timestamp (float): Marca de tiempo (epoch).
+        """
+        self.kinds.append(kind)
+        self.amounts.append(amount)
+        self.counterparties.append(counterparty)
+        self.timestamps.append(timestamp)
+        self.length += 1
+
+    def record(self, seq):
+        """
+        Devuelve una transacción como diccionario serializable por XML-RPC.
+
+        Args:
+            seq (int): Número de secuencia (posición) de la transacción.
+
+        Returns:
+            dict: Claves ``seq``, ``type``, ``amount``, ``timestamp`` y, en las
+            transferencias, ``counterparty``.
+        """
+        record = {
+            'seq': seq,
+            'type': TRANSACTION_TYPES[self.kinds[seq]],
+            'amount': from_cents(self.amounts[seq]),
+            'timestamp': self.timestamps[seq],
+        }
+        if self.counterparties[seq] is not None:
+            record['counterparty'] = self.counterparties[seq]
+        return record
+
+    def to_state(self):
+        """Devuelve las columnas como listas serializables como JSON."""
+        return {'kinds': self.kinds.tolist(), 'amounts': self.amounts.tolist(),
+                'counterparties': list(self.counterparties), 'timestamps': self.timestamps.tolist()}
+
+    @classmethod
+    def from_state(cls, state):
+        """Reconstruye un historial a partir de to_state."""
+        log = cls()
+        log.kinds.extend(state['kinds'])
+        log.amounts.extend(state['amounts'])
+        log.counterparties.extend(state['counterparties'])
+        log.timestamps.extend(state['timestamps'])
+        log.length = len(log.kinds)
+        return log
+
+class ExportCut:
+    """
+    Vista del banco en un instante, tomada por open_export.
+
+    Solo guarda, por cuenta, su ID, su saldo, una referencia a su historial y
+    la longitud que tenía el historial en ese instante. Como el historial solo
+    crece, las transacciones anteriores a esa longitud se leen después sin
+    locks y sin copiarlas.
+
+    Atributos:
+        account_ids (list): IDs de las cuentas existentes, en orden de creación.
+        balances (list): Saldo de cada cuenta, en céntimos.
+        histories (list): TransactionLog de cada cuenta.
+        lengths (array): Transacciones de cada cuenta incluidas en la vista.
+        timestamp (float): Instante de la vista (epoch).
+    """
+
+    __slots__ = ('account_ids', 'balances', 'histories', 'lengths', 'timestamp')
+
+    def __init__(self, bank_server):
+        """
+        Toma la vista. Quien llama debe usar _frozen.
+
+        Args:
+            bank_server (BankServer): Servidor del que tomar la vista.
+        """
+        self.account_ids = list(bank_server.accounts)
+        self.balances = list(bank_server.accounts.values())
+        self.histories = [bank_server.transaction_history[account_id] for account_id in self.account_ids]
+        self.lengths = array('q', map(len, self.histories))
+        self.timestamp = time.time()
+
+    def valid_cursor(self, cursor):
+        """
+        Comprueba que un cursor recibido por RPC apunta dentro de la vista.
+
+        Args:
+            cursor (list): ``[posición de la cuenta, secuencia]``.
+
+        Returns:
+            bool: True si records puede usarlo.
+        """
+        if not isinstance(cursor, (list, tuple)) or len(cursor) != 2:
+            return False
+        if not all(value is not None and _is_optional_int(value) for value in cursor):
+            return False
+        index, seq = cursor
+        if index == len(self.account_ids):
+            return True
+        return 0 <= index < len(self.account_ids) and -1 <= seq <= self.lengths[index]
+
+    def records(self, cursor, limit):
+        """
+        Devuelve los registros de la vista a partir de un cursor.
+
+        Por cada cuenta hay un registro ``account`` seguido de un registro
+        ``transaction`` por cada transacción de su historial.
+
+        Args:
+            cursor (list): ``[posición de la cuenta, secuencia]``; la secuencia -1
+                indica que falta el registro de la propia cuenta.
+            limit (int): Registros como máximo.
+
+        Returns:
+            tuple: (registros, cursor siguiente o None si no quedan).
+        """
+        index, seq = cursor
+        records = []
+        while index < len(self.account_ids) and len(records) < limit:
+            account_id = self.account_ids[index]
+            if seq < 0:
+                records.append({'record': 'account', 'account_id': account_id,
+                                'balance': from_cents(self.balances[index]), 'transactions': self.lengths[index]})
+                seq = 0
+            history = self.histories[index]
+            end = min(self.lengths[index], seq + limit - len(records))
+            for position in range(seq, end):
+                record = history.record(position)
+                record['record'] = 'transaction'
+                record['account_id'] = account_id
+                records.append(record)
+            seq = end
+            if seq == self.lengths[index]:
+                index, seq = index + 1, -1
+        return records, ([index, seq] if index < len(self.account_ids) else None)
 
 class BankServer:
     """
     Clase que representa un servidor bancario.
 
+    Cada cuenta tiene su propio lock, de modo que las operaciones sobre cuentas
+    distintas se ejecutan en paralelo. Las operaciones que involucran varias
+    cuentas adquieren sus locks en orden de ID para evitar interbloqueos.
+
+    Los saldos e importes se guardan como céntimos enteros, de modo que la
+    aritmética es exacta. Los métodos públicos reciben y devuelven importes en
+    unidades y los convierten con to_cents y from_cents.
+
+    Las mutaciones aceptan una clave de idempotencia opcional. Si se repite la
+    llamada con la misma clave se devuelve el resultado de la primera sin
+    volver a aplicarla; si se repite con otros parámetros se devuelve
+    IDEMPOTENCY_CONFLICT.
+
     Atributos:
-        accounts (dict): Diccionario de cuentas con sus saldos.
+        accounts (dict): Diccionario de cuentas con sus saldos en céntimos.
         credentials (dict): Diccionario de credenciales de las cuentas.
-        transaction_history (dict): Historial de transacciones por cuenta.
-        notifications (dict): Notificaciones en cola por cuenta.
-        lock (threading.Lock): Lock para control de acceso concurrente.
+        transaction_history (dict): Historial de transacciones (TransactionLog) por cuenta.
+        ledger (Ledger): Libro mayor por columnas de todos los movimientos, para consultas agregadas.
+        notifications (dict): Cola de notificaciones (NotificationQueue) por cuenta.
+        account_locks (dict): Lock de cada cuenta. Se conserva aunque la cuenta se elimine.
+        absent_locks (list): Franjas de locks para las cuentas que aún no tienen lock propio.
+        lock (threading.Lock): Lock para operaciones que afectan a todo el servidor.
+        notification_wait_limit (float): Espera máxima de wait_notifications en segundos.
+        long_polls (LongPollBudget): Cupo de wait_notifications que esperan a la vez.
+            Con 0 no se bloquea, lo que conviene si el servidor atiende de una en una.
+        persistence (BankPersistence): Log durable de mutaciones, o None si el estado
+            solo vive en memoria.
+        kdf_iterations (int): Iteraciones de PBKDF2 para las contraseñas nuevas.
+        sessions (SessionCache): Sesiones abiertas con login.
+        metrics (BankMetrics): Métricas de las llamadas RPC, del lock global y de las
+            colas de notificaciones.
+        require_session (bool): Si las operaciones sobre una cuenta exigen un token
+            de sesión en lugar del ID de la cuenta.
+        exports (OrderedDict): Exportaciones abiertas (ExportCut) por ID, de la
+            menos a la más recientemente usada.
+        notification_limit (int): Notificaciones que guarda como mucho cada cuenta.
+        notification_overflow (str): Qué hacer con la cola llena: ``drop_oldest``
+            descarta la más antigua y ``coalesce`` la acumula en un resumen.
+        idempotency (IdempotencyCache): Resultados de las mutaciones hechas con
+            clave de idempotencia, por cuenta.
+        replication (ReplicationPrimary): Envía las mutaciones a las réplicas, o None.
+        read_only (bool): Si se rechazan las llamadas RPC de MUTATING_METHODS, como
+            en una réplica (ver ReplicationFollower).
+        account_limiter (RateLimiter): Límite de ritmo de las llamadas RPC por cuenta, o None.
     """
 
-    def __init__(self):
-        """Inicializa los atributos del servidor bancario."""
+    # Posición del importe en los parámetros de cada operación del log
+    _AMOUNT_PARAMS = {'deposit': 1, 'withdraw': 1, 'transfer': 2}
+
+    def __init__(self, persistence=None, kdf_iterations=DEFAULT_KDF_ITERATIONS, sessions=None,
+                 require_session=False, notification_limit=DEFAULT_NOTIFICATION_LIMIT,
+                 notification_overflow=COALESCE, idempotency=None, replication=None, account_limiter=None):
+        """
+        Inicializa los atributos del servidor bancario.
+
+        Args:
+            persistence (BankPersistence): Si se indica, el estado se recupera del
+                disco y cada mutación se registra antes de responder.
+            kdf_iterations (int): Coste (iteraciones de PBKDF2) del hash de contraseñas.
+            sessions (SessionCache): Caché de sesiones. Por defecto una nueva.
+            require_session (bool): Si las operaciones sobre una cuenta exigen un token de sesión.
+            notification_limit (int): Notificaciones que guarda como mucho cada cuenta.
+            notification_overflow (str): ``drop_oldest`` o ``coalesce``.
+            idempotency (IdempotencyCache): Caché de claves de idempotencia. Por defecto una nueva.
+            replication (ReplicationPrimary): Si se indica, acepta réplicas y les envía
+                cada mutación registrada.
+            account_limiter (RateLimiter): Si se indica, las llamadas RPC de ACCOUNT_METHODS
+                que superan el límite de su cuenta devuelven RATE_LIMITED sin ejecutarse.
+        """
+        self.kdf_iterations = kdf_iterations
+        self.sessions = sessions if sessions is not None else SessionCache()
+        self.idempotency = idempotency if idempotency is not None else IdempotencyCache()
+        self.require_session = require_session
+        self.account_limiter = account_limiter
         self.accounts = {}
         self.credentials = {}
         self.transaction_history = {}
+        self.ledger = Ledger()
         self.notifications = {}
-        self.lock = threading.Lock()
+        self.notification_limit = notification_limit
+        self.notification_overflow = notification_overflow
+        NotificationQueue(notification_limit, notification_overflow)  # Valida la configuración
+        self.account_locks = {}
+        self.absent_locks = [threading.Lock() for _ in range(ABSENT_LOCK_STRIPES)]
+        self.metrics = BankMetrics()
+        self.metrics.notifications_pending.function = lambda: sum(map(len, list(self.notifications.values())))
+        self.metrics.notification_queue_max.function = lambda: max(map(len, list(self.notifications.values())),
+                                                                   default=0)
+        self.lock = self.metrics.timed_lock('global')
+        self.notification_wait_limit = MAX_NOTIFICATION_WAIT
+        self.long_polls = LongPollBudget(DEFAULT_MAX_WORKERS // 2)
+        self.exports = OrderedDict()
+        self.persistence = None
+        self.replication = None
+        self.read_only = False
+        # Los datos de versiones anteriores guardan los importes como floats en unidades.
+        self._legacy_amounts = True
+        if persistence is not None:
+            persistence.recover(self)
+            self.persistence = persistence
+            self._log('money', MONEY_UNIT)
+        self._legacy_amounts = False
+        if replication is not None:
+            self.replication = replication
+            replication.start(self)
+
+    def _dispatch(self, method, params):
+        """
+        Ejecuta un método RPC y registra su duración y resultado en las métricas.
+
+        El despachador XML-RPC lo invoca en lugar de llamar al método directamente;
+        como él, solo admite métodos públicos. En un servidor de solo lectura los
+        métodos de MUTATING_METHODS devuelven READ_ONLY sin ejecutarse, con
+        require_session los de ADMIN_METHODS devuelven ADMIN_ONLY, y con
+        account_limiter las llamadas de ACCOUNT_METHODS que superan el límite de
+        su cuenta devuelven RATE_LIMITED y se registran como ``rejected``.
+
+        Args:
+            method (str): Nombre del método.
+            params (tuple): Parámetros de la llamada.
+
+        Returns:
+            El resultado del método.
+        """
+        try:
+            func = resolve_dotted_attribute(self, method, False)
+        except AttributeError:
+            self.metrics.calls.inc(('unknown', 'error'))
+            raise Exception(f'method "{method}" is not supported')
+        metrics = self.metrics
+        metrics.in_flight.inc()
+        status = 'error'
+        started = time.perf_counter()
+        try:
+            if self.read_only and method in MUTATING_METHODS:
+                return READ_ONLY
+            if self.require_session and method in ADMIN_METHODS:
+                return ADMIN_ONLY
+            if (self.account_limiter is not None and method in ACCOUNT_METHODS and params
+                    and isinstance(params[0], str)
+                    and not self.account_limiter.allow(self.sessions.get(params[0]) or params[0])):
+                status = 'rejected'
+                metrics.rejected.inc(('account_rate',))
+                return RATE_LIMITED
+            result = func(*params)
+            status = 'ok'
+            return result
+        finally:
+            metrics.in_flight.dec()
+            metrics.observe_call(method, status, time.perf_counter() - started)
+
+    def _absent_lock(self, account_id):
+        """
+        Devuelve la franja de lock que protege una cuenta sin lock propio.
+
+        El lock de una cuenta solo se publica con su franja tomada (ver _new_account_lock),
+        así que quien tiene la franja sabe que la cuenta no aparecerá hasta que la suelte.
+
+        Args:
+            account_id (str): El ID de la cuenta.
+        """
+        return self.absent_locks[hash(account_id) % len(self.absent_locks)]
+
+    def _new_account_lock(self, account_id):
+        """
+        Devuelve el lock de una cuenta, creándolo con su franja tomada si no existe.
+
+        Args:
+            account_id (str): El ID de la cuenta.
+        """
+        lock = self.account_locks.get(account_id)
+        if lock is None:
+            with self._absent_lock(account_id):
+                lock = self.account_locks.setdefault(account_id, threading.Lock())
+        return lock
+
+    @contextmanager
+    def _account_lock(self, account_id):
+        """
+        Adquiere el lock de una cuenta.
+
+        Si la cuenta nunca existió adquiere su franja, de modo que no puede crearse mientras
+        dure el bloque; quien llama debe comprobar la existencia de la cuenta dentro del bloque.
+
+        Args:
+            account_id (str): El ID de la cuenta.
+        """
+        while True:
+            lock = self.account_locks.get(account_id) or self._absent_lock(account_id)
+            with lock:
+                # Si el lock se publicó mientras esperábamos la franja, se reintenta con él.
+                if self.account_locks.get(account_id, lock) is lock:
+                    yield
+                    return
+
+    @contextmanager
+    def _locked_accounts(self, *account_ids):
+        """
+        Adquiere los locks de las cuentas indicadas en orden de ID.
 
-    def hash_password(self, password):
+        Las cuentas sin lock no existen: se adquieren después sus franjas, en orden, para que
+        no puedan crearse mientras dure el bloque. Quien llama debe comprobar la existencia
+        de las cuentas una vez dentro del bloque.
+
+        Args:
+            *account_ids (str): Los IDs de las cuentas.
+        """
+        account_ids = sorted(set(account_ids))
+        while True:
+            found = [self.account_locks.get(account_id) for account_id in account_ids]
+            stripes = {self._absent_lock(account_id) for account_id, lock in zip(account_ids, found) if lock is None}
+            locks = [lock for lock in found if lock is not None] + sorted(stripes, key=self.absent_locks.index)
+            for lock in locks:
+                lock.acquire()
+            if all(self.account_locks.get(account_id) is lock for account_id, lock in zip(account_ids, found)):
+                break
+            for lock in reversed(locks):
+                lock.release()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _hash_password(self, password, salt=None, iterations=None):
         """
-        Genera el hash de una contraseña.
+        Genera el hash de una contraseña con PBKDF2-HMAC-SHA256 y sal aleatoria.
 
         Args:
             password (str): La contraseña a hashear.
+            salt (bytes): Sal a usar. Por defecto una aleatoria.
+            iterations (int): Iteraciones. Por defecto kdf_iterations.
+
+        Returns:
+            str: El hash con el formato ``pbkdf2_sha256$iteraciones$sal$hash`` (en hexadecimal).
+        """
+        salt = salt if salt is not None else os.urandom(SALT_BYTES)
+        iterations = iterations or self.kdf_iterations
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+        return f"{KDF_NAME}${iterations}${salt.hex()}${digest.hex()}"
+
+    def _verify_password(self, password, stored_hash):
+        """
+        Comprueba una contraseña contra su hash almacenado, en tiempo constante.
+
+        Acepta también los hashes SHA-256 sin sal de versiones anteriores.
+
+        Args:
+            password (str): La contraseña a comprobar.
+            stored_hash (str): El hash almacenado.
 
         Returns:
-            str: El hash de la contraseña.
+            bool: True si la contraseña es correcta.
         """
-        return hashlib.sha256(password.encode()).hexdigest()
+        if not stored_hash.startswith(KDF_NAME + "$"):
+            return hmac.compare_digest(stored_hash, hashlib.sha256(password.encode()).hexdigest())
+        _, iterations, salt, _ = stored_hash.split("$")
+        return hmac.compare_digest(stored_hash, self._hash_password(password, bytes.fromhex(salt), int(iterations)))
 
-    def create_account(self, account_id, password):
+    def create_account(self, account_id, password, idempotency_key=None):
         """
         Crea una nueva cuenta en el servidor bancario.
 
         Args:
             account_id (str): El ID de la cuenta.
             password (str): La contraseña de la cuenta.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
 
         Returns:
             str: Mensaje de éxito o error.
         """
-        with self.lock:
-            if account_id in self.accounts:
-                return "La cuenta ya existe."
-            self.accounts[account_id] = 0
-            self.credentials[account_id] = self.hash_password(password)
-            self.transaction_history[account_id] = []
-            self.notifications[account_id] = queue.Queue()
+        def create():
+            password_hash = self._hash_password(password)
+            with self.lock, self._new_account_lock(account_id):
+                if account_id in self.accounts:
+                    return "La cuenta ya existe."
+                self._create_account(account_id, password_hash)
+            self._sync()
             return "Cuenta creada exitosamente."
 
-    def delete_account(self, account_id):
+        return self.idempotency.run(account_id, idempotency_key, create, request=('create_account', password))
+
+    def delete_account(self, account_id, idempotency_key=None):
         """
         Elimina una cuenta del servidor bancario.
 
         Args:
-            account_id (str): El ID de la cuenta.
+            account_id (str): El ID de la cuenta o un token de sesión.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
 
         Returns:
             str: Mensaje de éxito o error.
         """
-        with self.lock:
-            if account_id in self.accounts:
-                del self.accounts[account_id]
-                del self.credentials[account_id]
-                del self.transaction_history[account_id]
-                del self.notifications[account_id]
-                return "Cuenta eliminada exitosamente."
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return INVALID_SESSION
+
+        def delete():
+            with self.lock, self._account_lock(account_id):
+                if account_id not in self.accounts:
+                    return "La cuenta no existe."
+                self._delete_account(account_id)
+            self.sessions.discard_account(account_id)
+            self._sync()
+            return "Cuenta eliminada exitosamente."
+
+        return self.idempotency.run(account_id, idempotency_key, delete, request=('delete_account',))
+
+    def import_accounts(self, accounts, idempotency_key=None):
+        """
+        Crea muchas cuentas en una sola llamada.
+
+        Cada cuenta es un diccionario con ``account_id`` y ``password`` o, si
+        las credenciales vienen de otro sistema, ``password_hash`` con el
+        formato ``pbkdf2_sha256$iteraciones$sal$hash`` (ver _hash_password).
+        ``balance`` es un saldo inicial opcional que se registra como depósito;
+        puede ser un texto (``"10.50"``) para no pasar por float. Las
+        contraseñas se hashean en paralelo antes de tomar ningún lock (PBKDF2
+        libera el GIL) y las cuentas se insertan
+        en bloques de IMPORT_CHUNK_SIZE, con una adquisición del lock global
+        por bloque y una sola espera al log durable al final.
+
+        Args:
+            accounts (list): Diccionarios con los datos de cada cuenta.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
+
+        Returns:
+            dict: ``{"created": int, "errors": [[posición, mensaje], ...]}``, con
+            la posición de cada cuenta rechazada dentro de ``accounts``.
+        """
+        return self.idempotency.run(None, idempotency_key, self._import_accounts, accounts)
+
+    def _import_accounts(self, accounts):
+        """Crea muchas cuentas en una sola llamada. Ver import_accounts."""
+        errors = []
+        valid = []
+        seen = set()
+        for position, account in enumerate(accounts):
+            entry = _parse_import(account, max(self.kdf_iterations, DEFAULT_KDF_ITERATIONS) * MAX_IMPORT_KDF_FACTOR)
+            if isinstance(entry, str):
+                errors.append([position, entry])
+            elif entry[0] in seen:
+                errors.append([position, "Cuenta duplicada en la importación."])
             else:
-                return "La cuenta no existe."
+                seen.add(entry[0])
+                valid.append((position,) + entry)
+
+        passwords = [password for _, _, password, _, _ in valid if password is not None]
+        hashes = iter(())
+        if passwords:
+            with ThreadPoolExecutor(min(len(passwords), os.cpu_count() or 1)) as executor:
+                hashes = iter(list(executor.map(self._hash_password, passwords)))
+
+        created = 0
+        timestamp = time.time()
+        for start in range(0, len(valid), IMPORT_CHUNK_SIZE):
+            with self.lock:
+                for position, account_id, password, password_hash, balance in valid[start:start + IMPORT_CHUNK_SIZE]:
+                    if password is not None:
+                        password_hash = next(hashes)
+                    with self._new_account_lock(account_id):
+                        if account_id in self.accounts:
+                            errors.append([position, "La cuenta ya existe."])
+                            continue
+                        self._create_account(account_id, password_hash)
+                        if balance:
+                            self._deposit(account_id, balance, timestamp)
+                    created += 1
+        self._sync()
+        errors.sort()
+        return {'created': created, 'errors': errors}
+
+    def _create_account(self, account_id, password_hash):
+        """Crea una cuenta. Quien llama debe tener el lock de la cuenta."""
+        self._log('create', account_id, password_hash)
+        self._new_account_lock(account_id)
+        self.credentials[account_id] = password_hash
+        self.transaction_history[account_id] = TransactionLog()
+        self.ledger.open_account(account_id)
+        self.notifications[account_id] = NotificationQueue(self.notification_limit, self.notification_overflow)
+        self.accounts[account_id] = 0
+
+    def _delete_account(self, account_id):
+        """Elimina una cuenta. Quien llama debe tener el lock de la cuenta."""
+        self._log('delete', account_id)
+        del self.accounts[account_id]
+        del self.credentials[account_id]
+        del self.transaction_history[account_id]
+        self.ledger.close_account(account_id)
+        del self.notifications[account_id]
 
     
     def authenticate(self, account_id, password):
@@ -91,135 +895,882 @@ class BankServer:
         Returns:
             bool: True si la autenticación es exitosa, False en caso contrario.
         """
-        with self.lock:
-            if account_id not in self.credentials:
-                return False
-            return self.credentials[account_id] == self.hash_password(password)
+        stored_hash = self.credentials.get(account_id)
+        if stored_hash is None:
+            return False
+        return self._verify_password(password, stored_hash)
+
+    def login(self, account_id, password):
+        """
+        Autentica a un usuario y abre una sesión.
+
+        Las operaciones posteriores pueden identificarse con el token en lugar
+        de volver a verificar la contraseña.
+
+        Args:
+            account_id (str): El ID de la cuenta.
+            password (str): La contraseña de la cuenta.
+
+        Returns:
+            str | bool: El token de la sesión, o False si la autenticación falla.
+        """
+        if not self.authenticate(account_id, password):
+            return False
+        return self.sessions.create(account_id)
+
+    def logout(self, token):
+        """
+        Cierra una sesión.
+
+        Args:
+            token (str): El token de la sesión.
+
+        Returns:
+            bool: True si la sesión existía.
+        """
+        return self.sessions.discard(token)
+
+    def check_session(self, token):
+        """
+        Comprueba una sesión sin volver a verificar la contraseña.
+
+        Args:
+            token (str): El token de la sesión.
+
+        Returns:
+            str | bool: El ID de la cuenta de la sesión, o False si no existe o caducó.
+        """
+        return self.sessions.get(token) or False
+
+    def _resolve(self, account):
+        """
+        Obtiene la cuenta a la que se refiere una operación.
+
+        Un token de sesión válido se resuelve a su cuenta con una consulta O(1) y
+        renueva la sesión. Cualquier otro valor se toma como ID de cuenta, salvo
+        con require_session.
+
+        Args:
+            account (str): Token de sesión o ID de cuenta.
+
+        Returns:
+            str: El ID de la cuenta, o None si la operación no está autorizada.
+        """
+        account_id = self.sessions.get(account)
+        if account_id is not None:
+            return account_id
+        return None if self.require_session else account
 
     def get_balance(self, account_id):
         """
         Obtiene el saldo de una cuenta.
 
+        No toma ningún lock: el saldo es un único entero que las escrituras
+        reemplazan de una vez, así que siempre se lee un valor confirmado y la
+        lectura nunca espera a una escritura ni la retrasa.
+
         Args:
-            account_id (str): El ID de la cuenta.
+            account_id (str): El ID de la cuenta o un token de sesión.
 
         Returns:
             str: El saldo de la cuenta o un mensaje de error.
         """
-        with self.lock:
-            if account_id not in self.accounts:
-                return "La cuenta no existe."
-            return self.accounts[account_id]
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return INVALID_SESSION
+        balance = self.accounts.get(account_id)
+        if balance is None:
+            return "La cuenta no existe."
+        return from_cents(balance)
 
-    def deposit(self, account_id, amount):
+    def deposit(self, account_id, amount, idempotency_key=None):
         """
         Realiza un depósito en una cuenta.
 
         Args:
-            account_id (str): El ID de la cuenta.
-            amount (float): La cantidad a depositar.
+            account_id (str): El ID de la cuenta o un token de sesión.
+            amount (int | float | str): La cantidad a depositar, con dos decimales como mucho.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
 
         Returns:
             str: Mensaje de éxito o error.
         """
-        if amount <= 0:
-            return "La cantidad a depositar debe ser positiva."
-        with self.lock:
-            if account_id not in self.accounts:
-                return "La cuenta no existe."
-            self.accounts[account_id] += amount
-            self.transaction_history[account_id].append(f"Depósito: {amount}")
-            return f"Depósito de {amount} en la cuenta {account_id}. Nuevo saldo es {self.accounts[account_id]}."
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return INVALID_SESSION
+        cents = to_cents(amount)
+        if cents is None:
+            return INVALID_AMOUNT
 
-    def withdraw(self, account_id, amount):
+        def apply():
+            with self._account_lock(account_id):
+                result = self._deposit(account_id, cents)
+            self._sync()
+            return result
+
+        return self.idempotency.run(account_id, idempotency_key, apply, request=('deposit', cents))
+
+    def withdraw(self, account_id, amount, idempotency_key=None):
         """
         Realiza un retiro de una cuenta.
 
         Args:
-            account_id (str): El ID de la cuenta.
-            amount (float): La cantidad a retirar.
+            account_id (str): El ID de la cuenta o un token de sesión.
+            amount (int | float | str): La cantidad a retirar, con dos decimales como mucho.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
 
         Returns:
             str: Mensaje de éxito o error.
         """
-        if amount <= 0:
-            return "La cantidad a retirar debe ser positiva."
-        with self.lock:
-            if account_id not in self.accounts:
-                return "La cuenta no existe."
-            if self.accounts[account_id] < amount:
-                return "Fondos insuficientes."
-            self.accounts[account_id] -= amount
-            self.transaction_history[account_id].append(f"Retiro: {amount}")
-            return f"Retiro de {amount} de la cuenta {account_id}. Nuevo saldo es {self.accounts[account_id]}."
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return INVALID_SESSION
+        cents = to_cents(amount)
+        if cents is None:
+            return INVALID_AMOUNT
+
+        def apply():
+            with self._account_lock(account_id):
+                result = self._withdraw(account_id, cents)
+            self._sync()
+            return result
 
-    def transfer(self, from_account, to_account, amount):
+        return self.idempotency.run(account_id, idempotency_key, apply, request=('withdraw', cents))
+
+    def transfer(self, from_account, to_account, amount, idempotency_key=None):
         """
         Realiza una transferencia entre cuentas.
 
         Args:
-            from_account (str): El ID de la cuenta de origen.
+            from_account (str): El ID de la cuenta de origen o un token de sesión.
             to_account (str): El ID de la cuenta de destino.
-            amount (float): La cantidad a transferir.
+            amount (int | float | str): La cantidad a transferir, con dos decimales como mucho.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
 
         Returns:
             str: Mensaje de éxito o error.
         """
+        from_account = self._resolve(from_account)
+        if from_account is None:
+            return INVALID_SESSION
+        cents = to_cents(amount)
+        if cents is None:
+            return INVALID_AMOUNT
+
+        def apply():
+            with self._locked_accounts(from_account, to_account):
+                result = self._transfer(from_account, to_account, cents)
+            self._sync()
+            return result
+
+        return self.idempotency.run(from_account, idempotency_key, apply, request=('transfer', to_account, cents))
+
+    def execute_batch(self, operations, idempotency_key=None):
+        """
+        Ejecuta una lista de operaciones con una sola adquisición de locks.
+
+        Cada operación es una lista ``[método, parámetros...]`` con el mismo orden
+        de parámetros que el método individual, por ejemplo
+        ``["transfer", "cuenta_a", "cuenta_b", 25]``. Se admiten ``deposit``,
+        ``withdraw``, ``transfer`` y ``get_balance``. La primera cuenta de cada
+        operación puede ser un token de sesión. Las operaciones se aplican en
+        orden y una operación fallida no impide las siguientes.
+
+        Args:
+            operations (list): Lista de operaciones.
+            idempotency_key (str): Clave de idempotencia opcional (ver la clase).
+
+        Returns:
+            list: El resultado de cada operación, en el mismo orden.
+        """
+        parsed = []
+        account_ids = set()
+        for operation in operations:
+            method = operation[0] if isinstance(operation, (list, tuple)) and operation else None
+            params = tuple(operation[1:]) if method is not None else ()
+            if not isinstance(method, str) or method not in BATCH_OPERATIONS:
+                parsed.append(f"Operación no soportada: {method}")
+                continue
+            arity, account_count = BATCH_OPERATIONS[method]
+            accounts = params[:account_count]
+            if len(params) != arity or not all(isinstance(account_id, str) for account_id in accounts):
+                parsed.append(f"Parámetros inválidos para {method}.")
+                continue
+            account_id = self._resolve(params[0])
+            if account_id is None:
+                parsed.append(INVALID_SESSION)
+                continue
+            params = (account_id,) + params[1:]
+            if method != 'get_balance':
+                cents = to_cents(params[-1])
+                if cents is None:
+                    parsed.append(INVALID_AMOUNT)
+                    continue
+                params = params[:-1] + (cents,)
+            parsed.append((getattr(self, f"_{method}"), params))
+            account_ids.update(params[:account_count])
+
+        def apply():
+            with self._locked_accounts(*account_ids):
+                results = [entry if isinstance(entry, str) else entry[0](*entry[1]) for entry in parsed]
+            self._sync()
+            return results
+
+        # El ámbito de la clave son las cuentas del lote, ya resueltas desde sus
+        # sesiones, y la repetición se compara con las operaciones ya resueltas.
+        request = [entry if isinstance(entry, str) else (entry[0].__name__, entry[1]) for entry in parsed]
+        return self.idempotency.run(tuple(sorted(account_ids)), idempotency_key, apply, request=request)
+
+    def _get_balance(self, account_id):
+        """Obtiene el saldo de una cuenta. Quien llama debe tener el lock de la cuenta."""
+        if account_id not in self.accounts:
+            return "La cuenta no existe."
+        return from_cents(self.accounts[account_id])
+
+    def _deposit(self, account_id, amount, timestamp=None):
+        """Realiza un depósito de ``amount`` céntimos. Quien llama debe tener el lock de la cuenta."""
+        if amount <= 0:
+            return "La cantidad a depositar debe ser positiva."
+        if account_id not in self.accounts:
+            return "La cuenta no existe."
+        if self.accounts[account_id] + amount > MAX_CENTS:
+            return BALANCE_LIMIT
+        timestamp = timestamp or time.time()
+        self._log('deposit', account_id, amount, timestamp)
+        self.accounts[account_id] += amount
+        self.transaction_history[account_id].append(DEPOSIT, amount, None, timestamp)
+        self.ledger.append(account_id, DEPOSIT, amount, timestamp)
+        return (f"Depósito de {format_amount(amount)} en la cuenta {account_id}. "
+                f"Nuevo saldo es {format_amount(self.accounts[account_id])}.")
+
+    def _withdraw(self, account_id, amount, timestamp=None):
+        """Realiza un retiro de ``amount`` céntimos. Quien llama debe tener el lock de la cuenta."""
+        if amount <= 0:
+            return "La cantidad a retirar debe ser positiva."
+        if account_id not in self.accounts:
+            return "La cuenta no existe."
+        if self.accounts[account_id] < amount:
+            return "Fondos insuficientes."
+        timestamp = timestamp or time.time()
+        self._log('withdraw', account_id, amount, timestamp)
+        self.accounts[account_id] -= amount
+        self.transaction_history[account_id].append(WITHDRAW, amount, None, timestamp)
+        self.ledger.append(account_id, WITHDRAW, -amount, timestamp)
+        return (f"Retiro de {format_amount(amount)} de la cuenta {account_id}. "
+                f"Nuevo saldo es {format_amount(self.accounts[account_id])}.")
+
+    def _transfer(self, from_account, to_account, amount, timestamp=None):
+        """Realiza una transferencia de ``amount`` céntimos. Quien llama debe tener los locks de ambas cuentas."""
         if amount <= 0:
             return "La cantidad a transferir debe ser positiva."
-        with self.lock:
-            if from_account not in self.accounts or to_account not in self.accounts:
-                return "Cuenta de destino no existe."
-            if self.accounts[from_account] < amount:
-                return "Fondos insuficientes."
-            self.accounts[from_account] -= amount
-            self.accounts[to_account] += amount
-            self.transaction_history[from_account].append(f"Transferencia a {to_account}: {amount}")
-            self.transaction_history[to_account].append(f"Transferencia de {from_account}: {amount}")
-            self.notifications[to_account].put(f"Transferencia recibida de {from_account}: {amount}")
-            return (f"Transferencia de {amount} desde la cuenta {from_account} "
-                    f"a la cuenta {to_account}. Nuevos saldos: {from_account}: {self.accounts[from_account]}, {to_account}: {self.accounts[to_account]}.")
-
-    def get_transaction_history(self, account_id):
+        if from_account not in self.accounts or to_account not in self.accounts:
+            return "Cuenta de destino no existe."
+        if self.accounts[from_account] < amount:
+            return "Fondos insuficientes."
+        if self.accounts[to_account] + amount > MAX_CENTS:
+            return BALANCE_LIMIT
+        timestamp = timestamp or time.time()
+        self._log('transfer', from_account, to_account, amount, timestamp)
+        self.accounts[from_account] -= amount
+        self.accounts[to_account] += amount
+        self.transaction_history[from_account].append(TRANSFER_OUT, amount, to_account, timestamp)
+        self.transaction_history[to_account].append(TRANSFER_IN, amount, from_account, timestamp)
+        self.ledger.append(from_account, TRANSFER_OUT, -amount, timestamp)
+        self.ledger.append(to_account, TRANSFER_IN, amount, timestamp)
+        self.notifications[to_account].put(f"Transferencia recibida de {from_account}: {format_amount(amount)}", amount)
+        return (f"Transferencia de {format_amount(amount)} desde la cuenta {from_account} "
+                f"a la cuenta {to_account}. Nuevos saldos: {from_account}: {format_amount(self.accounts[from_account])}, "
+                f"{to_account}: {format_amount(self.accounts[to_account])}.")
+
+    def get_transaction_history(self, account_id, cursor=None, limit=None, filters=None):
         """
         Obtiene el historial de transacciones de una cuenta.
 
+        Cada transacción es un diccionario con ``seq``, ``type`` ('deposit',
+        'withdraw', 'transfer_out' o 'transfer_in'), ``amount``, ``timestamp`` y,
+        en las transferencias, ``counterparty``.
+
+        Sin ``cursor`` ni ``limit`` ni ``filters`` devuelve como lista las
+        DEFAULT_HISTORY_PAGE transacciones más recientes; el resto se recorre
+        por páginas, que se obtienen pasando cualquiera de ellos, de modo que
+        ninguna respuesta crece con la antigüedad de la cuenta. No se toma ningún lock: se
+        lee la longitud publicada del historial (ver TransactionLog) y se
+        devuelven solo las transacciones anteriores a ella.
+
         Args:
-            account_id (str): El ID de la cuenta.
+            account_id (str): El ID de la cuenta o un token de sesión.
+            cursor (int): Posición desde la que continuar (``next_cursor`` de la página anterior).
+            limit (int): Transacciones como máximo en la página (hasta MAX_HISTORY_PAGE).
+            filters (dict): Filtros opcionales: ``types`` (lista de tipos), ``min_amount``,
+                ``max_amount``, ``since`` y ``until`` (marcas de tiempo epoch, inclusivas).
+
+        Returns:
+            list | dict: Lista de las últimas transacciones, una página
+            ``{"transactions": [...], "next_cursor": int | None}`` o un mensaje de error.
+        """
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return INVALID_SESSION
+        history = self.transaction_history.get(account_id)
+        if history is None:
+            return "La cuenta no existe."
+        end = len(history)
+        if cursor is None and limit is None and filters is None:
+            return [history.record(seq) for seq in range(max(0, end - DEFAULT_HISTORY_PAGE), end)]
+
+        if not (_is_optional_int(cursor) and _is_optional_int(limit) and _valid_filters(filters)):
+            return INVALID_PAGE
+        limit = max(1, min(limit or DEFAULT_HISTORY_PAGE, MAX_HISTORY_PAGE))
+        position = max(0, cursor or 0)
+        matches = _history_filter(history, filters or {})
+        if matches is None:
+            return INVALID_AMOUNT
+        transactions = []
+        while position < end and len(transactions) < limit:
+            if matches(position):
+                transactions.append(history.record(position))
+            position += 1
+        return {"transactions": transactions, "next_cursor": position if position < end else None}
+
+    def total_inflow(self):
+        """
+        Suma el dinero que ha entrado en cada cuenta (depósitos y transferencias recibidas).
+
+        Returns:
+            dict: Total por ID de cuenta.
+        """
+        return {account_id: from_cents(total) for account_id, total in self.ledger.total_inflow().items()}
+
+    def daily_volume(self, since=None, until=None):
+        """
+        Suma el volumen movido por día (UTC), contando cada transferencia una vez.
+
+        Args:
+            since (float): Marca de tiempo mínima (inclusive).
+            until (float): Marca de tiempo máxima (inclusive).
+
+        Returns:
+            dict: Volumen por día con formato ``AAAA-MM-DD``.
+        """
+        return {day: from_cents(volume) for day, volume in self.ledger.daily_volume(since, until).items()}
+
+    def top_accounts(self, n=10):
+        """
+        Devuelve las n cuentas con mayor saldo.
+
+        Args:
+            n (int): Número de cuentas.
+
+        Returns:
+            list: Pares ``[ID de cuenta, saldo]`` de mayor a menor saldo.
+        """
+        return [[account_id, from_cents(balance)] for account_id, balance in self.ledger.top_accounts(n)]
+
+    def open_export(self):
+        """
+        Abre una exportación de todos los saldos y transacciones en el instante actual.
+
+        Todas las cuentas se bloquean solo mientras se toma la vista (ExportCut),
+        que ocupa unos pocos punteros por cuenta; las transacciones se leen
+        después por bloques con export_chunk sin bloquear a nadie ni copiarlas.
+        Se mantienen abiertas como mucho MAX_OPEN_EXPORTS exportaciones; al
+        abrir otra se descarta la usada hace más tiempo.
+
+        Returns:
+            dict: ``export_id``, ``timestamp`` de la vista y número de ``accounts``
+            y ``transactions`` que incluye.
+        """
+        export_id = secrets.token_urlsafe(16)
+        with self._frozen():
+            cut = ExportCut(self)
+            self.exports[export_id] = cut
+            while len(self.exports) > MAX_OPEN_EXPORTS:
+                self.exports.popitem(last=False)
+        return {'export_id': export_id, 'timestamp': cut.timestamp,
+                'accounts': len(cut.account_ids), 'transactions': sum(cut.lengths)}
+
+    def export_chunk(self, export_id, cursor=None, limit=None):
+        """
+        Devuelve el siguiente bloque de registros de una exportación.
+
+        Cada registro es un diccionario con ``record`` igual a ``account``
+        (``account_id``, ``balance`` y número de ``transactions``) o a
+        ``transaction`` (``account_id`` y los campos de get_transaction_history).
+        Las transacciones de una cuenta siguen a su registro ``account``.
+
+        Args:
+            export_id (str): ID devuelto por open_export.
+            cursor (list): ``next_cursor`` del bloque anterior; None para empezar.
+            limit (int): Registros como máximo en el bloque (hasta MAX_EXPORT_CHUNK).
 
         Returns:
-            list: Lista de transacciones o un mensaje de error.
+            dict | str: ``{"records": [...], "next_cursor": list | None}``,
+            UNKNOWN_EXPORT si la exportación no está abierta o INVALID_PAGE si
+            el cursor o el límite no son válidos.
         """
-        with self.lock:
-            if account_id not in self.transaction_history:
-                return "La cuenta no existe."
-            return self.transaction_history[account_id]
+        cut = self.exports.get(export_id)
+        if cut is None:
+            return UNKNOWN_EXPORT
+        if not _is_optional_int(limit) or (cursor and not cut.valid_cursor(cursor)):
+            return INVALID_PAGE
+        try:
+            self.exports.move_to_end(export_id)
+        except KeyError:
+            pass
+        limit = max(1, min(limit or DEFAULT_EXPORT_CHUNK, MAX_EXPORT_CHUNK))
+        records, next_cursor = cut.records(cursor or [0, -1], limit)
+        return {'records': records, 'next_cursor': next_cursor}
+
+    def close_export(self, export_id):
+        """
+        Cierra una exportación y libera su vista.
+
+        Args:
+            export_id (str): ID devuelto por open_export.
+
+        Returns:
+            bool: True si la exportación estaba abierta.
+        """
+        return self.exports.pop(export_id, None) is not None
 
     def get_notifications(self, account_id):
         """
         Obtiene las notificaciones de una cuenta.
 
         Args:
-            account_id (str): El ID de la cuenta.
+            account_id (str): El ID de la cuenta o un token de sesión.
 
         Returns:
             list: Lista de notificaciones.
         """
-        if account_id not in self.notifications:
+        return self._drain_notifications(self._resolve(account_id))
+
+    def peek_notifications(self, account_id):
+        """
+        Consulta las notificaciones pendientes de una cuenta sin consumirlas.
+
+        No toma el lock de la cuenta, solo el de su cola durante la copia.
+
+        Args:
+            account_id (str): El ID de la cuenta o un token de sesión.
+
+        Returns:
+            list: Lista de notificaciones, en el orden en que get_notifications las entregaría.
+        """
+        notification_queue = self.notifications.get(self._resolve(account_id))
+        if notification_queue is None:
+            return []
+        return notification_queue.peek()
+
+    def wait_notifications(self, account_id, timeout=MAX_NOTIFICATION_WAIT):
+        """
+        Espera hasta que haya notificaciones para una cuenta y las devuelve (long-poll).
+
+        Retorna en cuanto llega la primera notificación, cuando vence el tiempo
+        de espera o cuando se llama a wake_notifications para la cuenta. Si ya
+        hay tantas esperas en curso como admite long_polls, retorna enseguida
+        con las notificaciones pendientes, sin esperar. AsyncBankServer y
+        BinaryBankServer hacen la espera en el bucle de eventos y llaman a este
+        método con ``timeout`` 0.
+
+        Args:
+            account_id (str): El ID de la cuenta o un token de sesión.
+            timeout (float): Segundos máximos de espera, acotados por notification_wait_limit.
+
+        Returns:
+            list | str: Lista de notificaciones, vacía si no llegó ninguna, o
+            INVALID_WAIT si ``timeout`` no es un número.
+        """
+        wait = self._prepare_wait(account_id, timeout)
+        if wait is None:
+            return INVALID_WAIT
+        account_id, notification_queue, timeout = wait
+        if notification_queue is None:
             return []
-        notifications = []
-        while not self.notifications[account_id].empty():
-            notifications.append(self.notifications[account_id].get())
+        if timeout and self.long_polls.acquire():
+            try:
+                # Se espera sin consumir para que el vaciado ocurra bajo el lock de la cuenta.
+                notification_queue.wait(timeout)
+            finally:
+                self.long_polls.release()
+        return self._drain_notifications(account_id)
+
+    def _prepare_wait(self, account_id, timeout):
+        """
+        Resuelve la cuenta de una espera de wait_notifications y acota su duración.
+
+        Args:
+            account_id (str): El ID de la cuenta o un token de sesión.
+            timeout (float): Segundos de espera pedidos.
+
+        Returns:
+            tuple: El ID de la cuenta, su cola de notificaciones (None si no existe) y los
+            segundos de espera, o None si ``timeout`` no es un número.
+        """
+        if not isinstance(timeout, (int, float)) or isinstance(timeout, bool):
+            return None
+        account_id = self._resolve(account_id)
+        return account_id, self.notifications.get(account_id), max(0, min(timeout, self.notification_wait_limit))
+
+    def wake_notifications(self, account_id):
+        """
+        Despierta a quien esté esperando en wait_notifications para una cuenta.
+
+        Args:
+            account_id (str): El ID de la cuenta o un token de sesión.
+
+        Returns:
+            bool: True si la cuenta existe.
+        """
+        notification_queue = self.notifications.get(self._resolve(account_id))
+        if notification_queue is None:
+            return False
+        notification_queue.wake()
+        return True
+
+    def _drain_notifications(self, account_id):
+        """Vacía sin bloquear la cola de notificaciones de una cuenta y registra cuántas se entregaron."""
+        with self._account_lock(account_id):
+            notification_queue = self.notifications.get(account_id)
+            if notification_queue is None:
+                return []
+            notifications = notification_queue.drain()
+            if notifications:
+                self._log('ack', account_id, len(notifications))
+        if notifications:
+            self._sync()
         return notifications
 
-def run_server():
-    """Inicia el servidor bancario."""
-    server = SimpleXMLRPCServer(('localhost', 8000), requestHandler=RequestHandler, allow_none=True)
-    bank_server = BankServer()
+    def _log(self, *record):
+        """Registra una mutación en el log durable y en las réplicas, si los hay. Se llama con los locks tomados."""
+        if self.persistence is not None:
+            self.persistence.append(record)
+        if self.replication is not None:
+            self.replication.append(record)
+
+    def _sync(self):
+        """Espera a que las mutaciones registradas sean durables. Se llama sin locks tomados."""
+        if self.persistence is not None:
+            self.persistence.sync(self)
+
+    @contextmanager
+    def _frozen(self):
+        """Bloquea todas las cuentas para tomar una vista consistente del estado."""
+        with self.lock, self._locked_accounts(*list(self.account_locks)):
+            yield
+
+    def _capture(self):
+        """
+        Copia el estado del servidor. Quien llama debe usar _frozen.
+
+        Returns:
+            dict: Estado serializable como JSON.
+        """
+        return {
+            'money': MONEY_UNIT,
+            'accounts': dict(self.accounts),
+            'credentials': dict(self.credentials),
+            'transaction_history': {account_id: history.to_state()
+                                    for account_id, history in self.transaction_history.items()},
+            'notifications': {account_id: notification_queue.to_state()
+                              for account_id, notification_queue in self.notifications.items()},
+        }
+
+    def _restore(self, state):
+        """
+        Carga un estado capturado con _capture en un servidor vacío.
+
+        Los estados de versiones anteriores, sin la clave ``money``, guardan los
+        importes en unidades y se convierten a céntimos.
+
+        Args:
+            state (dict): Estado del servidor.
+        """
+        self._legacy_amounts = state.get('money') != MONEY_UNIT
+        if self._legacy_amounts:
+            _convert_legacy_state(state)
+        for account_id, password_hash in state['credentials'].items():
+            self._new_account_lock(account_id)
+            self.credentials[account_id] = password_hash
+            history = TransactionLog.from_state(state['transaction_history'][account_id])
+            self.transaction_history[account_id] = history
+            self.ledger.open_account(account_id)
+            for kind, amount, timestamp in zip(history.kinds, history.amounts, history.timestamps):
+                self.ledger.append(account_id, kind, amount if kind in (DEPOSIT, TRANSFER_IN) else -amount, timestamp)
+            self.notifications[account_id] = NotificationQueue(self.notification_limit, self.notification_overflow)
+            self.notifications[account_id].load_state(state['notifications'][account_id])
+            self.accounts[account_id] = state['accounts'][account_id]
+
+    def _replay(self, record):
+        """
+        Reaplica una mutación registrada en el log durante la recuperación.
+
+        El registro ``money`` marca que los registros siguientes guardan los
+        importes en céntimos; los anteriores se convierten desde unidades.
+
+        Args:
+            record (list): Registro ``[operación, parámetros...]``.
+        """
+        operation, *params = record
+        if operation == 'money':
+            self._legacy_amounts = params[0] != MONEY_UNIT
+            return
+        if self._legacy_amounts and operation in self._AMOUNT_PARAMS:
+            position = self._AMOUNT_PARAMS[operation]
+            params[position] = to_cents(params[position], exact=False)
+        if operation == 'ack':
+            account_id, count = params
+            self.notifications[account_id].discard(count)
+        else:
+            getattr(self, f"_{operation}_account" if operation in ('create', 'delete')
+                    else f"_{operation}")(*params)
+
+def _parse_import(account, max_iterations):
+    """
+    Valida una cuenta de import_accounts.
+
+    Un ``password_hash`` debe tener el formato de BankServer._hash_password,
+    con la sal y el hash en hexadecimal de la longitud esperada y entre 1 y
+    ``max_iterations`` iteraciones, para que verificarlo después no falle ni
+    cueste más de lo previsto.
+
+    Args:
+        account (dict): Datos de la cuenta.
+        max_iterations (int): Iteraciones máximas admitidas en un hash importado.
+
+    Returns:
+        tuple | str: ``(ID, contraseña, hash, saldo inicial en céntimos)``, con
+        la contraseña o el hash a None, o el mensaje de error.
+    """
+    if not isinstance(account, dict):
+        return "Cuenta inválida."
+    account_id = account.get('account_id')
+    if not isinstance(account_id, str) or not account_id:
+        return "ID de cuenta inválido."
+    password = account.get('password')
+    password_hash = account.get('password_hash')
+    if password_hash is not None:
+        parts = password_hash.split("$") if isinstance(password_hash, str) else ()
+        if (len(parts) != 4 or parts[0] != KDF_NAME or not parts[1].isascii() or not parts[1].isdigit()
+                or not 1 <= int(parts[1]) <= max_iterations
+                or not _is_hex(parts[2], SALT_BYTES) or not _is_hex(parts[3], KDF_DIGEST_BYTES)):
+            return "Hash de contraseña inválido."
+        password = None
+    elif not isinstance(password, str):
+        return "Falta la contraseña."
+    balance = to_cents(account.get('balance', 0))
+    if balance is None or balance < 0:
+        return "Saldo inicial inválido."
+    return account_id, password, password_hash, balance
+
+def _is_optional_int(value):
+    """Indica si un parámetro RPC es None o un entero (sin contar los booleanos)."""
+    return value is None or (isinstance(value, int) and not isinstance(value, bool))
+
+def _is_optional_number(value):
+    """Indica si un parámetro RPC es None o un número (sin contar los booleanos)."""
+    return value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+
+def _valid_filters(filters):
+    """
+    Comprueba la forma de los filtros de get_transaction_history.
+
+    ``types`` debe ser una lista de tipos de TRANSACTION_TYPES y ``since`` y
+    ``until`` números; los importes se validan al convertirlos (ver _history_filter).
+
+    Args:
+        filters (dict): Filtros recibidos, o None.
+
+    Returns:
+        bool: True si los filtros son válidos.
+    """
+    if filters is None:
+        return True
+    if not isinstance(filters, dict):
+        return False
+    types = filters.get('types')
+    if types is not None and not (isinstance(types, list) and all(kind in TRANSACTION_TYPES for kind in types)):
+        return False
+    return _is_optional_number(filters.get('since')) and _is_optional_number(filters.get('until'))
+
+def _is_hex(text, size):
+    """Indica si un texto es la representación hexadecimal de ``size`` bytes."""
+    return len(text) == 2 * size and _HEX_DIGITS.issuperset(text)
+
+def _convert_legacy_state(state):
+    """
+    Convierte a céntimos los importes de un estado guardado en unidades.
+
+    Args:
+        state (dict): Estado de _capture de una versión anterior; se modifica.
+    """
+    state['accounts'] = {account_id: to_cents(balance, exact=False)
+                         for account_id, balance in state['accounts'].items()}
+    for history in state['transaction_history'].values():
+        history['amounts'] = [to_cents(amount, exact=False) for amount in history['amounts']]
+    for notification_state in state['notifications'].values():
+        if isinstance(notification_state, dict):
+            notification_state['items'] = [[text, None if amount is None else to_cents(amount, exact=False)]
+                                           for text, amount in notification_state['items']]
+            count, total = notification_state['summary']
+            notification_state['summary'] = [count, to_cents(total, exact=False)]
+
+def _history_filter(history, filters):
+    """
+    Construye la función que decide si una transacción pasa los filtros.
+
+    Quien llama debe haber comprobado su forma con _valid_filters.
+
+    Args:
+        history (TransactionLog): Historial a filtrar.
+        filters (dict): Filtros de get_transaction_history.
+
+    Returns:
+        callable | None: Función ``(posición) -> bool``, o None si algún importe
+        de los filtros no es válido.
+    """
+    kinds = {TRANSACTION_TYPES.index(kind) for kind in filters.get('types') or ()}
+    min_amount = filters.get('min_amount')
+    max_amount = filters.get('max_amount')
+    if min_amount is not None:
+        min_amount = to_cents(min_amount, exact=False)
+        if min_amount is None:
+            return None
+    if max_amount is not None:
+        max_amount = to_cents(max_amount, exact=False)
+        if max_amount is None:
+            return None
+    since = filters.get('since')
+    until = filters.get('until')
+
+    def matches(seq):
+        if kinds and history.kinds[seq] not in kinds:
+            return False
+        if min_amount is not None and history.amounts[seq] < min_amount:
+            return False
+        if max_amount is not None and history.amounts[seq] > max_amount:
+            return False
+        if since is not None and history.timestamps[seq] < since:
+            return False
+        if until is not None and history.timestamps[seq] > until:
+            return False
+        return True
+
+    return matches
+
+def create_server(bank_server=None, host='localhost', port=8000, max_workers=DEFAULT_MAX_WORKERS,
+                  request_queue_size=DEFAULT_REQUEST_QUEUE_SIZE, log_requests=True, max_in_flight=None,
+                  client_rate_limit=None):
+    """
+    Crea el servidor XML-RPC que expone un BankServer, sin ponerlo a escuchar.
+
+    Args:
+        bank_server (BankServer): Instancia a exponer. Si es None se crea una nueva.
+        host (str): Dirección en la que escuchar.
+        port (int): Puerto en el que escuchar (0 elige uno libre).
+        max_workers (int): Hilos del pool. Con 0 las solicitudes se atienden de una en una.
+        request_queue_size (int): Tamaño del backlog de conexiones pendientes.
+        log_requests (bool): Si se registra cada solicitud en stderr.
+        max_in_flight (int): Solicitudes admitidas a la vez; las demás se rechazan con 503.
+            Solo con el pool de hilos.
+        client_rate_limit (float): Solicitudes por segundo admitidas por dirección IP;
+            las demás se rechazan con 429. Solo con el pool de hilos.
+
+    Returns:
+        SimpleXMLRPCServer: El servidor configurado.
+    """
+    if bank_server is None:
+        bank_server = BankServer()
+    if max_workers:
+        client_limiter = RateLimiter(client_rate_limit) if client_rate_limit else None
+        server = ThreadPoolXMLRPCServer((host, port), max_workers=max_workers,
+                                        request_queue_size=request_queue_size,
+                                        max_in_flight=max_in_flight, client_limiter=client_limiter,
+                                        requestHandler=RequestHandler, allow_none=True,
+                                        logRequests=log_requests)
+        bank_server.long_polls.clamp(max_workers)
+    else:
+        server = SimpleXMLRPCServer((host, port), requestHandler=RequestHandler, allow_none=True,
+                                    logRequests=log_requests, bind_and_activate=False)
+        server.request_queue_size = request_queue_size
+        try:
+            server.server_bind()
+            server.server_activate()
+        except OSError:
+            server.server_close()
+            raise
+        # Un long-poll bloquearía a todos los demás clientes del servidor de un hilo.
+        bank_server.notification_wait_limit = 0
     server.register_instance(bank_server)
-    server.register_function(bank_server.delete_account, 'delete_account')  # Registrar el método delete_account
-    print("Servidor bancario corriendo en el puerto 8000...")
-    server.serve_forever()
+    server.register_multicall_functions()
+    return server
+
+def run_server(host='localhost', port=8000, max_workers=DEFAULT_MAX_WORKERS,
+               request_queue_size=DEFAULT_REQUEST_QUEUE_SIZE, log_requests=True, data_dir=None,
+               require_session=False, kdf_iterations=DEFAULT_KDF_ITERATIONS,
+               notification_limit=DEFAULT_NOTIFICATION_LIMIT, notification_overflow=COALESCE,
+               replication_port=None, replica_of=None, max_in_flight=None, client_rate_limit=None,
+               account_rate_limit=None):
+    """
+    Inicia el servidor bancario.
+
+    Con ``replication_port`` el servidor es un primario que acepta réplicas en
+    ese puerto. Con ``replica_of`` el servidor es una réplica de solo lectura
+    del primario indicado, que atiende las consultas para repartir la carga de
+    lectura; su estado solo vive en memoria.
+
+    ``max_in_flight``, ``client_rate_limit`` y ``account_rate_limit`` limitan la
+    carga admitida: lo que los supera se rechaza enseguida, de modo que un
+    cliente desbocado o un pico de carga no llenan el backlog del socket.
+
+    Args:
+        host (str): Dirección en la que escuchar.
+        port (int): Puerto en el que escuchar.
+        max_workers (int): Hilos del pool. Con 0 las solicitudes se atienden de una en una.
+        request_queue_size (int): Tamaño del backlog de conexiones pendientes.
+        log_requests (bool): Si se registra cada solicitud en stderr.
+        data_dir (str): Directorio del log durable y los snapshots. Con None el
+            estado solo vive en memoria.
+        require_session (bool): Si las operaciones sobre una cuenta exigen un token de sesión.
+        kdf_iterations (int): Coste (iteraciones de PBKDF2) del hash de contraseñas.
+        notification_limit (int): Notificaciones que guarda como mucho cada cuenta.
+        notification_overflow (str): ``drop_oldest`` o ``coalesce``.
+        replication_port (int): Puerto en el que aceptar réplicas. Con None no se aceptan.
+        replica_of (tuple): (host, puerto de replicación) del primario a seguir.
+        max_in_flight (int): Solicitudes admitidas a la vez (ejecutándose o esperando un
+            hilo); las demás reciben 503. Con None se espera a tener un hilo libre.
+        client_rate_limit (float): Solicitudes por segundo admitidas por dirección IP;
+            las demás reciben 429.
+        account_rate_limit (float): Llamadas por segundo admitidas por cuenta; las
+            demás devuelven RATE_LIMITED.
+    """
+    if replica_of and data_dir:
+        raise ValueError("Una réplica no usa data_dir: recibe el estado del primario.")
+    persistence = BankPersistence(data_dir) if data_dir else None
+    replication = ReplicationPrimary(host, replication_port) if replication_port else None
+    bank_server = BankServer(persistence=persistence, kdf_iterations=kdf_iterations,
+                             require_session=require_session, notification_limit=notification_limit,
+                             notification_overflow=notification_overflow, replication=replication,
+                             account_limiter=RateLimiter(account_rate_limit) if account_rate_limit else None)
+    follower = None
+    if replica_of:
+        follower = ReplicationFollower(bank_server, *replica_of)
+        follower.start()
+    server = create_server(bank_server, host=host, port=port,
+                           max_workers=max_workers, request_queue_size=request_queue_size,
+                           log_requests=log_requests, max_in_flight=max_in_flight,
+                           client_rate_limit=client_rate_limit)
+    print(f"Servidor bancario corriendo en el puerto {port}...")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if follower is not None:
+            follower.close()
+        if replication is not None:
+            replication.close()
+        if persistence is not None:
+            persistence.close()
 
 if __name__ == "__main__":
     run_server()
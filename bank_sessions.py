@@ -0,0 +1,119 @@
+from collections import OrderedDict
+import secrets
+import threading
+import time
+
+DEFAULT_MAX_SESSIONS = 100000
+DEFAULT_SESSION_TTL = 15 * 60
+TOKEN_BYTES = 16
+
+class SessionCache:
+    """
+    Caché acotada de sesiones verificadas.
+
+    Cada sesión asocia un token aleatorio a la cuenta que se autenticó. Las
+    sesiones caducan tras ``ttl`` segundos sin usarse y, si se supera
+    ``max_sessions``, se descartan primero las que llevan más tiempo sin uso.
+    Todas las operaciones son O(1) bajo un lock propio de la caché.
+
+    Atributos:
+        max_sessions (int): Número máximo de sesiones abiertas.
+        ttl (float): Segundos de inactividad tras los que caduca una sesión.
+    """
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, ttl=DEFAULT_SESSION_TTL, clock=time.monotonic):
+        """
+        Inicializa la caché.
+
+        Args:
+            max_sessions (int): Número máximo de sesiones abiertas.
+            ttl (float): Segundos de inactividad tras los que caduca una sesión.
+            clock (callable): Reloj monotónico, reemplazable en las pruebas.
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._clock = clock
+        self._sessions = OrderedDict()  # token -> (cuenta, vencimiento), del último uso más antiguo al más reciente
+        self._by_account = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, account_id):
+        """
+        Abre una sesión para una cuenta ya autenticada.
+
+        Args:
+            account_id (str): El ID de la cuenta.
+
+        Returns:
+            str: El token de la sesión.
+        """
+        token = secrets.token_urlsafe(TOKEN_BYTES)
+        with self._lock:
+            self._sessions[token] = (account_id, self._clock() + self.ttl)
+            self._by_account.setdefault(account_id, set()).add(token)
+            # El orden de la caché coincide con el de vencimiento: se purgan desde el principio.
+            while self._sessions and (len(self._sessions) > self.max_sessions
+                                      or next(iter(self._sessions.values()))[1] <= self._clock()):
+                self._remove(next(iter(self._sessions)))
+        return token
+
+    def get(self, token):
+        """
+        Resuelve la cuenta de una sesión y renueva su vencimiento.
+
+        Args:
+            token (str): El token de la sesión.
+
+        Returns:
+            str: El ID de la cuenta, o None si la sesión no existe o caducó.
+        """
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            account_id, expires = session
+            now = self._clock()
+            if now >= expires:
+                self._remove(token)
+                return None
+            self._sessions[token] = (account_id, now + self.ttl)
+            self._sessions.move_to_end(token)
+            return account_id
+
+    def discard(self, token):
+        """
+        Cierra una sesión.
+
+        Args:
+            token (str): El token de la sesión.
+
+        Returns:
+            bool: True si la sesión existía.
+        """
+        with self._lock:
+            if token not in self._sessions:
+                return False
+            self._remove(token)
+            return True
+
+    def discard_account(self, account_id):
+        """
+        Cierra todas las sesiones de una cuenta.
+
+        Args:
+            account_id (str): El ID de la cuenta.
+        """
+        with self._lock:
+            for token in list(self._by_account.get(account_id, ())):
+                self._remove(token)
+
+    def _remove(self, token):
+        """Elimina una sesión. Quien llama debe tener el lock de la caché."""
+        account_id, _ = self._sessions.pop(token)
+        tokens = self._by_account[account_id]
+        tokens.discard(token)
+        if not tokens:
+            del self._by_account[account_id]
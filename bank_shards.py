@@ -0,0 +1,926 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import os
+import secrets
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+import zlib
+from xmlrpc.server import resolve_dotted_attribute
+
+from bank_async_server import BinaryBankServer
+from bank_client import ConnectionPool
+from bank_idempotency import IdempotencyCache
+from bank_ledger import TRANSFER_OUT, TRANSFER_IN
+from bank_money import BALANCE_LIMIT, INVALID_AMOUNT, MAX_CENTS, format_amount, from_cents, to_cents
+from bank_persistence import BankPersistence
+from bank_server import (ADMIN_METHODS, ADMIN_ONLY, BankServer, BATCH_OPERATIONS, DEFAULT_KDF_ITERATIONS,
+                         DEFAULT_MAX_WORKERS, DEFAULT_REQUEST_QUEUE_SIZE, INVALID_PAGE, INVALID_SESSION, INVALID_WAIT,
+                         LongPollBudget, MAX_NOTIFICATION_WAIT, MAX_OPEN_EXPORTS, UNKNOWN_EXPORT, create_server)
+from bank_sessions import SessionCache
+
+DEBIT = 'debit'
+CREDIT = 'credit'
+TRANSFER_COMMITTED = "Transferencia ya confirmada."
+SHARD_START_TIMEOUT = 10
+
+def shard_for(account_id, shard_count):
+    """
+    Devuelve el shard al que pertenece una cuenta.
+
+    Se usa CRC-32 y no ``hash()``, que cambia en cada proceso, para que el
+    reparto sea el mismo en el enrutador y entre reinicios.
+
+    Args:
+        account_id (str): El ID de la cuenta.
+        shard_count (int): Número de shards.
+
+    Returns:
+        int: Índice del shard, entre 0 y shard_count - 1.
+    """
+    return zlib.crc32(account_id.encode()) % shard_count
+
+class ShardServer(BankServer):
+    """
+    Servidor bancario que guarda una partición de las cuentas.
+
+    Además de los métodos de BankServer, participa en las transferencias entre
+    shards con un protocolo de dos fases coordinado por ShardRouter: en la
+    primera fase el shard de origen retiene el importe (``prepare_debit``) y el
+    de destino comprueba la cuenta (``prepare_credit``); en la segunda ambos
+    confirman (``commit_transfer``) o deshacen (``abort_transfer``). Cada paso
+    se registra en el log durable, de modo que una transferencia preparada
+    sobrevive a un reinicio del shard hasta que el coordinador la resuelve.
+
+    Atributos:
+        prepared (dict): Transferencias preparadas por ID, como
+            ``[rol, origen, destino, importe en céntimos, marca de tiempo]``.
+        committed (set): Débitos confirmados cuyo crédito aún no se ha confirmado.
+            El coordinador los consulta al recuperarse y los olvida después.
+    """
+
+    _AMOUNT_PARAMS = dict(BankServer._AMOUNT_PARAMS, prepare_debit=3, prepare_credit=3)
+
+    def __init__(self, *args, **kwargs):
+        """Inicializa el shard. Acepta los mismos argumentos que BankServer."""
+        self.prepared = {}
+        self.committed = set()
+        super().__init__(*args, **kwargs)
+
+    def delete_account(self, account_id, idempotency_key=None):
+        """
+        Elimina una cuenta del shard si no tiene transferencias preparadas.
+
+        Args:
+            account_id (str): El ID de la cuenta o un token de sesión.
+            idempotency_key (str): Clave de idempotencia opcional (ver BankServer).
+
+        Returns:
+            str: Mensaje de éxito o error.
+        """
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return INVALID_SESSION
+
+        def delete():
+            with self.lock, self._account_lock(account_id):
+                if account_id not in self.accounts:
+                    return "La cuenta no existe."
+                if any(account_id in record[1:3] for record in list(self.prepared.values())):
+                    return "La cuenta tiene transferencias pendientes."
+                self._delete_account(account_id)
+            self.sessions.discard_account(account_id)
+            self._sync()
+            return "Cuenta eliminada exitosamente."
+
+        return self.idempotency.run(account_id, idempotency_key, delete, request=('delete_account',))
+
+    def prepare_debit(self, txid, from_account, to_account, amount, timestamp):
+        """
+        Primera fase en el shard de origen: comprueba los fondos y retiene el importe.
+
+        El saldo de la cuenta baja desde este momento; el movimiento aparece en
+        el historial al confirmar y el importe se devuelve si se deshace.
+
+        Args:
+            txid (str): ID de la transferencia.
+            from_account (str): El ID de la cuenta de origen, en este shard.
+            to_account (str): El ID de la cuenta de destino.
+            amount (int): La cantidad a transferir, en céntimos.
+            timestamp (float): Marca de tiempo de la transferencia.
+
+        Returns:
+            bool | str: True si queda preparada, o el mensaje de error. Un débito ya
+            confirmado no se vuelve a preparar (TRANSFER_COMMITTED).
+        """
+        with self._account_lock(from_account):
+            if txid in self.prepared:
+                return True
+            if txid in self.committed:
+                return TRANSFER_COMMITTED
+            if amount <= 0:
+                return "La cantidad a transferir debe ser positiva."
+            if amount > MAX_CENTS:
+                return INVALID_AMOUNT
+            if from_account not in self.accounts:
+                return "Cuenta de destino no existe."
+            if self.accounts[from_account] < amount:
+                return "Fondos insuficientes."
+            self._prepare_debit(txid, from_account, to_account, amount, timestamp)
+        self._sync()
+        return True
+
+    def prepare_credit(self, txid, from_account, to_account, amount, timestamp):
+        """
+        Primera fase en el shard de destino: comprueba que la cuenta existe.
+
+        Args:
+            txid (str): ID de la transferencia.
+            from_account (str): El ID de la cuenta de origen.
+            to_account (str): El ID de la cuenta de destino, en este shard.
+            amount (int): La cantidad a transferir, en céntimos.
+            timestamp (float): Marca de tiempo de la transferencia.
+
+        Returns:
+            bool | str: True si queda preparada, o el mensaje de error.
+        """
+        with self._account_lock(to_account):
+            if txid in self.prepared:
+                return True
+            if to_account not in self.accounts:
+                return "Cuenta de destino no existe."
+            if self.accounts[to_account] + amount > MAX_CENTS:
+                return BALANCE_LIMIT
+            self._prepare_credit(txid, from_account, to_account, amount, timestamp)
+        self._sync()
+        return True
+
+    def commit_transfer(self, txid):
+        """
+        Segunda fase: aplica una transferencia preparada en este shard.
+
+        Args:
+            txid (str): ID de la transferencia.
+
+        Returns:
+            int | str: El nuevo saldo en céntimos de la cuenta de este shard, o
+            un mensaje si la transferencia no está preparada.
+        """
+        record = self.prepared.get(txid)
+        if record is None:
+            return "Transferencia no preparada."
+        role, from_account, to_account = record[:3]
+        account_id = from_account if role == DEBIT else to_account
+        with self._account_lock(account_id):
+            if txid not in self.prepared:
+                return "Transferencia no preparada."
+            self._commit_transfer(txid)
+            balance = self.accounts[account_id]
+        self._sync()
+        return balance
+
+    def abort_transfer(self, txid):
+        """
+        Segunda fase: deshace una transferencia preparada en este shard.
+
+        Args:
+            txid (str): ID de la transferencia.
+
+        Returns:
+            bool: True si la transferencia estaba preparada.
+        """
+        record = self.prepared.get(txid)
+        if record is None:
+            return False
+        with self._account_lock(record[1] if record[0] == DEBIT else record[2]):
+            if txid not in self.prepared:
+                return False
+            self._abort_transfer(txid)
+        self._sync()
+        return True
+
+    def forget_transfer(self, txid):
+        """
+        Olvida un débito confirmado una vez confirmado también su crédito.
+
+        Args:
+            txid (str): ID de la transferencia.
+
+        Returns:
+            bool: True si el débito estaba pendiente de olvidar.
+        """
+        with self.lock:
+            if txid not in self.committed:
+                return False
+            self._forget_transfer(txid)
+        self._sync()
+        return True
+
+    def transfer_status(self, txid):
+        """
+        Consulta el estado de una transferencia en este shard.
+
+        Args:
+            txid (str): ID de la transferencia.
+
+        Returns:
+            str: ``prepared``, ``committed`` (débito confirmado aún no olvidado) o ``unknown``.
+        """
+        if txid in self.prepared:
+            return 'prepared'
+        if txid in self.committed:
+            return 'committed'
+        return 'unknown'
+
+    def pending_transfers(self):
+        """
+        Lista las transferencias que el coordinador aún debe resolver.
+
+        Returns:
+            dict: ``{"prepared": {ID: registro}, "committed": [ID, ...]}``.
+        """
+        return {'prepared': dict(self.prepared), 'committed': list(self.committed)}
+
+    def _prepare_debit(self, txid, from_account, to_account, amount, timestamp):
+        """Retiene el importe de un débito. Quien llama debe tener el lock de la cuenta de origen."""
+        self._log('prepare_debit', txid, from_account, to_account, amount, timestamp)
+        self.accounts[from_account] -= amount
+        self.prepared[txid] = [DEBIT, from_account, to_account, amount, timestamp]
+
+    def _prepare_credit(self, txid, from_account, to_account, amount, timestamp):
+        """Registra un crédito preparado. Quien llama debe tener el lock de la cuenta de destino."""
+        self._log('prepare_credit', txid, from_account, to_account, amount, timestamp)
+        self.prepared[txid] = [CREDIT, from_account, to_account, amount, timestamp]
+
+    def _commit_transfer(self, txid):
+        """Aplica una transferencia preparada. Quien llama debe tener el lock de la cuenta local."""
+        self._log('commit_transfer', txid)
+        role, from_account, to_account, amount, timestamp = self.prepared.pop(txid)
+        if role == DEBIT:
+            self.transaction_history[from_account].append(TRANSFER_OUT, amount, to_account, timestamp)
+            self.ledger.append(from_account, TRANSFER_OUT, -amount, timestamp)
+            self.committed.add(txid)
+        else:
+            self.accounts[to_account] += amount
+            self.transaction_history[to_account].append(TRANSFER_IN, amount, from_account, timestamp)
+            self.ledger.append(to_account, TRANSFER_IN, amount, timestamp)
+            self.notifications[to_account].put(f"Transferencia recibida de {from_account}: {format_amount(amount)}",
+                                               amount)
+
+    def _abort_transfer(self, txid):
+        """Deshace una transferencia preparada. Quien llama debe tener el lock de la cuenta local."""
+        self._log('abort_transfer', txid)
+        role, from_account, _, amount, _ = self.prepared.pop(txid)
+        if role == DEBIT:
+            self.accounts[from_account] += amount
+
+    def _forget_transfer(self, txid):
+        """Olvida un débito confirmado. Quien llama debe tener el lock global."""
+        self._log('forget_transfer', txid)
+        self.committed.discard(txid)
+
+    def _capture(self):
+        state = super()._capture()
+        state['prepared'] = {txid: list(record) for txid, record in self.prepared.items()}
+        state['committed'] = list(self.committed)
+        return state
+
+    def _restore(self, state):
+        super()._restore(state)
+        self.prepared.update(state.get('prepared', {}))
+        if self._legacy_amounts:
+            for record in self.prepared.values():
+                record[3] = to_cents(record[3], exact=False)
+        self.committed.update(state.get('committed', ()))
+
+class _TransferAttempt:
+    """Progreso de una transferencia entre shards, para continuarla si se repite."""
+
+    __slots__ = ('txid', 'started', 'credited')
+
+    def __init__(self):
+        self.txid = uuid.uuid4().hex
+        self.started = False
+        self.credited = False  # Si el crédito ya se confirmó y solo falta olvidar el débito
+
+class ShardRouter:
+    """
+    Enrutador que expone varios ShardServer como si fueran un solo BankServer.
+
+    Reparte las cuentas entre los shards con ``shard_for`` y reenvía cada
+    operación al shard de su cuenta por el protocolo binario, con un pool de
+    conexiones por shard. Las transferencias entre cuentas de shards distintos
+    se coordinan con dos fases: preparar el débito, preparar el crédito,
+    confirmar el débito (punto de decisión) y confirmar el crédito. Las
+    sesiones y los resultados de las claves de idempotencia se guardan en el
+    enrutador, de modo que los shards solo reciben IDs de cuenta.
+
+    Atributos:
+        shard_urls (list): URL ``bank://`` de cada shard, en orden de índice.
+        pools (list): ConnectionPool de cada shard.
+        sessions (SessionCache): Sesiones abiertas con login.
+        require_session (bool): Si las operaciones sobre una cuenta exigen un token de sesión.
+        notification_wait_limit (float): Espera máxima de wait_notifications en segundos.
+        long_polls (LongPollBudget): Cupo de wait_notifications que esperan a la vez, para
+            que no ocupen todas las conexiones con los shards.
+        exports (OrderedDict): ID de la exportación en cada shard, por ID de exportación del enrutador.
+        idempotency (IdempotencyCache): Resultados de las mutaciones hechas con clave de idempotencia.
+    """
+
+    def __init__(self, shard_urls, pool_size=DEFAULT_MAX_WORKERS, sessions=None, require_session=False,
+                 idempotency=None):
+        """
+        Inicializa el enrutador sin conectar con los shards.
+
+        Args:
+            shard_urls (list): URL ``bank://host:puerto`` de cada shard.
+            pool_size (int): Conexiones como máximo con cada shard.
+            sessions (SessionCache): Caché de sesiones. Por defecto una nueva.
+            require_session (bool): Si las operaciones sobre una cuenta exigen un token de sesión.
+            idempotency (IdempotencyCache): Caché de claves de idempotencia. Por defecto una nueva.
+        """
+        if not shard_urls:
+            raise ValueError("Hace falta al menos un shard.")
+        self.shard_urls = list(shard_urls)
+        self.pools = [ConnectionPool(url, pool_size) for url in self.shard_urls]
+        self.sessions = sessions if sessions is not None else SessionCache()
+        self.require_session = require_session
+        self.notification_wait_limit = MAX_NOTIFICATION_WAIT
+        self.long_polls = LongPollBudget(pool_size // 2)
+        self.exports = OrderedDict()
+        self.idempotency = idempotency if idempotency is not None else IdempotencyCache()
+        # Transferencias entre shards con clave de idempotencia aún sin resultado
+        self._transfer_attempts = OrderedDict()  # (cuenta de origen, clave) -> _TransferAttempt
+        self._attempts_lock = threading.Lock()
+
+    def _dispatch(self, method, params):
+        """Ejecuta un método RPC; con require_session rechaza los de ADMIN_METHODS. Ver BankServer._dispatch."""
+        func = resolve_dotted_attribute(self, method, False)
+        if self.require_session and method in ADMIN_METHODS:
+            return ADMIN_ONLY
+        return func(*params)
+
+    def _shard(self, account_id):
+        """Devuelve el índice del shard de una cuenta."""
+        return shard_for(account_id, len(self.pools))
+
+    def _call(self, index, method, *params):
+        """Llama a un método de un shard."""
+        with self.pools[index].connection() as proxy:
+            return getattr(proxy, method)(*params)
+
+    def _call_all(self, method, *params):
+        """Llama a un método en todos los shards y devuelve sus resultados en orden."""
+        return [self._call(index, method, *params) for index in range(len(self.pools))]
+
+    def _resolve(self, account):
+        """Obtiene la cuenta a la que se refiere una operación. Ver BankServer._resolve."""
+        account_id = self.sessions.get(account)
+        if account_id is not None:
+            return account_id
+        return None if self.require_session else account
+
+    def create_account(self, account_id, password, idempotency_key=None):
+        """Crea una nueva cuenta en su shard. Ver BankServer.create_account."""
+        return self.idempotency.run(account_id, idempotency_key, self._call, self._shard(account_id),
+                                    'create_account', account_id, password)
+
+    def delete_account(self, account_id, idempotency_key=None):
+        """Elimina una cuenta de su shard y cierra sus sesiones. Ver BankServer.delete_account."""
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return INVALID_SESSION
+
+        def delete():
+            result = self._call(self._shard(account_id), 'delete_account', account_id)
+            self.sessions.discard_account(account_id)
+            return result
+
+        return self.idempotency.run(account_id, idempotency_key, delete, request=('delete_account',))
+
+    def import_accounts(self, accounts, idempotency_key=None):
+        """
+        Crea muchas cuentas, repartidas por shard. Ver BankServer.import_accounts.
+
+        Cada shard recibe solo sus cuentas y todos importan a la vez.
+
+        Args:
+            accounts (list): Diccionarios con los datos de cada cuenta.
+            idempotency_key (str): Clave de idempotencia opcional (ver BankServer).
+
+        Returns:
+            dict: ``{"created": int, "errors": [[posición, mensaje], ...]}``.
+        """
+        return self.idempotency.run(None, idempotency_key, self._import_accounts, accounts)
+
+    def _import_accounts(self, accounts):
+        """Crea muchas cuentas, repartidas por shard. Ver import_accounts."""
+        groups = [[] for _ in self.pools]
+        positions = [[] for _ in self.pools]
+        for position, account in enumerate(accounts):
+            account_id = account.get('account_id') if isinstance(account, dict) else None
+            # Las cuentas sin ID válido van al shard 0, que las rechaza con su mensaje.
+            index = self._shard(account_id) if isinstance(account_id, str) else 0
+            groups[index].append(account)
+            positions[index].append(position)
+        with ThreadPoolExecutor(len(self.pools)) as executor:
+            results = list(executor.map(lambda index: self._call(index, 'import_accounts', groups[index])
+                                        if groups[index] else {'created': 0, 'errors': []},
+                                        range(len(self.pools))))
+        errors = sorted([positions[index][position], message]
+                        for index, result in enumerate(results) for position, message in result['errors'])
+        return {'created': sum(result['created'] for result in results), 'errors': errors}
+
+    def authenticate(self, account_id, password):
+        """Autentica a un usuario en el shard de su cuenta. Ver BankServer.authenticate."""
+        return self._call(self._shard(account_id), 'authenticate', account_id, password)
+
+    def login(self, account_id, password):
+        """Autentica a un usuario y abre una sesión en el enrutador. Ver BankServer.login."""
+        if not self.authenticate(account_id, password):
+            return False
+        return self.sessions.create(account_id)
+
+    def logout(self, token):
+        """Cierra una sesión. Ver BankServer.logout."""
+        return self.sessions.discard(token)
+
+    def check_session(self, token):
+        """Comprueba una sesión. Ver BankServer.check_session."""
+        return self.sessions.get(token) or False
+
+    def get_balance(self, account_id):
+        """Obtiene el saldo de una cuenta. Ver BankServer.get_balance."""
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return INVALID_SESSION
+        return self._call(self._shard(account_id), 'get_balance', account_id)
+
+    def deposit(self, account_id, amount, idempotency_key=None):
+        """Realiza un depósito en una cuenta. Ver BankServer.deposit."""
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return INVALID_SESSION
+        return self.idempotency.run(account_id, idempotency_key, self._call, self._shard(account_id),
+                                    'deposit', account_id, amount)
+
+    def withdraw(self, account_id, amount, idempotency_key=None):
+        """Realiza un retiro de una cuenta. Ver BankServer.withdraw."""
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return INVALID_SESSION
+        return self.idempotency.run(account_id, idempotency_key, self._call, self._shard(account_id),
+                                    'withdraw', account_id, amount)
+
+    def transfer(self, from_account, to_account, amount, idempotency_key=None):
+        """
+        Realiza una transferencia entre cuentas, con dos fases si están en shards distintos.
+
+        Args:
+            from_account (str): El ID de la cuenta de origen o un token de sesión.
+            to_account (str): El ID de la cuenta de destino.
+            amount (int | float | str): La cantidad a transferir, con dos decimales como mucho.
+            idempotency_key (str): Clave de idempotencia opcional (ver BankServer).
+
+        Returns:
+            str: Mensaje de éxito o error.
+        """
+        from_account = self._resolve(from_account)
+        if from_account is None:
+            return INVALID_SESSION
+        return self.idempotency.run(from_account, idempotency_key, self._transfer, from_account, to_account, amount,
+                                    idempotency_key, request=('transfer', to_account, amount))
+
+    def _transfer(self, from_account, to_account, amount, idempotency_key=None):
+        """
+        Realiza una transferencia entre cuentas ya resueltas.
+
+        Con clave de idempotencia, el intento de una transferencia entre shards
+        se guarda hasta que devuelve un resultado. Si falla con una excepción
+        después de preparar o confirmar el débito, la repetición con la misma
+        clave continúa esa misma transferencia en lugar de empezar otra, así
+        que el débito nunca se aplica dos veces.
+        """
+        source, target = self._shard(from_account), self._shard(to_account)
+        if source == target:
+            return self._call(source, 'transfer', from_account, to_account, amount)
+
+        cents = to_cents(amount)
+        if cents is None:
+            return INVALID_AMOUNT
+        if not idempotency_key:
+            return self._two_phase_transfer(_TransferAttempt(), source, target, from_account, to_account, cents)
+        entry_key = (from_account, idempotency_key)
+        with self._attempts_lock:
+            attempt = self._transfer_attempts.get(entry_key)
+            if attempt is None:
+                attempt = self._transfer_attempts[entry_key] = _TransferAttempt()
+                while len(self._transfer_attempts) > self.idempotency.max_keys:
+                    self._transfer_attempts.popitem(last=False)
+        result = self._two_phase_transfer(attempt, source, target, from_account, to_account, cents)
+        # Con un resultado, las repeticiones las responde la caché de idempotencia.
+        with self._attempts_lock:
+            self._transfer_attempts.pop(entry_key, None)
+        return result
+
+    def _two_phase_transfer(self, attempt, source, target, from_account, to_account, cents):
+        """Realiza, o continúa si ya empezó, una transferencia entre dos shards."""
+        txid = attempt.txid
+        status = self._call(source, 'transfer_status', txid) if attempt.started else 'unknown'
+        attempt.started = True
+        from_balance = to_balance = None
+        if status == 'unknown' and attempt.credited:
+            pass  # Un intento anterior la terminó; solo se perdió su respuesta.
+        else:
+            if status != 'committed':
+                params = (txid, from_account, to_account, cents, time.time())
+                try:
+                    prepared = self._call(source, 'prepare_debit', *params)
+                except Exception:
+                    # El débito pudo quedar retenido aunque se perdiera la respuesta.
+                    self._abort(txid, source)
+                    raise
+                if prepared is not True:
+                    return prepared
+                try:
+                    prepared = self._call(target, 'prepare_credit', *params)
+                except Exception:
+                    # No se sabe si el crédito quedó preparado: se deshacen ambos lados.
+                    self._abort(txid, source, target)
+                    raise
+                if prepared is not True:
+                    self._call(source, 'abort_transfer', txid)
+                    return prepared
+                try:
+                    from_balance = self._call(source, 'commit_transfer', txid)
+                except Exception:
+                    # Solo se deshace si consta que el débito no se confirmó; si
+                    # no, el crédito se completa al repetir con la misma clave
+                    # o con _recover_transfers.
+                    try:
+                        undecided = self._call(source, 'transfer_status', txid) == 'prepared'
+                    except Exception:
+                        undecided = False
+                    if undecided:
+                        self._abort(txid, source, target)
+                    raise
+            # Confirmado el débito, la transferencia está decidida: si el crédito
+            # falla aquí, una repetición o _recover_transfers lo completará.
+            to_balance = self._call(target, 'commit_transfer', txid)
+            if not isinstance(to_balance, int):
+                to_balance = None  # Ya lo confirmó un intento anterior
+            attempt.credited = True
+            self._call(source, 'forget_transfer', txid)
+        if from_balance is None:
+            from_balance = to_cents(self._call(source, 'get_balance', from_account))
+        if to_balance is None:
+            to_balance = to_cents(self._call(target, 'get_balance', to_account))
+        return (f"Transferencia de {format_amount(cents)} desde la cuenta {from_account} "
+                f"a la cuenta {to_account}. Nuevos saldos: {from_account}: {format_amount(from_balance)}, "
+                f"{to_account}: {format_amount(to_balance)}.")
+
+    def _abort(self, txid, *indexes):
+        """Deshace una transferencia en los shards indicados, ignorando los que no respondan."""
+        for index in indexes:
+            try:
+                self._call(index, 'abort_transfer', txid)
+            except Exception:
+                pass
+
+    def _recover_transfers(self):
+        """
+        Resuelve las transferencias que quedaron a medias en los shards.
+
+        Un crédito preparado se confirma si su débito ya se confirmó y se
+        deshace en otro caso; un débito preparado cuyo crédito no llegó a
+        prepararse se deshace. Debe llamarse sin transferencias en curso, por
+        ejemplo al arrancar.
+
+        Returns:
+            int: Número de transferencias resueltas.
+        """
+        pending = self._call_all('pending_transfers')
+        credits = {txid: index for index, shard in enumerate(pending)
+                   for txid, record in shard['prepared'].items() if record[0] == CREDIT}
+        resolved = 0
+        for index, shard in enumerate(pending):
+            for txid, record in shard['prepared'].items():
+                if record[0] == DEBIT and txid not in credits:
+                    self._call(index, 'abort_transfer', txid)
+                    resolved += 1
+        for txid, index in credits.items():
+            source = self._shard(pending[index]['prepared'][txid][1])
+            status = self._call(source, 'transfer_status', txid)
+            if status == 'committed':
+                self._call(index, 'commit_transfer', txid)
+                self._call(source, 'forget_transfer', txid)
+            else:
+                self._call(index, 'abort_transfer', txid)
+                if status == 'prepared':
+                    self._call(source, 'abort_transfer', txid)
+            resolved += 1
+        for index, shard in enumerate(pending):
+            for txid in shard['committed']:
+                if txid not in credits:
+                    self._call(index, 'forget_transfer', txid)
+        return resolved
+
+    def execute_batch(self, operations, idempotency_key=None):
+        """
+        Ejecuta una lista de operaciones. Ver BankServer.execute_batch.
+
+        Si todas las cuentas del lote están en el mismo shard, el lote se
+        reenvía entero y se aplica con una sola adquisición de locks. Si no,
+        las operaciones se ejecutan una a una en orden, cada una atómica por
+        separado.
+
+        Args:
+            operations (list): Lista de operaciones.
+            idempotency_key (str): Clave de idempotencia opcional (ver BankServer).
+
+        Returns:
+            list: El resultado de cada operación, en el mismo orden.
+        """
+        parsed = []
+        account_ids = set()
+        for operation in operations:
+            method = operation[0] if isinstance(operation, (list, tuple)) and operation else None
+            params = list(operation[1:]) if method is not None else []
+            if not isinstance(method, str) or method not in BATCH_OPERATIONS:
+                parsed.append(f"Operación no soportada: {method}")
+                continue
+            arity, account_count = BATCH_OPERATIONS[method]
+            if len(params) != arity or not all(isinstance(account_id, str) for account_id in params[:account_count]):
+                parsed.append(f"Parámetros inválidos para {method}.")
+                continue
+            account_id = self._resolve(params[0])
+            if account_id is None:
+                parsed.append(INVALID_SESSION)
+                continue
+            parsed.append([method, account_id] + params[1:])
+            account_ids.update(parsed[-1][1:1 + account_count])
+        return self.idempotency.run(tuple(sorted(account_ids)), idempotency_key, self._execute_batch, parsed,
+                                    {self._shard(account_id) for account_id in account_ids}, request=parsed)
+
+    def _execute_batch(self, parsed, shards):
+        """Ejecuta las operaciones ya validadas de execute_batch en los shards indicados."""
+        if len(shards) == 1:
+            forwarded = iter(self._call(shards.pop(), 'execute_batch',
+                                        [entry for entry in parsed if not isinstance(entry, str)]))
+            return [entry if isinstance(entry, str) else next(forwarded) for entry in parsed]
+        results = []
+        for entry in parsed:
+            if isinstance(entry, str):
+                results.append(entry)
+            elif entry[0] == 'transfer':
+                results.append(self._transfer(*entry[1:]))
+            else:
+                results.append(self._call(self._shard(entry[1]), *entry))
+        return results
+
+    def get_transaction_history(self, account_id, cursor=None, limit=None, filters=None):
+        """Obtiene el historial de transacciones de una cuenta. Ver BankServer.get_transaction_history."""
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return INVALID_SESSION
+        return self._call(self._shard(account_id), 'get_transaction_history', account_id, cursor, limit, filters)
+
+    def total_inflow(self):
+        """Suma el dinero que ha entrado en cada cuenta de todos los shards. Ver BankServer.total_inflow."""
+        totals = {}
+        for shard_totals in self._call_all('total_inflow'):
+            totals.update(shard_totals)
+        return totals
+
+    def daily_volume(self, since=None, until=None):
+        """Suma el volumen movido por día en todos los shards. Ver BankServer.daily_volume."""
+        totals = {}
+        for shard_totals in self._call_all('daily_volume', since, until):
+            for day, volume in shard_totals.items():
+                totals[day] = totals.get(day, 0) + to_cents(volume)
+        return {day: from_cents(volume) for day, volume in sorted(totals.items())}
+
+    def top_accounts(self, n=10):
+        """Devuelve las n cuentas con mayor saldo de todos los shards. Ver BankServer.top_accounts."""
+        ranked = [pair for shard_top in self._call_all('top_accounts', n) for pair in shard_top]
+        ranked.sort(key=lambda pair: pair[1], reverse=True)
+        return ranked[:max(n, 0)]
+
+    def open_export(self):
+        """
+        Abre una exportación en todos los shards. Ver BankServer.open_export.
+
+        Cada shard toma su propia vista, así que la exportación es consistente
+        dentro de cada shard pero no entre shards: una transferencia entre
+        shards que se confirme mientras se abren las vistas puede aparecer solo
+        en uno de sus lados.
+
+        Returns:
+            dict: ``export_id``, ``timestamp`` (el de la primera vista) y número de
+            ``accounts`` y ``transactions`` que incluye.
+        """
+        opened = self._call_all('open_export')
+        export_id = secrets.token_urlsafe(16)
+        self.exports[export_id] = [shard_export['export_id'] for shard_export in opened]
+        while len(self.exports) > MAX_OPEN_EXPORTS:
+            self._close_shard_exports(self.exports.popitem(last=False)[1])
+        return {'export_id': export_id, 'timestamp': min(shard_export['timestamp'] for shard_export in opened),
+                'accounts': sum(shard_export['accounts'] for shard_export in opened),
+                'transactions': sum(shard_export['transactions'] for shard_export in opened)}
+
+    def export_chunk(self, export_id, cursor=None, limit=None):
+        """
+        Devuelve el siguiente bloque de registros de una exportación. Ver BankServer.export_chunk.
+
+        Los shards se recorren en orden; el cursor es ``[shard, cursor del shard...]``.
+        Cada shard valida su parte del cursor y el límite.
+
+        Returns:
+            dict | str: ``{"records": [...], "next_cursor": list | None}`` o un mensaje de error.
+        """
+        shard_exports = self.exports.get(export_id)
+        if shard_exports is None:
+            return UNKNOWN_EXPORT
+        if cursor and not (isinstance(cursor, (list, tuple)) and isinstance(cursor[0], int)
+                           and not isinstance(cursor[0], bool) and 0 <= cursor[0] < len(shard_exports)):
+            return INVALID_PAGE
+        index, *shard_cursor = cursor or [0]
+        chunk = self._call(index, 'export_chunk', shard_exports[index], shard_cursor or None, limit)
+        if isinstance(chunk, str):
+            return chunk
+        if chunk['next_cursor'] is not None:
+            next_cursor = [index] + chunk['next_cursor']
+        else:
+            next_cursor = [index + 1] if index + 1 < len(shard_exports) else None
+        return {'records': chunk['records'], 'next_cursor': next_cursor}
+
+    def close_export(self, export_id):
+        """Cierra una exportación en todos los shards. Ver BankServer.close_export."""
+        shard_exports = self.exports.pop(export_id, None)
+        if shard_exports is None:
+            return False
+        self._close_shard_exports(shard_exports)
+        return True
+
+    def _close_shard_exports(self, shard_exports):
+        """Cierra la exportación de cada shard."""
+        for index, shard_export_id in enumerate(shard_exports):
+            self._call(index, 'close_export', shard_export_id)
+
+    def get_notifications(self, account_id):
+        """Obtiene las notificaciones de una cuenta. Ver BankServer.get_notifications."""
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return []
+        return self._call(self._shard(account_id), 'get_notifications', account_id)
+
+    def peek_notifications(self, account_id):
+        """Consulta las notificaciones de una cuenta sin consumirlas. Ver BankServer.peek_notifications."""
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return []
+        return self._call(self._shard(account_id), 'peek_notifications', account_id)
+
+    def wait_notifications(self, account_id, timeout=MAX_NOTIFICATION_WAIT):
+        """Espera notificaciones de una cuenta (long-poll). Ver BankServer.wait_notifications."""
+        if not isinstance(timeout, (int, float)) or isinstance(timeout, bool):
+            return INVALID_WAIT
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return []
+        timeout = max(0, min(timeout, self.notification_wait_limit))
+        if not timeout or not self.long_polls.acquire():
+            return self._call(self._shard(account_id), 'wait_notifications', account_id, 0)
+        try:
+            return self._call(self._shard(account_id), 'wait_notifications', account_id, timeout)
+        finally:
+            self.long_polls.release()
+
+    def wake_notifications(self, account_id):
+        """Despierta a quien espere notificaciones de una cuenta. Ver BankServer.wake_notifications."""
+        account_id = self._resolve(account_id)
+        if account_id is None:
+            return False
+        return self._call(self._shard(account_id), 'wake_notifications', account_id)
+
+    def _close(self):
+        """Cierra las conexiones con los shards."""
+        for pool in self.pools:
+            pool.close()
+
+def _run_shard(host, port, data_dir, kdf_iterations, max_workers):
+    """Proceso de un shard: sirve un ShardServer por el protocolo binario hasta que lo terminen."""
+    persistence = BankPersistence(data_dir) if data_dir else None
+    shard = ShardServer(persistence=persistence, kdf_iterations=kdf_iterations)
+
+    async def serve():
+        binary_server = BinaryBankServer(shard, max_workers=max_workers)
+        server = await binary_server.start(host, port)
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+def _wait_for_port(host, port, timeout=SHARD_START_TIMEOUT):
+    """Espera a que un puerto acepte conexiones."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection((host, port)).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+def start_shards(shards, host='localhost', base_port=8101, data_dir=None,
+                 kdf_iterations=DEFAULT_KDF_ITERATIONS, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Lanza un proceso por shard y espera a que todos acepten conexiones.
+
+    Args:
+        shards (int): Número de shards.
+        host (str): Dirección en la que escuchan los shards.
+        base_port (int): Puerto del primer shard; los demás usan los siguientes.
+        data_dir (str): Si se indica, cada shard guarda su estado en ``data_dir/shard-<i>``.
+        kdf_iterations (int): Coste (iteraciones de PBKDF2) del hash de contraseñas.
+        max_workers (int): Hilos de cada shard.
+
+    Returns:
+        tuple: (procesos, URL ``bank://`` de cada shard)
+    """
+    processes, urls = [], []
+    try:
+        for index in range(shards):
+            shard_dir = os.path.join(data_dir, f"shard-{index}") if data_dir else None
+            process = multiprocessing.Process(
+                target=_run_shard, args=(host, base_port + index, shard_dir, kdf_iterations, max_workers),
+                name=f"bank-shard-{index}", daemon=True)
+            process.start()
+            processes.append(process)
+            urls.append(f"bank://{host}:{base_port + index}")
+        for index in range(shards):
+            _wait_for_port(host, base_port + index)
+    except BaseException:
+        stop_shards(processes)
+        raise
+    return processes, urls
+
+def stop_shards(processes):
+    """Termina los procesos de los shards."""
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+
+def run_sharded_server(host='localhost', port=8000, shards=None, shard_base_port=None,
+                       max_workers=DEFAULT_MAX_WORKERS, request_queue_size=DEFAULT_REQUEST_QUEUE_SIZE,
+                       log_requests=True, data_dir=None, require_session=False,
+                       kdf_iterations=DEFAULT_KDF_ITERATIONS):
+    """
+    Inicia el servidor bancario repartido en varios procesos.
+
+    Cada shard es un proceso con su propio BankServer (y su propio GIL); el
+    proceso principal atiende a los clientes por XML-RPC, igual que
+    ``run_server``, y enruta cada operación al shard de su cuenta.
+
+    Args:
+        host (str): Dirección en la que escuchar.
+        port (int): Puerto del enrutador.
+        shards (int): Número de shards. Por defecto uno por CPU.
+        shard_base_port (int): Puerto del primer shard. Por defecto ``port + 1``.
+        max_workers (int): Hilos del enrutador y de cada shard.
+        request_queue_size (int): Tamaño del backlog de conexiones pendientes.
+        log_requests (bool): Si se registra cada solicitud en stderr.
+        data_dir (str): Directorio con el estado durable de cada shard. Con None el
+            estado solo vive en memoria.
+        require_session (bool): Si las operaciones sobre una cuenta exigen un token de sesión.
+        kdf_iterations (int): Coste (iteraciones de PBKDF2) del hash de contraseñas.
+    """
+    shards = shards or os.cpu_count() or 1
+    shard_base_port = shard_base_port or port + 1
+    processes, urls = start_shards(shards, 'localhost', shard_base_port, data_dir, kdf_iterations,
+                                   max(max_workers, 1))
+    router = ShardRouter(urls, pool_size=max(max_workers, 1), require_session=require_session)
+    if threading.current_thread() is threading.main_thread():
+        # Al terminar con SIGTERM también se terminan los shards.
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        router._recover_transfers()
+        server = create_server(router, host=host, port=port, max_workers=max_workers,
+                               request_queue_size=request_queue_size, log_requests=log_requests)
+        print(f"Servidor bancario con {shards} shards corriendo en el puerto {port}...")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+    finally:
+        router._close()
+        stop_shards(processes)
+
+if __name__ == "__main__":
+    run_sharded_server()
@@ -0,0 +1,132 @@
+"""
+Benchmark del pool de conexiones de BankClient.
+
+Varios hilos comparten un mismo cliente y llaman a ``deposit`` y ``get_balance``
+durante un tiempo fijo. Se compara un único ServerProxy protegido por un lock
+(el cliente anterior) contra BankClient con su pool de conexiones persistentes,
+ambos contra AsyncBankServer, que mantiene las conexiones abiertas entre
+solicitudes. El servidor corre en otro proceso para que el GIL de los clientes
+no limite también al servidor. La ganancia de reutilizar conexiones solo se da
+con AsyncBankServer: el servidor de hilos (create_server) cierra la conexión
+tras cada respuesta, y contra él el pool solo aporta llamadas en paralelo.
+
+Uso:
+    python benchmarks/bench_client_pool.py [--duration 2] [--pool-size 8]
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+import xmlrpc.client
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bank_async_server import run_async_server
+from bank_client import BankClient
+
+THREAD_COUNTS = (1, 2, 4, 8, 16, 32)
+
+class LockedProxyClient:
+    """Cliente con un solo ServerProxy y un lock alrededor, como antes del pool."""
+
+    def __init__(self, server_url):
+        self.proxy = xmlrpc.client.ServerProxy(server_url)
+        self.lock = threading.Lock()
+        self.current_account = None
+
+    def deposit(self, amount):
+        with self.lock:
+            return self.proxy.deposit(self.current_account, amount)
+
+    def get_balance(self):
+        with self.lock:
+            return self.proxy.get_balance(self.current_account)
+
+def start_server():
+    """
+    Inicia un AsyncBankServer en otro proceso y espera a que acepte conexiones.
+
+    Returns:
+        tuple: (proceso, url)
+    """
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        port = sock.getsockname()[1]
+    process = multiprocessing.Process(target=run_async_server, kwargs={'port': port}, daemon=True)
+    process.start()
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(('localhost', port)).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+    return process, f"http://localhost:{port}/RPC2"
+
+def run_threads(client, threads, duration):
+    """
+    Ejecuta hilos que comparten el cliente y alternan depósitos y consultas de saldo.
+
+    Args:
+        client: Cliente con ``deposit`` y ``get_balance``.
+        threads (int): Número de hilos.
+        duration (float): Duración de la medición en segundos.
+
+    Returns:
+        float: Solicitudes por segundo.
+    """
+    counts = [0] * threads
+    deadline = [0.0]
+
+    def begin():
+        deadline[0] = time.perf_counter() + duration
+
+    start = threading.Barrier(threads, action=begin)
+
+    def worker(index):
+        start.wait()
+        done = 0
+        while time.perf_counter() < deadline[0]:
+            client.deposit(1)
+            client.get_balance()
+            done += 2
+        counts[index] = done
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(counts) / duration
+
+def main():
+    """Ejecuta el benchmark e imprime una tabla de resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--duration', type=float, default=2.0)
+    parser.add_argument('--pool-size', type=int, default=8)
+    args = parser.parse_args()
+
+    process, url = start_server()
+    try:
+        BankClient(url).create_account("bench", "password")
+        modes = (("proxy con lock", LockedProxyClient(url)),
+                 (f"pool ({args.pool_size})", BankClient(url, pool_size=args.pool_size)))
+        results = {}
+        for name, client in modes:
+            client.current_account = "bench"
+            results[name] = [run_threads(client, threads, args.duration) for threads in THREAD_COUNTS]
+    finally:
+        process.terminate()
+        process.join()
+
+    print(f"{'hilos':>8}" + "".join(f"{name:>18}" for name, _ in modes))
+    for row, threads in enumerate(THREAD_COUNTS):
+        print(f"{threads:>8}" + "".join(f"{results[name][row]:>18.0f}" for name, _ in modes))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark de concurrencia del servidor bancario.
+
+Levanta ``create_server`` en un hilo local y mide cuántas solicitudes por segundo
+de ``deposit`` y ``get_balance`` se atienden con 1 a 64 clientes concurrentes,
+comparando el modo con pool de hilos contra el modo de un hilo.
+
+Los clientes corren en el mismo proceso que el servidor, por lo que con solicitudes
+rápidas el GIL limita la mejora. La opción ``--slow-client`` añade un cliente que
+envía su solicitud muy despacio: en modo de un hilo bloquea a todos los demás,
+mientras que el pool sigue atendiendo al resto.
+
+Uso:
+    python benchmarks/bench_concurrency.py [--duration 2] [--workers 16] [--slow-client]
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+import xmlrpc.client
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bank_server import BankServer, create_server
+
+CLIENT_COUNTS = (1, 2, 4, 8, 16, 32, 64)
+
+def start_server(max_workers):
+    """
+    Inicia un servidor en un puerto libre.
+
+    Args:
+        max_workers (int): Hilos del pool (0 para el modo de un hilo).
+
+    Returns:
+        tuple: (servidor, hilo, url)
+    """
+    server = create_server(BankServer(), port=0, max_workers=max_workers, log_requests=False)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, thread, f"http://{host}:{port}/RPC2"
+
+def slow_client(server, hold):
+    """
+    Abre una conexión y envía la solicitud por partes durante ``hold`` segundos.
+
+    Args:
+        server (SimpleXMLRPCServer): Servidor al que conectarse.
+        hold (float): Tiempo durante el que la solicitud queda incompleta.
+    """
+    body = xmlrpc.client.dumps(("slow",), "get_balance").encode()
+    with socket.create_connection(server.server_address[:2]) as sock:
+        sock.sendall(b"POST /RPC2 HTTP/1.0\r\n")
+        time.sleep(hold)
+        sock.sendall(b"Content-Type: text/xml\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+        sock.recv(65536)
+
+def run_clients(url, clients, duration, on_start=None):
+    """
+    Ejecuta clientes concurrentes que alternan depósitos y consultas de saldo.
+
+    Args:
+        url (str): URL del servidor.
+        clients (int): Número de clientes concurrentes.
+        duration (float): Duración de la medición en segundos.
+        on_start (callable): Función invocada justo al empezar la medición.
+
+    Returns:
+        float: Solicitudes por segundo.
+    """
+    counts = [0] * clients
+    deadline = [0.0]
+
+    def begin():
+        deadline[0] = time.perf_counter() + duration
+        if on_start:
+            on_start()
+
+    start = threading.Barrier(clients, action=begin)
+
+    def worker(index):
+        proxy = xmlrpc.client.ServerProxy(url)
+        account_id = f"bench_{clients}_{index}"
+        proxy.create_account(account_id, "password")
+        start.wait()
+        done = 0
+        while time.perf_counter() < deadline[0]:
+            proxy.deposit(account_id, 1)
+            proxy.get_balance(account_id)
+            done += 2
+        counts[index] = done
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / duration
+
+def main():
+    """Ejecuta el benchmark e imprime una tabla de resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--duration', type=float, default=2.0)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--slow-client', action='store_true',
+                        help="mantener una solicitud lenta abierta durante cada medición")
+    args = parser.parse_args()
+
+    modes = (("un hilo", 0), (f"pool ({args.workers})", args.workers))
+    results = {}
+    for name, workers in modes:
+        server, thread, url = start_server(workers)
+        try:
+            results[name] = []
+            for clients in CLIENT_COUNTS:
+                slow = []
+                def on_start():
+                    if args.slow_client:
+                        slow.append(threading.Thread(target=slow_client, args=(server, args.duration)))
+                        slow[0].start()
+                        time.sleep(0.01)
+                results[name].append(run_clients(url, clients, args.duration, on_start))
+                for thread in slow:
+                    thread.join()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    print(f"{'clientes':>8}" + "".join(f"{name:>16}" for name, _ in modes))
+    for row, clients in enumerate(CLIENT_COUNTS):
+        print(f"{clients:>8}" + "".join(f"{results[name][row]:>16.0f}" for name, _ in modes))
+
+if __name__ == "__main__":
+    main()
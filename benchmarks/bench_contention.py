@@ -0,0 +1,117 @@
+"""
+Benchmark de contención de locks en BankServer.
+
+Compara el servidor con locks por cuenta contra una variante que serializa todas
+las operaciones con un único lock global, con hilos que operan sobre cuentas
+disjuntas y con hilos que comparten una sola cuenta.
+
+Dentro del proceso el GIL serializa el código Python, por lo que la ganancia se
+aprecia cuando la sección crítica espera (E/S, fsync del log). La opción
+``--hold-us`` simula esa espera dentro de cada sección crítica.
+
+Uso:
+    python benchmarks/bench_contention.py [--threads 8] [--ops 2000] [--hold-us 50]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bank_server import BankServer
+
+class HoldingLock:
+    """Lock que espera ``hold`` segundos tras adquirirse, simulando E/S en la sección crítica."""
+
+    def __init__(self, lock, hold):
+        self.lock = lock
+        self.hold = hold
+
+    def __enter__(self):
+        self.lock.__enter__()
+        time.sleep(self.hold)
+
+    def __exit__(self, *exc_info):
+        return self.lock.__exit__(*exc_info)
+
+class HoldingBankServer(BankServer):
+    """BankServer con locks por cuenta que espera ``hold`` segundos en cada sección crítica."""
+
+    def __init__(self, hold):
+        super().__init__()
+        self.hold = hold
+
+    def _account_lock(self, account_id):
+        lock = super()._account_lock(account_id)
+        return HoldingLock(lock, self.hold) if self.hold else lock
+
+    @contextmanager
+    def _locked_accounts(self, *account_ids):
+        with super()._locked_accounts(*account_ids):
+            if self.hold:
+                time.sleep(self.hold)
+            yield
+
+class GlobalLockBankServer(HoldingBankServer):
+    """Variante que serializa todas las operaciones con el lock global."""
+
+    def _account_lock(self, account_id):
+        return HoldingLock(self.lock, self.hold) if self.hold else self.lock
+
+    def _locked_accounts(self, *account_ids):
+        return self._account_lock(None)
+
+def run(server, threads, ops, shared):
+    """
+    Ejecuta depósitos y consultas concurrentes.
+
+    Args:
+        server (BankServer): Servidor a medir.
+        threads (int): Número de hilos.
+        ops (int): Operaciones por hilo.
+        shared (bool): Si todos los hilos usan la misma cuenta.
+
+    Returns:
+        float: Operaciones por segundo.
+    """
+    accounts = ["shared"] if shared else [f"account_{i}" for i in range(threads)]
+    for account_id in accounts:
+        server.create_account(account_id, "password")
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        account_id = accounts[index % len(accounts)]
+        barrier.wait()
+        for _ in range(ops // 2):
+            server.deposit(account_id, 1)
+            server.get_balance(account_id)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    began = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * (ops // 2) * 2 / (time.perf_counter() - began)
+
+def main():
+    """Ejecuta el benchmark e imprime una tabla de resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=2000)
+    parser.add_argument('--hold-us', type=float, default=50.0)
+    args = parser.parse_args()
+    hold = args.hold_us / 1e6
+
+    print(f"{'escenario':<20}{'lock global':>14}{'lock por cuenta':>18}")
+    for name, shared in (("cuentas disjuntas", False), ("cuenta compartida", True)):
+        global_ops = run(GlobalLockBankServer(hold), args.threads, args.ops, shared)
+        striped_ops = run(HoldingBankServer(hold), args.threads, args.ops, shared)
+        print(f"{name:<20}{global_ops:>14.0f}{striped_ops:>18.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark del coste de la durabilidad en BankServer.
+
+Mide cuántas mutaciones (depósitos) por segundo se completan sin persistencia,
+con el log en disco sin fsync y con el log sincronizado (commit en grupo),
+para distintos números de hilos concurrentes. Con varios hilos, un solo fsync
+hace durables las mutaciones de todos los que esperan.
+
+Uso:
+    python benchmarks/bench_durability.py [--ops 2000] [--directory /tmp]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bank_persistence import BankPersistence
+from bank_server import BankServer
+
+THREAD_COUNTS = (1, 4, 16, 64)
+
+def run(server, threads, ops):
+    """
+    Ejecuta depósitos concurrentes sobre cuentas disjuntas.
+
+    Args:
+        server (BankServer): Servidor a medir.
+        threads (int): Número de hilos.
+        ops (int): Depósitos totales.
+
+    Returns:
+        float: Mutaciones por segundo.
+    """
+    for index in range(threads):
+        server.create_account(f"account_{index}", "password")
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        account_id = f"account_{index}"
+        barrier.wait()
+        for _ in range(ops // threads):
+            server.deposit(account_id, 1)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    began = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return (ops // threads) * threads / (time.perf_counter() - began)
+
+def main():
+    """Ejecuta el benchmark e imprime una tabla de resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ops', type=int, default=2000)
+    parser.add_argument('--directory', default=None, help="directorio donde crear los logs temporales")
+    args = parser.parse_args()
+
+    modes = (("en memoria", None), ("log sin fsync", False), ("log con fsync", True))
+    print(f"{'hilos':>6}" + "".join(f"{name:>16}" for name, _ in modes))
+    for threads in THREAD_COUNTS:
+        row = []
+        for _, fsync in modes:
+            directory = tempfile.mkdtemp(dir=args.directory)
+            try:
+                persistence = None if fsync is None else BankPersistence(directory, fsync=fsync)
+                server = BankServer(persistence=persistence)
+                row.append(run(server, threads, args.ops))
+                if persistence is not None:
+                    persistence.close()
+            finally:
+                shutil.rmtree(directory)
+        print(f"{threads:>6}" + "".join(f"{value:>16.0f}" for value in row))
+
+if __name__ == "__main__":
+    main()
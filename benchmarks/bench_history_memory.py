@@ -0,0 +1,79 @@
+"""
+Benchmark de memoria del historial de transacciones.
+
+Compara la memoria por transacción del historial por columnas (TransactionLog)
+con la representación anterior: una lista de textos formateados como
+"Transferencia de cuenta_x: 25" más una lista paralela de marcas de tiempo.
+
+Uso:
+    python benchmarks/bench_history_memory.py [--transactions 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bank_server import TransactionLog, DEPOSIT, WITHDRAW, TRANSFER_OUT, TRANSFER_IN
+
+def operations(count):
+    """Genera operaciones aleatorias reproducibles (tipo, importe, contraparte)."""
+    rng = random.Random(0)
+    counterparties = [f"account_{i}" for i in range(100)]
+    for _ in range(count):
+        kind = rng.choice((DEPOSIT, WITHDRAW, TRANSFER_OUT, TRANSFER_IN))
+        amount = rng.choice((rng.randint(1, 5000), round(rng.uniform(1, 5000), 2)))
+        counterparty = rng.choice(counterparties) if kind in (TRANSFER_OUT, TRANSFER_IN) else None
+        yield kind, amount, counterparty
+
+def as_text(kind, amount, counterparty):
+    """Formatea una operación como lo hacía el historial de textos."""
+    if kind == DEPOSIT:
+        return f"Depósito: {amount}"
+    if kind == WITHDRAW:
+        return f"Retiro: {amount}"
+    if kind == TRANSFER_OUT:
+        return f"Transferencia a {counterparty}: {amount}"
+    return f"Transferencia de {counterparty}: {amount}"
+
+def measure(build, count):
+    """Devuelve los bytes por transacción que ocupa la estructura construida."""
+    ops = list(operations(count))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    structure = build(ops)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del structure
+    return (after - before) / count
+
+def build_text(ops):
+    history, times = [], []
+    for kind, amount, counterparty in ops:
+        history.append(as_text(kind, amount, counterparty))
+        times.append(time.time())
+    return history, times
+
+def build_columns(ops):
+    log = TransactionLog()
+    for kind, amount, counterparty in ops:
+        log.append(kind, amount, counterparty, time.time())
+    return log
+
+def main():
+    """Ejecuta el benchmark e imprime los bytes por transacción."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--transactions', type=int, default=100000)
+    args = parser.parse_args()
+
+    text = measure(build_text, args.transactions)
+    columns = measure(build_columns, args.transactions)
+    print(f"{'textos + marcas de tiempo':<28}{text:>8.1f} bytes/transacción")
+    print(f"{'TransactionLog (columnas)':<28}{columns:>8.1f} bytes/transacción")
+    print(f"{'reducción':<28}{(1 - columns / text) * 100:>7.1f} %")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark de las consultas agregadas del libro mayor.
+
+Compara Ledger.total_inflow y Ledger.top_accounts con el recorrido en Python de
+los historiales de todas las cuentas, que es lo que habría que hacer sin el
+libro mayor. Con NumPy instalado las consultas del libro mayor son vectoriales.
+
+Uso:
+    python benchmarks/bench_ledger.py [--accounts 1000] [--transactions 200000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import bank_ledger
+from bank_server import BankServer, DEPOSIT, TRANSFER_IN
+
+def populate(accounts, transactions):
+    """Crea un servidor con movimientos aleatorios reproducibles."""
+    rng = random.Random(0)
+    server = BankServer()
+    ids = [f"account_{i}" for i in range(accounts)]
+    for account_id in ids:
+        server.create_account(account_id, "password")
+    for _ in range(transactions):
+        operation = rng.random()
+        account_id = rng.choice(ids)
+        if operation < 0.5:
+            server._deposit(account_id, rng.randint(1, 1000))
+        elif operation < 0.7:
+            server._withdraw(account_id, rng.randint(1, 100))
+        else:
+            server._transfer(account_id, rng.choice(ids), rng.randint(1, 100))
+    return server
+
+def inflow_by_history(server):
+    """Total de entradas por cuenta recorriendo cada historial."""
+    totals = {}
+    for account_id, history in server.transaction_history.items():
+        totals[account_id] = sum(amount for kind, amount in zip(history.kinds, history.amounts)
+                                 if kind in (DEPOSIT, TRANSFER_IN))
+    return totals
+
+def timed(function, repeat=5):
+    """Devuelve el mejor tiempo de varias ejecuciones, en milisegundos."""
+    best = float('inf')
+    for _ in range(repeat):
+        began = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - began)
+    return best * 1000
+
+def main():
+    """Ejecuta el benchmark e imprime los tiempos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--accounts', type=int, default=1000)
+    parser.add_argument('--transactions', type=int, default=200000)
+    args = parser.parse_args()
+
+    server = populate(args.accounts, args.transactions)
+    backend = "NumPy" if bank_ledger.np is not None else "Python (sin NumPy)"
+    print(f"{len(server.ledger)} filas en el libro mayor, consultas con {backend}")
+    print(f"{'recorrer historiales (entradas)':<34}{timed(lambda: inflow_by_history(server)):>10.1f} ms")
+    print(f"{'Ledger.total_inflow':<34}{timed(server.total_inflow):>10.1f} ms")
+    print(f"{'Ledger.top_accounts(10)':<34}{timed(lambda: server.top_accounts(10)):>10.1f} ms")
+    print(f"{'Ledger.daily_volume':<34}{timed(server.daily_volume):>10.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Prueba de carga del servicio bancario RPC.
+
+Inicia ``run_server`` (o, con ``--shards``, ``run_sharded_server``) en otro
+proceso y simula muchos clientes concurrentes con
+AsyncBankClient sobre un pool de conexiones compartido. Cada cliente tiene su
+propia cuenta y elige en cada paso una operación según la mezcla configurada
+(``deposit``, ``withdraw``, ``transfer``, ``get_balance``, ``get_notifications``).
+Informa del rendimiento total y de la latencia p50/p95/p99 de cada operación,
+guarda los resultados en JSON y, si se indica una línea base, señala las
+regresiones y termina con código 1.
+
+Uso:
+    python benchmarks/bench_load.py [--clients 200] [--duration 10]
+        [--mix deposit=30,withdraw=20,transfer=20,get_balance=25,get_notifications=5]
+        [--output resultados.json] [--baseline base.json] [--tolerance 0.15]
+        [--save-baseline base.json] [--shards 4] [--max-in-flight 64]
+
+Con ``--max-in-flight`` el servidor rechaza con 503 las solicitudes que no
+caben, en lugar de dejarlas en el backlog; los rechazos cuentan como errores.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bank_async_client import AsyncBankClient, AsyncConnectionPool
+from bank_server import DEFAULT_MAX_WORKERS, run_server
+from bank_shards import run_sharded_server
+
+OPERATIONS = ('deposit', 'withdraw', 'transfer', 'get_balance', 'get_notifications')
+DEFAULT_MIX = "deposit=30,withdraw=20,transfer=20,get_balance=25,get_notifications=5"
+PERCENTILES = (50, 95, 99)
+INITIAL_BALANCE = 1000000
+
+def parse_mix(text):
+    """
+    Interpreta una mezcla de operaciones ``operación=peso,...``.
+
+    Args:
+        text (str): La mezcla.
+
+    Returns:
+        dict: Peso por operación.
+    """
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Operación desconocida: {name}")
+        mix[name] = float(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("La mezcla no tiene ninguna operación con peso.")
+    return mix
+
+def percentile(sorted_values, percent):
+    """
+    Calcula un percentil por el método del rango más cercano.
+
+    Args:
+        sorted_values (list): Valores ordenados.
+        percent (float): Percentil entre 0 y 100.
+
+    Returns:
+        float: El percentil, o 0.0 si no hay valores.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+def summarize(latencies, errors, duration):
+    """
+    Resume las latencias medidas.
+
+    Args:
+        latencies (dict): Latencias en segundos por operación.
+        errors (dict): Errores por operación.
+        duration (float): Duración de la medición en segundos.
+
+    Returns:
+        dict: Rendimiento total y, por operación, número, errores y percentiles en milisegundos.
+    """
+    operations = {}
+    for name, values in latencies.items():
+        values.sort()
+        operations[name] = {'count': len(values), 'errors': errors[name],
+                            'throughput': len(values) / duration}
+        for percent in PERCENTILES:
+            operations[name][f'p{percent}_ms'] = percentile(values, percent) * 1000
+    total = sorted(value for values in latencies.values() for value in values)
+    summary = {'count': len(total), 'errors': sum(errors.values()), 'throughput': len(total) / duration}
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = percentile(total, percent) * 1000
+    return {'total': summary, 'operations': operations}
+
+def compare(results, baseline, tolerance):
+    """
+    Compara unos resultados con una línea base.
+
+    Es una regresión que el rendimiento baje, o que la latencia p95 o p99
+    suba, más de ``tolerance`` (fracción) respecto a la línea base.
+
+    Args:
+        results (dict): Resultados actuales.
+        baseline (dict): Resultados de referencia.
+        tolerance (float): Variación admitida, por ejemplo 0.15.
+
+    Returns:
+        list: Descripción de cada regresión encontrada.
+    """
+    regressions = []
+    pairs = [('total', results['total'], baseline['total'])]
+    pairs += [(name, stats, baseline['operations'][name])
+              for name, stats in results['operations'].items() if name in baseline['operations']]
+    for name, current, reference in pairs:
+        if current['throughput'] < reference['throughput'] * (1 - tolerance):
+            regressions.append(f"{name}: rendimiento {current['throughput']:.0f} op/s "
+                               f"(línea base {reference['throughput']:.0f})")
+        for key in ('p95_ms', 'p99_ms'):
+            if current[key] > reference[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {current[key]:.2f} (línea base {reference[key]:.2f})")
+    return regressions
+
+def free_port():
+    """Devuelve un puerto TCP libre."""
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+def start_server(max_workers, kdf_iterations, shards=0, max_in_flight=None):
+    """
+    Inicia el servidor en otro proceso y espera a que acepte conexiones.
+
+    Args:
+        max_workers (int): Hilos del pool del servidor.
+        kdf_iterations (int): Coste del hash de contraseñas.
+        shards (int): Con 0 se usa ``run_server``; si no, ``run_sharded_server`` con ese número de shards.
+        max_in_flight (int): Solicitudes admitidas a la vez por ``run_server``; None sin límite.
+
+    Returns:
+        tuple: (proceso, url)
+    """
+    port = free_port()
+    kwargs = {'port': port, 'max_workers': max_workers, 'log_requests': False, 'kdf_iterations': kdf_iterations}
+    if shards:
+        # Los shards usan puertos consecutivos a partir de este.
+        kwargs.update(shards=shards, shard_base_port=free_port())
+    elif max_in_flight:
+        kwargs['max_in_flight'] = max_in_flight
+    # Un proceso daemon no puede lanzar los procesos de los shards.
+    process = multiprocessing.Process(target=run_sharded_server if shards else run_server,
+                                      daemon=not shards, kwargs=kwargs)
+    process.start()
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(('localhost', port)).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+    return process, f"http://localhost:{port}/RPC2"
+
+async def run_load(url, clients, connections, duration, mix, seed):
+    """
+    Ejecuta la carga y mide la latencia de cada operación.
+
+    Args:
+        url (str): URL del servidor.
+        clients (int): Clientes simulados.
+        connections (int): Conexiones del pool compartido.
+        duration (float): Duración de la medición en segundos.
+        mix (dict): Peso por operación.
+        seed (int): Semilla de la elección de operaciones.
+
+    Returns:
+        dict: Resumen de la medición (ver summarize).
+    """
+    pool = AsyncConnectionPool(url, connections)
+    customers = [AsyncBankClient(pool=pool) for _ in range(clients)]
+    account_ids = [f"load_{index}" for index in range(clients)]
+    for customer, account_id in zip(customers, account_ids):
+        await customer.create_account(account_id, "password")
+        await customer.login(account_id, "password", notifications_enabled=False)
+        await customer.deposit(INITIAL_BALANCE)
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+
+    async def customer_loop(index, customer):
+        chooser = random.Random(seed + index)
+        while loop.time() < deadline:
+            name = chooser.choices(names, weights)[0]
+            if name == 'transfer':
+                call = customer.transfer(account_ids[chooser.randrange(clients)], 1)
+            elif name in ('deposit', 'withdraw'):
+                call = getattr(customer, name)(1)
+            else:
+                call = getattr(customer, name)()
+            started = time.perf_counter()
+            try:
+                await call
+            except Exception:
+                errors[name] += 1
+                continue
+            latencies[name].append(time.perf_counter() - started)
+
+    started = loop.time()
+    await asyncio.gather(*(customer_loop(index, customer) for index, customer in enumerate(customers)))
+    elapsed = loop.time() - started
+    await pool.close()
+    return summarize(latencies, errors, elapsed)
+
+def print_report(results):
+    """Imprime los resultados como tabla."""
+    header = f"{'operación':>18}{'op/s':>10}{'errores':>9}" + "".join(f"{f'p{p} ms':>10}" for p in PERCENTILES)
+    print(header)
+    rows = list(results['operations'].items()) + [('total', results['total'])]
+    for name, stats in rows:
+        print(f"{name:>18}{stats['throughput']:>10.0f}{stats['errors']:>9}"
+              + "".join(f"{stats[f'p{p}_ms']:>10.2f}" for p in PERCENTILES))
+
+def main():
+    """Ejecuta la prueba de carga, guarda los resultados y los compara con la línea base."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--connections', type=int, default=32, help="conexiones del pool compartido")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument('--server-workers', type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument('--kdf-iterations', type=int, default=1000,
+                        help="coste del hash de contraseñas en el servidor (bajo para preparar rápido)")
+    parser.add_argument('--shards', type=int, default=0,
+                        help="repartir las cuentas en este número de procesos (0: un solo BankServer)")
+    parser.add_argument('--max-in-flight', type=int,
+                        help="solicitudes admitidas a la vez; las demás se rechazan (sin --shards)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="archivo JSON donde guardar los resultados")
+    parser.add_argument('--baseline', help="archivo JSON con los resultados de referencia")
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    parser.add_argument('--save-baseline', help="guardar los resultados como nueva línea base")
+    args = parser.parse_args()
+
+    process, url = start_server(args.server_workers, args.kdf_iterations, args.shards, args.max_in_flight)
+    try:
+        results = asyncio.run(run_load(url, args.clients, args.connections, args.duration, args.mix, args.seed))
+    finally:
+        process.terminate()
+        process.join()
+    results['config'] = {'clients': args.clients, 'connections': args.connections, 'duration': args.duration,
+                         'mix': args.mix, 'server_workers': args.server_workers, 'shards': args.shards,
+                         'max_in_flight': args.max_in_flight,
+                         'python': platform.python_version(), 'cpus': os.cpu_count()}
+    print_report(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as results_file:
+                json.dump(results, results_file, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print("\nRegresiones respecto a la línea base:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nSin regresiones respecto a la línea base.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark de la representación de los saldos.
+
+Aplica los mismos depósitos pequeños (como una nómina repartida en muchos
+pagos de céntimos) con tres representaciones: floats en unidades, como antes,
+Decimal y céntimos enteros, que es lo que guarda ahora BankServer. Para cada
+una se mide el coste por operación de la suma sola y de la conversión desde el
+importe recibido por RPC más la suma, y el error acumulado respecto al total
+exacto. Al final se mide BankServer.deposit completo.
+
+Uso:
+    python benchmarks/bench_money.py [--operations 1000000]
+"""
+import argparse
+from decimal import Decimal
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bank_money import to_cents
+from bank_server import BankServer
+
+def make_amounts(operations):
+    """Importes reproducibles con dos decimales, como floats recibidos por RPC."""
+    rng = random.Random(0)
+    return [rng.randint(1, 2000) / 100 for _ in range(operations)]
+
+def accumulate(values, start):
+    """Suma los valores uno a uno, como hace cada depósito sobre el saldo."""
+    balance = start
+    for value in values:
+        balance += value
+    return balance
+
+def accumulate_converted(amounts, start, convert):
+    """Convierte cada importe recibido y lo suma."""
+    balance = start
+    for amount in amounts:
+        balance += convert(amount)
+    return balance
+
+def timed(function, operations):
+    """Ejecuta la función y devuelve (resultado, nanosegundos por operación)."""
+    began = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - began) / operations * 1e9
+
+def main():
+    """Ejecuta el benchmark e imprime los tiempos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--operations', type=int, default=1000000)
+    args = parser.parse_args()
+
+    amounts = make_amounts(args.operations)
+    exact_cents = sum(round(amount * 100) for amount in amounts)
+    representations = [
+        ("float (anterior)", amounts, 0.0, float, lambda total: Decimal(repr(total))),
+        ("Decimal", [Decimal(repr(amount)) for amount in amounts], Decimal(0),
+         lambda amount: Decimal(repr(amount)), lambda total: total),
+        ("céntimos int", [round(amount * 100) for amount in amounts], 0, to_cents,
+         lambda total: Decimal(total) / 100),
+    ]
+    print(f"{args.operations} depósitos, total exacto {Decimal(exact_cents) / 100}")
+    print(f"{'representación':<18}{'suma ns/op':>12}{'conv.+suma ns/op':>18}  error acumulado")
+    for name, values, start, convert, to_decimal in representations:
+        _, add_ns = timed(lambda: accumulate(values, start), args.operations)
+        total, convert_ns = timed(lambda: accumulate_converted(amounts, start, convert), args.operations)
+        error = to_decimal(total) - Decimal(exact_cents) / 100
+        print(f"{name:<18}{add_ns:>12.1f}{convert_ns:>18.1f}  {error}")
+
+    server = BankServer()
+    server.create_account("payroll", "password")
+    sample = amounts[:min(args.operations, 200000)]
+    _, deposit_ns = timed(lambda: [server.deposit("payroll", amount) for amount in sample], len(sample))
+    print(f"BankServer.deposit con céntimos: {deposit_ns / 1000:.2f} µs/op, saldo {server.get_balance('payroll')}")
+
+if __name__ == "__main__":
+    main()
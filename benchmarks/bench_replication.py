@@ -0,0 +1,68 @@
+"""
+Benchmark de la replicación a réplicas de solo lectura.
+
+Mide cuántos depósitos por segundo completa el primario sin réplicas y con
+una o varias réplicas conectadas en el mismo proceso, y cuánto tarda la última
+réplica en aplicar todas las mutaciones desde que el primario termina. Como
+publicar una mutación solo la añade a la lista de cada réplica, el coste en el
+primario debería crecer poco con el número de réplicas.
+
+Uso:
+    python benchmarks/bench_replication.py [--ops 100000] [--followers 0 1 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bank_replication import ReplicationFollower, ReplicationPrimary
+from bank_server import BankServer
+
+def run(follower_count, ops):
+    """
+    Aplica depósitos en un primario con ``follower_count`` réplicas.
+
+    Args:
+        follower_count (int): Réplicas conectadas.
+        ops (int): Depósitos.
+
+    Returns:
+        tuple: (depósitos por segundo en el primario, segundos hasta que la última réplica se pone al día)
+    """
+    primary = BankServer(kdf_iterations=1000, replication=ReplicationPrimary())
+    primary.create_account("account", "password")
+    followers = []
+    for _ in range(follower_count):
+        follower = ReplicationFollower(BankServer(), *primary.replication.address)
+        follower.start(timeout=5)
+        follower.wait_for(primary.replication.last_seq, timeout=5)
+        followers.append(follower)
+    try:
+        started = time.perf_counter()
+        for _ in range(ops):
+            primary.deposit("account", 1)
+        finished = time.perf_counter()
+        for follower in followers:
+            follower.wait_for(primary.replication.last_seq)
+        caught_up = time.perf_counter()
+        return ops / (finished - started), caught_up - finished
+    finally:
+        for follower in followers:
+            follower.close()
+        primary.replication.close()
+
+def main():
+    """Ejecuta el benchmark e imprime los resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ops', type=int, default=100000)
+    parser.add_argument('--followers', type=int, nargs='+', default=[0, 1, 2])
+    args = parser.parse_args()
+    print(f"{'réplicas':>9}{'depósitos/s':>14}{'retraso final (s)':>20}")
+    for follower_count in args.followers:
+        throughput, lag = run(follower_count, args.ops)
+        print(f"{follower_count:>9}{throughput:>14.0f}{lag:>20.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark del protocolo binario frente a XML-RPC.
+
+Para ``get_balance``, ``deposit`` y una página de ``get_transaction_history``
+mide, sin red, el CPU por llamada del recorrido completo de serialización
+(el cliente codifica, el servidor decodifica, ejecuta y codifica, el cliente
+decodifica) y los bytes que viajan por la conexión en cada sentido, incluidas
+las cabeceras HTTP de XML-RPC y el prefijo de longitud de las tramas binarias.
+
+Después lanza ``run_async_server`` con el puerto binario en otro proceso y mide
+por loopback las llamadas por segundo de ``get_balance`` y el CPU del cliente
+por llamada con cada protocolo.
+
+Uso:
+    python benchmarks/bench_wire.py [--calls 5000]
+"""
+import argparse
+import multiprocessing
+import os
+import platform
+import socket
+import sys
+import time
+import xmlrpc.client
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bank_async_server import _make_dispatcher, run_async_server
+from bank_binary import FRAME_HEADER, decode, frame
+from bank_client import connect
+from bank_server import BankServer
+
+HISTORY_PAGE = 50
+
+def xml_request_head(body):
+    """Cabeceras que envía ``xmlrpc.client.Transport`` con un cuerpo dado."""
+    return (f"POST /RPC2 HTTP/1.1\r\nHost: localhost:8000\r\nAccept-Encoding: gzip\r\n"
+            f"Content-Type: text/xml\r\nUser-Agent: Python-xmlrpc/{platform.python_version()[:4]}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode()
+
+def xml_response_head(body):
+    """Cabeceras con las que responde AsyncBankServer."""
+    return (f"HTTP/1.1 200 OK\r\nContent-Type: text/xml\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: keep-alive\r\n\r\n").encode()
+
+def measure_marshalling(calls):
+    """
+    Mide CPU y bytes por llamada de ambos protocolos sin red.
+
+    Args:
+        calls (int): Llamadas por operación.
+
+    Returns:
+        list: Filas ``(operación, cpu xml µs, cpu binario µs, bytes xml, bytes binario)``.
+    """
+    bank_server = BankServer(kdf_iterations=1000)
+    bank_server.create_account("cuenta", "password")
+    for _ in range(HISTORY_PAGE):
+        bank_server.deposit("cuenta", 1)
+    dispatcher = _make_dispatcher(bank_server)
+    operations = (("get_balance", ("cuenta",)), ("deposit", ("cuenta", 1)),
+                  ("get_transaction_history", ("cuenta", 0, HISTORY_PAGE, {})))
+
+    rows = []
+    for method, params in operations:
+        started = time.process_time()
+        for _ in range(calls):
+            request = xmlrpc.client.dumps(params, method).encode()
+            response = dispatcher._marshaled_dispatch(request)
+            xmlrpc.client.loads(response)
+        xml_cpu = (time.process_time() - started) / calls
+        xml_bytes = (len(xml_request_head(request)) + len(request)
+                     + len(xml_response_head(response)) + len(response))
+
+        started = time.process_time()
+        for _ in range(calls):
+            request = frame([method, list(params)])
+            name, arguments = decode(request[FRAME_HEADER.size:])
+            response = frame([True, dispatcher._dispatch(name, arguments)])
+            decode(response[FRAME_HEADER.size:])
+        binary_cpu = (time.process_time() - started) / calls
+        rows.append((method, xml_cpu * 1e6, binary_cpu * 1e6, xml_bytes, len(request) + len(response)))
+    return rows
+
+def free_port():
+    """Devuelve un puerto TCP libre."""
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+def wait_for(port):
+    """Espera a que un puerto acepte conexiones."""
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(('localhost', port)).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+def measure_loopback(calls):
+    """
+    Mide llamadas por segundo y CPU del cliente por llamada contra un servidor real.
+
+    Args:
+        calls (int): Llamadas por protocolo.
+
+    Returns:
+        list: Filas ``(protocolo, llamadas/s, cpu cliente µs)``.
+    """
+    port, binary_port = free_port(), free_port()
+    process = multiprocessing.Process(target=run_async_server, daemon=True,
+                                      kwargs={'port': port, 'binary_port': binary_port})
+    process.start()
+    try:
+        wait_for(port)
+        wait_for(binary_port)
+        connect(f"http://localhost:{port}/RPC2").create_account("cuenta", "password")
+        rows = []
+        for name, url in (("XML-RPC", f"http://localhost:{port}/RPC2"), ("binario", f"bank://localhost:{binary_port}")):
+            proxy = connect(url)
+            proxy.get_balance("cuenta")
+            started, cpu_started = time.perf_counter(), time.process_time()
+            for _ in range(calls):
+                proxy.get_balance("cuenta")
+            elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+            proxy('close')()
+            rows.append((name, calls / elapsed, cpu / calls * 1e6))
+        return rows
+    finally:
+        process.terminate()
+        process.join()
+
+def main():
+    """Ejecuta el benchmark e imprime las tablas de resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=5000)
+    args = parser.parse_args()
+
+    print("Serialización y despacho, sin red")
+    print(f"{'operación':>24}{'cpu xml µs':>12}{'cpu bin µs':>12}{'bytes xml':>11}{'bytes bin':>11}")
+    for method, xml_cpu, binary_cpu, xml_bytes, binary_bytes in measure_marshalling(args.calls):
+        print(f"{method:>24}{xml_cpu:>12.1f}{binary_cpu:>12.1f}{xml_bytes:>11}{binary_bytes:>11}")
+
+    print("\nget_balance por loopback (servidor en otro proceso)")
+    print(f"{'protocolo':>24}{'llamadas/s':>12}{'cpu cliente µs':>16}")
+    for name, rate, cpu in measure_loopback(args.calls):
+        print(f"{name:>24}{rate:>12.0f}{cpu:>16.1f}")
+
+if __name__ == "__main__":
+    main()